@@ -0,0 +1,182 @@
+"""
+Per-item profitability in analyze.py: scalar loop vs the NumPy engine.
+
+    python -m benchmarks.bench_analyze --rows 1000000
+
+"scalar" is the former loop (profit/shipping_fee/commission_amount called
+per item and a dict built for every item); "engine" prices the same rows
+through src/analysis/engine.py. Loading the input is not included.
+
+With --stream-rows N an NDJSON file of N rows is analyzed end to end by
+`src.analyze` with and without --stream, each in its own process, to
+compare run time and peak memory.
+
+With --grid, a 5 commission x 10 cost x 2 tier table scenario grid is
+evaluated in one ScenarioGrid pass and as one engine run per scenario.
+
+With --groups, the rows get brands, merchants and badges and go through
+the group-by stage in 50k-row chunks; the retained state is reported
+next to the row count.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.analysis import engine
+from src.analysis.pricing import commission_amount, normalize_tiers, profit, shipping_fee
+from src.normalize import row_price
+
+
+def _scalar(items, cost, commission, tiers):
+    per_item = []
+    for it in items:
+        p = row_price(it)
+        if p is None:
+            continue
+        pf = profit(p, cost, commission, tiers)
+        per_item.append(
+            {
+                "productId": it.get("productId"),
+                "currentPrice": p,
+                "shippingFee": shipping_fee(p, tiers),
+                "commissionFee": commission_amount(p, commission),
+                "profit": round(pf, 2),
+                "profitable": pf > 0,
+            }
+        )
+    return per_item[:100]
+
+
+def _engine(items, cost, commission, tiers):
+    prices = engine.price_array(items)
+    engine.percentiles(prices, [10, 25, 50, 75, 90])
+    cols = engine.evaluate(prices, cost, commission, tiers)
+    return engine.item_rows(items, prices, cols, limit=100)
+
+
+_PEAK = (
+    "import resource, sys; from src import analyze; analyze.main(sys.argv[1:]); "
+    "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"
+)
+
+
+def _end_to_end(rows: int) -> None:
+    rng = random.Random(2)
+    with tempfile.TemporaryDirectory() as tmp:
+        inp = Path(tmp) / "in.ndjson"
+        with inp.open("w", encoding="utf-8") as f:
+            for i in range(rows):
+                kurus = rng.randint(1_000, 100_000)
+                row = {"productId": i, "name": f"Ürün {i}", "price": f"{kurus // 100} TL", "priceKurus": kurus}
+                f.write(json.dumps(row) + "\n")
+        for label, extra in (("batch", []), ("stream", ["--stream"])):
+            args = ["--in", str(inp), "--commission", "12", "--default-cost", "80"]
+            args += ["--out-dir", str(Path(tmp) / label)]
+            t0 = time.perf_counter()
+            out = subprocess.run(
+                [sys.executable, "-c", _PEAK, *args, *extra],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            t = time.perf_counter() - t0
+            print(f"{label:>6}: {t:6.2f} s  peak RSS {int(out.split()[-1]) / 1024:7.1f} MiB")
+
+
+def _grid(items) -> None:
+    from src.analysis.scenarios import ScenarioGrid
+
+    prices = engine.price_array(items)
+    commissions = [10.0, 12.0, 14.0, 16.0, 18.0]
+    costs = [40.0 + 20 * i for i in range(10)]
+    tables = [
+        normalize_tiers([(150.0, 42.70), (300.0, 72.20)]),
+        normalize_tiers([(200.0, 35.0), (None, 60.0)]),
+    ]
+    t0 = time.perf_counter()
+    grid = ScenarioGrid(commissions, costs, tables, [5, 10, 15])
+    grid.add(prices)
+    grid.report()
+    t_grid = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for tiers in tables:
+        for c in commissions:
+            for k in costs:
+                engine.totals(engine.evaluate(prices, k, c, tiers))
+    t_runs = time.perf_counter() - t0
+    print(f"{len(grid)} scenarios: grid {t_grid * 1e3:.0f} ms, per-scenario runs {t_runs * 1e3:.0f} ms")
+
+
+def _groups(items) -> None:
+    from src.analysis.groupby import GroupBy
+
+    rng = random.Random(3)
+    badges = ["Kargo Bedava", "Hızlı Teslimat", "Çok Satan", "Kampanya"]
+    for it in items:
+        it["brand"] = f"Marka {rng.randint(1, 2_000)}"
+        it["merchantId"] = rng.randint(1, 20_000)
+        it["badges"] = rng.sample(badges, rng.randint(0, 2))
+        it["soldLast3Days"] = rng.randint(0, 500)
+        it["favoritedCount"] = rng.randint(0, 10_000)
+    tiers = normalize_tiers([(150.0, 42.70), (300.0, 72.20)])
+    t0 = time.perf_counter()
+    gb = GroupBy(top_k=10)
+    for start in range(0, len(items), 50_000):
+        chunk = items[start : start + 50_000]
+        prices = engine.price_array(chunk)
+        gb.add(chunk, prices, engine.evaluate(prices, 80.0, 12.0, tiers))
+    report = gb.report()
+    t = time.perf_counter() - t0
+    groups = sum(len(g.index) for g in gb.groups)
+    retained = sum(s.retained for g in gb.groups for s in g.sketches)
+    print(f"group-by: {t:.2f} s  {len(items) / t / 1e6:.2f} M rows/s")
+    print(f"{groups} groups, {retained} sketch values retained for {len(items)} rows")
+    print({k: g["groupCount"] for k, g in report["groups"].items()})
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    p.add_argument("--rows", type=int, default=1_000_000)
+    p.add_argument("--stream-rows", type=int, default=0)
+    p.add_argument("--grid", action="store_true")
+    p.add_argument("--groups", action="store_true")
+    args = p.parse_args()
+    if args.stream_rows:
+        _end_to_end(args.stream_rows)
+        return
+
+    rng = random.Random(1)
+    items = [
+        {"productId": i, "priceKurus": rng.randint(1_000, 100_000)} for i in range(args.rows)
+    ]
+    if args.grid:
+        _grid(items)
+        return
+    if args.groups:
+        _groups(items)
+        return
+    tiers = normalize_tiers([(150.0, 42.70), (300.0, 72.20)])
+    timings = {}
+    for label, fn in (("scalar", _scalar), ("engine", _engine)):
+        t0 = time.perf_counter()
+        fn(items, 80.0, 12.0, tiers)
+        timings[label] = time.perf_counter() - t0
+        print(f"{label}: {timings[label] * 1e3:8.1f} ms  {args.rows / timings[label] / 1e6:6.2f} M rows/s")
+    print(f"speedup: {timings['scalar'] / timings['engine']:.1f}x")
+
+    # the array stage alone, once prices are loaded
+    prices = engine.price_array(items)
+    t0 = time.perf_counter()
+    engine.evaluate(prices, 80.0, 12.0, tiers)
+    print(f"evaluate on the price array: {(time.perf_counter() - t0) * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
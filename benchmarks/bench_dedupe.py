@@ -0,0 +1,49 @@
+"""
+Memory and speed of the dedupe backends on synthetic productIds.
+
+    python -m benchmarks.bench_dedupe --ids 10000000
+
+Ids are drawn from the live productId range (~1e8..1.2e9). "memory" is each
+backend's memory_bytes() estimate; the false-positive column probes ids that
+were never added (always 0 for the exact backends).
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from src.dedupe import BACKENDS, make_ids
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    p.add_argument("--ids", type=int, default=10_000_000)
+    p.add_argument("--probes", type=int, default=200_000, help="unseen ids to probe")
+    p.add_argument("--fp-rate", type=float, default=0.001)
+    p.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    args = p.parse_args()
+
+    rnd = random.Random(1)
+    ids = rnd.sample(range(100_000_000, 1_200_000_000), args.ids + args.probes)
+    added, unseen = ids[: args.ids], ids[args.ids :]
+    print(f"{args.ids:,} ids")
+    for kind in args.backends:
+        s = make_ids(kind, capacity=args.ids, fp_rate=args.fp_rate)
+        t0 = time.perf_counter()
+        for pid in added:
+            s.add(pid)
+        t_add = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        fp = sum(1 for pid in unseen if pid in s)
+        t_probe = time.perf_counter() - t0
+        mem = s.memory_bytes()
+        print(
+            f"{kind:>7}: memory {mem / 2**20:8.1f} MiB ({mem / args.ids:5.1f} B/id)"
+            f"  add {args.ids / t_add / 1e6:5.2f} M/s  lookup {len(unseen) / t_probe / 1e6:5.2f} M/s"
+            f"  false positives {fp / len(unseen):.4%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Output size and analysis load time per format on parsed listing rows.
+
+    python -m benchmarks.bench_formats --pages 2000
+
+"load" reads what src/analyze.py needs: whole rows for CSV/NDJSON (.gz/.zst
+decompressed on the fly), only ANALYSIS_COLUMNS for Parquet (prices are
+already numeric there). Pages are flushed in checkpoint-sized batches, so the
+compressed files are made of the same per-flush frames a crawl produces.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from src.analyze import ANALYSIS_COLUMNS
+from src.columnar import read_rows
+from src.compress import open_text
+from src.parse import parse_products
+from src.writer import WRITERS
+
+from .fixtures import listing_html
+
+
+def _load(path: Path, fmt: str):
+    if fmt == "parquet":
+        return read_rows(path, ANALYSIS_COLUMNS)
+    with open_text(path, newline="") as f:
+        if fmt == "csv":
+            return list(csv.DictReader(f))
+        return [json.loads(line) for line in f]
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    p.add_argument("--pages", type=int, default=2000, help="distinct 24-card pages")
+    p.add_argument("--flush-every", type=int, default=1, help="pages per flush (checkpoint)")
+    args = p.parse_args()
+
+    pages = [parse_products(listing_html(24, seed=s), page_index=s) for s in range(1, args.pages + 1)]
+    print(f"{sum(map(len, pages)):,} rows")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = None
+        for name in (
+            "out.ndjson", "out.ndjson.gz", "out.ndjson.zst",
+            "out.csv", "out.csv.zst", "out.parquet",
+        ):
+            fmt = name.split(".")[1]
+            out = Path(tmp) / name
+            w = WRITERS[fmt](out)
+            t0 = time.perf_counter()
+            for i, rows in enumerate(pages, 1):
+                w.write_many(rows)
+                if i % args.flush_every == 0:
+                    w.flush()
+            w.close()
+            t_write = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            n = len(_load(out, fmt))
+            t_load = time.perf_counter() - t0
+            size = out.stat().st_size
+            base = base or size
+            print(
+                f"{name:>15}: {size / 2**20:7.1f} MiB ({base / size:4.1f}x smaller than ndjson)"
+                f"  write {t_write * 1e3:7.0f} ms  load {t_load * 1e3:7.0f} ms ({n:,} rows)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Price history store: ingest rate and query latency over millions of points.
+
+    python -m benchmarks.bench_history --products 200000 --runs 10
+
+Each run observes every product once with a slightly drifted price. "open" is
+the first query after opening the store (segments loaded and merged); later
+queries reuse the merged view.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from src.history import PriceHistory
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    p.add_argument("--products", type=int, default=200_000)
+    p.add_argument("--runs", type=int, default=10)
+    args = p.parse_args()
+
+    rng = random.Random(1)
+    base = [rng.randint(50, 5000) for _ in range(args.products)]
+    t0 = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PriceHistory(Path(tmp) / "hist")
+        start = time.perf_counter()
+        for run in range(args.runs):
+            at = (t0 + timedelta(days=run)).isoformat()
+            rows = [
+                {
+                    "productId": 1_000_000 + i,
+                    "price": f"{price * rng.uniform(0.9, 1.1):.2f}".replace(".", ",") + " TL",
+                    "soldLast3Days": rng.randint(0, 500),
+                    "collectedAt": at,
+                }
+                for i, price in enumerate(base)
+            ]
+            for i in range(0, len(rows), 24):  # one listing page at a time
+                store.add_rows(rows[i : i + 24])
+        store.close()
+        t = time.perf_counter() - start
+        stats = store.stats()
+        print(
+            f"{stats['points']:,} points, {stats['segments']} segments, "
+            f"{stats['bytes'] / 2**20:.1f} MiB; ingest {stats['points'] / t / 1e3:.0f} k points/s"
+        )
+
+        reader = PriceHistory(Path(tmp) / "hist")
+        s = time.perf_counter()
+        reader.history(1_000_000)
+        print(f"open      : {(time.perf_counter() - s) * 1e3:8.1f} ms")
+        pids = [1_000_000 + rng.randrange(args.products) for _ in range(1000)]
+        s = time.perf_counter()
+        for pid in pids:
+            reader.history(pid)
+        print(f"history   : {(time.perf_counter() - s) * 1e3 / len(pids):8.3f} ms/query")
+        since = (t0 + timedelta(days=args.runs // 2)).isoformat()
+        for pct in (5.0, 15.0):
+            s = time.perf_counter()
+            n = len(reader.changed_since(since, pct, limit=None))
+            print(f"changes>{pct:>4.0f}%: {(time.perf_counter() - s) * 1e3:8.1f} ms  ({n:,} products)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+MB/sec of PDP script extraction on large synthetic product pages.
+
+    python -m benchmarks.bench_parse_pdp --reviews 5000 --bundle-kb 2000 --repeat 5
+
+"brace-loop" is the previous extraction (for each key: str.find, then a
+character loop balancing brackets, then json.loads); "scan" is
+parse_pdp._script_data (one jsonscan pass per script); "parse_pdp" is the
+whole parser including the DOM pass for badges.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+from selectolax.parser import HTMLParser
+
+from benchmarks.fixtures import pdp_html
+from src.parse_pdp import _script_data, parse_pdp
+
+
+def _balanced(txt: str, key: str, opener: str, closer: str):
+    idx = txt.find(f'"{key}"')
+    if idx == -1:
+        return None
+    start = txt.find(opener, idx)
+    depth = 0
+    j = start
+    while j < len(txt):
+        if txt[j] == opener:
+            depth += 1
+        elif txt[j] == closer:
+            depth -= 1
+            if depth == 0:
+                j += 1
+                break
+        j += 1
+    return json.loads(txt[start:j])
+
+
+def brace_loop(html: str) -> int:
+    found = {}
+    for script in HTMLParser(html).css("script"):
+        txt = script.text() or ""
+        for key, opener, closer in (
+            ("product", "{", "}"),
+            ("images", "[", "]"),
+            ("variants", "[", "]"),
+            ("webCategoryTree", "[", "]"),
+        ):
+            if key not in found and f'"{key}"' in txt:
+                try:
+                    found[key] = _balanced(txt, key, opener, closer)
+                except ValueError:
+                    pass
+    return len(found)
+
+
+def scan(html: str) -> int:
+    return len(_script_data(html))
+
+
+def full(html: str) -> int:
+    return len(parse_pdp(html))
+
+
+PARSERS = {"brace-loop": brace_loop, "scan": scan, "parse_pdp": full}
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    p.add_argument("--reviews", type=int, default=5000, help="reviews in the product state")
+    p.add_argument("--bundle-kb", type=int, default=2000, help="inline JS before the state")
+    p.add_argument("--repeat", type=int, default=5)
+    args = p.parse_args()
+
+    html = pdp_html(n_reviews=args.reviews, bundle_kb=args.bundle_kb)
+    mb = len(html) / 1e6
+    print(f"page: {mb:.1f} MB")
+    base = None
+    for name, fn in PARSERS.items():
+        best = float("inf")
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            fn(html)
+            best = min(best, time.perf_counter() - t0)
+        rate = mb / best
+        base = base or rate
+        print(f"{name:>10}: {rate:8.1f} MB/s  ({rate / base:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
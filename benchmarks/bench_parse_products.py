@@ -0,0 +1,66 @@
+"""
+Cards/sec of the listing parsers on large synthetic listing pages.
+
+    python -m benchmarks.bench_parse_products --cards 2000 --repeat 5
+
+"per-selector" is the previous parse_products body (one CSS query per field,
+kept as benchmarks.card_css); "single-pass" is the DOM extractor and
+"embedded-state" decodes the __SEARCH_APP_INITIAL_STATE__ JSON instead.
+Timings include HTML parsing / state lookup for the whole page.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import datetime, timezone
+
+from selectolax.parser import HTMLParser
+
+from benchmarks.card_css import extract_card_css
+from benchmarks.fixtures import listing_html
+from src.parse import parse_products
+
+
+def per_selector(html: str) -> int:
+    now = datetime.now(timezone.utc).isoformat()
+    cards = HTMLParser(html).css("div.p-card-wrppr")
+    return len([extract_card_css(card, 1, now) for card in cards])
+
+
+def single_pass(html: str) -> int:
+    return len(parse_products(html, 1, use_state=False))
+
+
+def embedded_state(html: str) -> int:
+    return len(parse_products(html, 1))
+
+
+PARSERS = {
+    "per-selector": per_selector,
+    "single-pass": single_pass,
+    "embedded-state": embedded_state,
+}
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    p.add_argument("--cards", type=int, default=2000, help="cards per page")
+    p.add_argument("--repeat", type=int, default=5)
+    args = p.parse_args()
+
+    html = listing_html(args.cards, with_state=True)
+    print(f"page: {args.cards} cards, {len(html) / 1e6:.1f} MB")
+    base = None
+    for name, fn in PARSERS.items():
+        best = float("inf")
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            n = fn(html)
+            best = min(best, time.perf_counter() - t0)
+        rate = n / best
+        base = base or rate
+        print(f"{name:>14}: {rate:10.0f} cards/s  ({rate / base:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
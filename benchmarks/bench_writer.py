@@ -0,0 +1,85 @@
+"""
+Output writer throughput on parsed listing rows.
+
+    python -m benchmarks.bench_writer --pages 2000
+
+Compares the old per-row json.dumps/DictWriter loop with NDJSONWriter/CSVWriter
+(orjson when installed) and the same writers behind BackgroundWriter. "caller"
+is the time the crawl thread spends inside write_many; "total" includes the
+final drain and close.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from src.parse import parse_products
+from src.writer import BackgroundWriter, CSVWriter, NDJSONWriter, orjson
+
+from .fixtures import listing_html
+
+
+def _legacy_ndjson(path, pages):
+    with path.open("w", encoding="utf-8") as f:
+        for rows in pages:
+            for r in rows:
+                f.write(json.dumps(r, ensure_ascii=False) + "\n")
+
+
+def _legacy_csv(path, pages):
+    with path.open("w", newline="", encoding="utf-8") as f:
+        w = None
+        for rows in pages:
+            rows = list(rows)
+            if w is None:
+                w = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+                w.writeheader()
+            for r in rows:
+                w.writerow({k: ("" if v is None else v) for k, v in r.items()})
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    p.add_argument("--pages", type=int, default=2000)
+    p.add_argument("--per-page", type=int, default=24)
+    args = p.parse_args()
+
+    samples = [parse_products(listing_html(args.per_page, seed=s), page_index=1) for s in range(20)]
+    pages = [samples[i % len(samples)] for i in range(args.pages)]
+    n_rows = sum(len(r) for r in pages)
+    print(f"{n_rows:,} rows, encoder={'orjson' if orjson else 'json'}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt, legacy, cls in (
+            ("ndjson", _legacy_ndjson, NDJSONWriter),
+            ("csv", _legacy_csv, CSVWriter),
+        ):
+            out = Path(tmp) / f"out.{fmt}"
+            t0 = time.perf_counter()
+            legacy(out, pages)
+            t = time.perf_counter() - t0
+            print(f"{fmt:>6} legacy     : caller {t * 1e3:7.1f} ms  {n_rows / t / 1e3:7.1f} k rows/s")
+            for label, make in (
+                ("writer     ", lambda: cls(out)),
+                ("background ", lambda: BackgroundWriter(cls(out))),
+            ):
+                w = make()
+                t0 = time.perf_counter()
+                for rows in pages:
+                    w.write_many(rows)
+                t_caller = time.perf_counter() - t0
+                w.close()
+                t = time.perf_counter() - t0
+                s = w.stats()
+                print(
+                    f"{fmt:>6} {label}: caller {t_caller * 1e3:7.1f} ms  total {t * 1e3:7.1f} ms"
+                    f"  {n_rows / t / 1e3:7.1f} k rows/s  {s['bytes'] / t / 2**20:6.1f} MiB/s"
+                )
+
+
+if __name__ == "__main__":
+    main()
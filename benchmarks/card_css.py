@@ -0,0 +1,109 @@
+"""
+The listing-card extractor parse.py used before the single-pass DOM walk:
+one CSS query per field. Kept as the reference the single-pass extractor is
+checked against (tests/test_parse.py) and as the baseline of
+bench_parse_products.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.parse import _card_row, _social_proof_fields
+
+
+def _text(node, sel: str) -> Optional[str]:
+    n = node.css_first(sel)
+    if not n:
+        return None
+    return n.text(strip=True) or None
+
+
+def _attr(node, sel: str, attr: str) -> Optional[str]:
+    n = node.css_first(sel)
+    if not n:
+        return None
+    return n.attributes.get(attr)
+
+
+def _text_any(node, selectors: List[str]) -> Optional[str]:
+    for sel in selectors:
+        v = _text(node, sel)
+        if v:
+            return v
+    return None
+
+
+def _extract_social_proof(card) -> Tuple[List[str], Dict[str, Optional[int]]]:
+    items: List[Tuple[str, Optional[str]]] = []
+    # Collect raw texts
+    for n in card.css(".social-proof .social-proof-text"):
+        t = n.text(strip=True)
+        if t:
+            # Try to find a highlighted number span first
+            focused = n.css_first(".focused-text")
+            focused_txt = focused.text(strip=True) if focused else None
+            items.append((t, focused_txt))
+    return _social_proof_fields(items)
+
+
+def extract_card_css(card, page_index: int, now: str) -> Dict[str, Any]:
+    pid = _attr(card, "div.p-card-wrppr", "data-id") or card.attributes.get(
+        "data-id"
+    )
+    href = _attr(card, "a.p-card-chldrn-cntnr", "href")
+
+    # price details
+    price_discounted = _text_any(
+        card,
+        [
+            ".price-item.lowest-price-discounted",
+            ".price-item.discounted",
+        ],
+    )
+    price_original = _text_any(card, [".price-item.lowest-price-original"])
+
+    badges: List[str] = []
+    for b in card.css(".badges-wrapper .product-badge .name"):
+        t = b.text(strip=True)
+        if t:
+            badges.append(t)
+
+    # Top badge wrapper (e.g., "En Çok Satan 1. Ürün")
+    top_badges: List[str] = []
+    for b in card.css(".badge-wrapper .badge-title"):
+        t = b.text(strip=True)
+        if t:
+            top_badges.append(t)
+
+    # Price labels (e.g., Son 30 Günün En Düşük Fiyatı!)
+    price_labels: List[str] = []
+    for n in card.css(".price-label-wrapper .low-price-title"):
+        t = n.text(strip=True)
+        if t:
+            price_labels.append(t)
+
+    # Social proof
+    social_texts, social = _extract_social_proof(card)
+
+    return _card_row(
+        page_index,
+        now,
+        pid=pid,
+        href=href,
+        brand=_text(card, ".prdct-desc-cntnr-ttl"),
+        name=_text(card, ".prdct-desc-cntnr-name"),
+        subtitle=_text(card, ".product-desc-sub-text"),
+        price_discounted=price_discounted,
+        price_original=price_original,
+        price_any=_text(card, ".price-item"),
+        rating_txt=_text(card, ".rating-score"),
+        rating_count_txt=_text(card, ".ratingCount"),
+        image_url=_attr(card, ".p-card-img", "src"),
+        v_value=_text(card, ".variant-options-overlay .variant-value"),
+        v_more=_text(card, ".variant-options-overlay .other-variant-count"),
+        badges=badges,
+        top_badges=top_badges,
+        price_labels=price_labels,
+        social_texts=social_texts,
+        social=social,
+    )
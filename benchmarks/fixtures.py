@@ -0,0 +1,173 @@
+"""Synthetic Trendyol-like pages for the benchmarks (markup mirrors the live site)."""
+from __future__ import annotations
+
+import json
+import random
+from typing import Any, Dict, List
+
+
+def listing_products(n: int, seed: int = 1) -> List[Dict[str, Any]]:
+    """Products in the shape of the embedded search state."""
+    rnd = random.Random(seed)
+    out = []
+    for i in range(n):
+        pid = 10_000_000 + i
+        price = float(rnd.randint(50, 5000)) + 0.9
+        out.append(
+            {
+                "id": pid,
+                "name": f"Pamuklu Basic T-Shirt {pid}",
+                "brand": {"id": pid % 37, "name": f"Marka {pid % 37}"},
+                "images": [f"/ty{pid % 1000}/product/media/images/{pid}/1_org_zoom.jpg"],
+                "url": f"/marka/urun-adi-p-{pid}?boutiqueId=61&merchantId={rnd.randint(1000, 999999)}",
+                "merchantId": None,
+                "ratingScore": {
+                    "averageRating": rnd.randint(30, 50) / 10,
+                    "totalCount": rnd.randint(1, 20000),
+                },
+                "price": {
+                    "sellingPrice": price,
+                    "discountedPrice": price,
+                    "originalPrice": price + 100.09,
+                },
+                "badges": [
+                    {"title": b}
+                    for b in rnd.sample(
+                        ["Kargo Bedava", "Hızlı Teslimat", "Çok Al Az Öde", "Kuponlu Ürün"], 2
+                    )
+                ],
+                "rankingBadge": {"title": "En Çok Satan 1. Ürün"},
+                "socialProof": (
+                    [{"key": "favoriteCount", "value": f"{rnd.randint(1, 900)},{rnd.randint(1, 9)}B"}]
+                    if rnd.random() < 0.7
+                    else []
+                ),
+                "categoryName": "T-Shirt",
+            }
+        )
+    return out
+
+
+def _tl(v: float) -> str:
+    txt = f"{v:,.0f}" if float(v).is_integer() else f"{v:,.2f}"
+    return txt.replace(",", "_").replace(".", ",").replace("_", ".") + " TL"
+
+
+def listing_card(prod: Dict[str, Any], rnd: random.Random) -> str:
+    pid = prod["id"]
+    stars = "".join(
+        '<div class="star-w"><div class="empty"><div class="star"></div></div>'
+        f'<div class="full" style="width:{rnd.randint(0, 100)}%"><div class="star"></div></div></div>'
+        for _ in range(5)
+    )
+    badges = "".join(
+        f'<div class="product-badge"><div class="name">{b["title"]}</div></div>'
+        for b in prod["badges"]
+    )
+    social = "".join(
+        '<div class="social-proof"><div class="social-proof-item">'
+        f'<p class="social-proof-text"><span class="focused-text">{sp["value"]} </span>kişi favoriledi!</p>'
+        "</div></div>"
+        for sp in prod["socialProof"]
+    )
+    price = prod["price"]
+    return (
+        f'<div class="p-card-wrppr with-campaign-view add-to-bs-card" data-id="{pid}" title="Ürün {pid}">'
+        '<div class="p-card-chldrn-cntnr card-border">'
+        f'<a class="p-card-chldrn-cntnr" href="{prod["url"].replace("&", "&amp;")}">'
+        '<div class="p-card-img-wr"><div class="image-container">'
+        f'<img class="p-card-img" loading="lazy" src="https://cdn.dsmcdn.com{prod["images"][0]}"></div>'
+        f'<div class="badges-wrapper">{badges}</div>'
+        f'<div class="badge-wrapper"><div class="badge-title">{prod["rankingBadge"]["title"]}</div></div>'
+        '<div class="variant-options-overlay"><div class="variant-value">S</div>'
+        '<div class="other-variant-count">+4 Beden</div></div></div>'
+        '<div class="card-desc-cntnr"><div class="prdct-desc-cntnr-wrppr"><div class="prdct-desc-cntnr">'
+        '<div class="prdct-desc-cntnr-ttl-w two-line-text">'
+        f'<span class="prdct-desc-cntnr-ttl" title="Marka">{prod["brand"]["name"]}</span>'
+        f'<span class="prdct-desc-cntnr-name hasRatings" title="Ürün">{prod["name"]}</span>'
+        '<div class="product-desc-sub-text">Erkek</div></div></div>'
+        f'<div class="ratings-container"><div class="ratings"><span class="rating-score">{prod["ratingScore"]["averageRating"]}</span>{stars}</div>'
+        f'<span class="ratingCount">({prod["ratingScore"]["totalCount"]})</span></div>'
+        f"{social}</div>"
+        '<div class="price-promotion-container"><div class="pr-bx-nm with-org-prc">'
+        f'<div class="price-item lowest-price-original">{_tl(price["originalPrice"])}</div>'
+        f'<div class="price-item lowest-price-discounted">{_tl(price["discountedPrice"])}</div></div>'
+        '<div class="price-label-wrapper"><span class="low-price-title">Son 30 Günün En Düşük Fiyatı!</span></div>'
+        "</div></div></a></div></div>"
+    )
+
+
+def listing_html(n_cards: int = 24, seed: int = 1, with_state: bool = False) -> str:
+    rnd = random.Random(seed)
+    products = listing_products(n_cards, seed)
+    cards = "".join(listing_card(p, rnd) for p in products)
+    state = ""
+    if with_state:
+        blob = json.dumps({"products": products, "totalCount": n_cards}, ensure_ascii=False)
+        state = f"<script>window.__SEARCH_APP_INITIAL_STATE__ = {blob};</script>"
+    return (
+        "<!DOCTYPE html><html><head><title>Trendyol</title></head><body>"
+        '<div id="search-app"><div class="srch-rslt-cntnt"><div class="prdct-cntnr-wrppr">'
+        f"{cards}</div></div></div>{state}</body></html>"
+    )
+
+
+def pdp_state(n_variants: int = 40, n_reviews: int = 200, seed: int = 1) -> Dict[str, Any]:
+    """PDP state with the fields parse_pdp reads plus bulky content around them."""
+    rnd = random.Random(seed)
+    pid = 10_000_000 + seed
+    return {
+        "product": {
+            "id": pid,
+            "productCode": f"TY{pid}",
+            "name": f"Pamuklu Basic T-Shirt {pid}",
+            "brand": {"id": 37, "name": "Marka 37"},
+            # descriptions are free text and routinely contain braces/quotes
+            "description": 'Ölçü tablosu: {"S": 44} [bkz. "beden"] \\ ' * 40,
+            "images": [f"/ty{i}/product/media/images/{pid}/{i}_org_zoom.jpg" for i in range(12)],
+            "ratingScore": {"averageRating": 4.4, "totalCount": 1234},
+            "favoriteCount": 5678,
+            "winnerVariant": {
+                "price": {
+                    "sellingPrice": {"value": 399.99, "text": "399,99 TL"},
+                    "discountedPrice": {"value": 349.99, "text": "349,99 TL"},
+                }
+            },
+            "variants": [
+                {
+                    "attributeValue": f"{n}",
+                    "itemNumber": pid * 100 + n,
+                    "stock": rnd.randint(0, 50),
+                    "price": {"value": 349.99},
+                }
+                for n in range(n_variants)
+            ],
+            "reviews": [
+                {"id": i, "comment": "Kalıbı {dar} \"değil\", tavsiye ederim! " * 5, "rate": rnd.randint(1, 5)}
+                for i in range(n_reviews)
+            ],
+            "merchantListing": {"merchant": {"id": 968, "name": "Satıcı A.Ş.", "officialName": "Satıcı"}},
+        },
+        "webCategoryTree": [{"id": i, "name": n} for i, n in enumerate(["Giyim", "Üst Giyim", "T-Shirt"])],
+    }
+
+
+def pdp_html(n_variants: int = 40, n_reviews: int = 200, bundle_kb: int = 0, seed: int = 1) -> str:
+    """
+    A PDP page; `n_reviews` and `bundle_kb` (inline JS noise with unbalanced-looking
+    braces in strings) scale it up to multi-MB sizes.
+    """
+    state = json.dumps(pdp_state(n_variants, n_reviews, seed), ensure_ascii=False)
+    chunk = 'function f(a){return a.replace("{","}")+"[";}var o={"x":"]}"};\n'
+    bundle = chunk * (bundle_kb * 1024 // len(chunk))
+    return (
+        "<!DOCTYPE html><html><head><title>Trendyol</title>"
+        f"<script>{bundle}</script></head><body>"
+        '<h1 class="product-title"><strong>Marka 37</strong> Pamuklu Basic T-Shirt</h1>'
+        '<div class="reviews-summary-average-rating">4.4</div>'
+        '<div class="reviews-summary-reviews-detail"><b>1234</b></div>'
+        '<div class="product-price"><div class="pr-bx-w"><span class="prc-dsc">349,99 TL</span></div></div>'
+        '<div class="category-top-ranking-wrap-text">En Çok Satan 3. Ürün</div>'
+        f"<script>window.__PRODUCT_DETAIL_APP_INITIAL_STATE__ = {state};</script>"
+        "</body></html>"
+    )
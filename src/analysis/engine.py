@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from ..normalize import row_price
+from .pricing import ShippingTier
+
+# Columnar counterparts of the scalar functions in pricing.py. Prices are a
+# float64 array with NaN for items without a price; every function evaluates
+# the whole array at once and agrees with its scalar version element-wise.
+
+
+def price_array(items: Iterable[Dict[str, Any]]) -> np.ndarray:
+    """Item prices in TL (priceKurus when present), NaN where missing."""
+    return np.fromiter(
+        (np.nan if (p := row_price(it)) is None else p for it in items),
+        dtype=np.float64,
+    )
+
+
+def tier_arrays(tiers: Sequence[ShippingTier]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (upper bounds, fees) of normalized tiers. An open-ended tier (up_to None)
+    gets an infinite bound; prices past the last bound pay the last fee.
+    """
+    bounds = np.array(
+        [np.inf if t.up_to is None else float(t.up_to) for t in tiers], dtype=np.float64
+    )
+    fees = np.array([float(t.fee) for t in tiers], dtype=np.float64)
+    return bounds, fees
+
+
+def shipping_fees(prices: np.ndarray, tiers: Sequence[ShippingTier]) -> np.ndarray:
+    """shipping_fee() per price: the first tier whose bound exceeds the price."""
+    bounds, fees = tier_arrays(tiers)
+    if not len(fees):
+        return np.zeros_like(prices)
+    # side="right": a price equal to a bound belongs to the next tier
+    idx = np.searchsorted(bounds, prices, side="right")
+    out = fees[np.minimum(idx, len(fees) - 1)]
+    return np.where(np.isnan(prices), np.nan, out)
+
+
+def commission_amounts(prices: np.ndarray, commission_rate_percent: float) -> np.ndarray:
+    return prices * (commission_rate_percent / 100.0)
+
+
+def percentiles(values: np.ndarray, qs: Sequence[float]) -> Dict[float, float]:
+    """{q: value} with linear interpolation; NaNs are ignored."""
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return {}
+    return {float(q): float(v) for q, v in zip(qs, np.percentile(values, list(qs)))}
+
+
+def evaluate(
+    prices: np.ndarray,
+    cost: float,
+    commission_rate_percent: float,
+    tiers: Sequence[ShippingTier],
+) -> Dict[str, np.ndarray]:
+    """Per-item columns of the profitability report (NaN where no price)."""
+    fees = shipping_fees(prices, tiers)
+    commission = commission_amounts(prices, commission_rate_percent)
+    profit = prices - fees - commission - cost
+    return {
+        "shippingFee": fees,
+        "commissionFee": commission,
+        "profit": profit,
+        "profitable": profit > 0,
+    }
+
+
+def totals(columns: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """Running sums over evaluated items; chunks of a stream add up."""
+    profit = columns["profit"]
+    priced = ~np.isnan(profit)
+    return {
+        "pricedCount": int(priced.sum()),
+        "profitableCount": int(columns["profitable"].sum()),
+        "profitSum": float(profit[priced].sum()),
+    }
+
+
+def item_rows(
+    items: Sequence[Dict[str, Any]],
+    prices: np.ndarray,
+    columns: Dict[str, np.ndarray],
+    limit: int,
+) -> List[Dict[str, Any]]:
+    """`itemsEvaluated` entries for the first `limit` priced items."""
+    out: List[Dict[str, Any]] = []
+    if limit <= 0:
+        return out
+    for i in np.flatnonzero(~np.isnan(prices))[:limit]:
+        it = items[i]
+        out.append(
+            {
+                "productId": it.get("productId"),
+                "name": it.get("name"),
+                "brand": it.get("brand"),
+                "currentPrice": float(prices[i]),
+                "shippingFee": float(columns["shippingFee"][i]),
+                "commissionFee": float(columns["commissionFee"][i]),
+                "profit": round(float(columns["profit"][i]), 2),
+                "profitable": bool(columns["profitable"][i]),
+                "rating": it.get("rating"),
+                "ratingCount": it.get("ratingCount"),
+                "soldLast3Days": it.get("soldLast3Days"),
+                "favoritedCount": it.get("favoritedCount"),
+            }
+        )
+    return out
@@ -0,0 +1,304 @@
+from __future__ import annotations
+
+import ast
+import heapq
+import itertools
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .sketch import KLLSketch, rank_error
+
+# Group-by stage of analyze.py: per-group counts, profitable share, summed
+# sales and price quantiles, plus top-K products, folded in chunk by chunk.
+# Groups live in a hash index (key -> slot) with per-slot arrays and sketches,
+# and each top-K list is a heap of at most K entries, so memory follows the
+# number of groups rather than rows.
+
+GROUP_KEYS = ("brand", "merchantId", "boutiqueId", "badges")
+TOP_METRICS = ("profit", "soldLast3Days", "favoritedCount")
+PERCENTILES = (10, 25, 50, 75, 90)
+
+# KLL size per group: groups are many, so each sketch is smaller than the
+# dataset-level one
+GROUP_SKETCH_K = 64
+
+# Prices are buffered as (slot, price) pairs and handed to the sketches in
+# bulk once this many are pending, so each group gets one update per flush
+# instead of one per chunk
+FLUSH_VALUES = 1_000_000
+
+GROUP_COLUMNS = (
+    "key",
+    "count",
+    "pricedCount",
+    "profitableShare",
+    "soldLast3DaysSum",
+) + tuple(f"priceP{p}" for p in PERCENTILES)
+
+
+def _number(v: Any) -> float:
+    if v is None or isinstance(v, bool):
+        return np.nan
+    if isinstance(v, (int, float)):
+        return float(v)
+    try:
+        return float(v) if v != "" else np.nan
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def number_array(items: Sequence[Dict[str, Any]], key: str) -> np.ndarray:
+    """A numeric column of the items, NaN where missing (CSV gives text)."""
+    values = (it.get(key) for it in items)
+    return np.fromiter(
+        (v if v.__class__ in (int, float) else _number(v) for v in values),
+        dtype=np.float64,
+        count=len(items),
+    )
+
+
+def _scalar_key(v: Any) -> Any:
+    if v is None or v == "":
+        return None
+    if isinstance(v, str) and v.isdigit():
+        return int(v)  # ids read back from CSV
+    return v
+
+
+def _list_key(v: Any) -> List[Any]:
+    if not v:
+        return []
+    if isinstance(v, str):
+        # CSV holds lists as their Python repr, SQLite as JSON text
+        try:
+            v = ast.literal_eval(v) if v.startswith("[") else [v]
+        except (ValueError, SyntaxError):
+            v = [v]
+    if not isinstance(v, (list, tuple)):
+        return []
+    return [x for x in dict.fromkeys(v) if isinstance(x, str) and x]
+
+
+class _KeyGroups:
+    """Hash aggregation for one group key."""
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self.multi = key == "badges"  # an item counts towards each of its badges
+        self.index: Dict[Any, int] = {}
+        self.count = np.zeros(0, dtype=np.int64)
+        self.priced = np.zeros(0, dtype=np.int64)
+        self.profitable = np.zeros(0, dtype=np.int64)
+        self.sold = np.zeros(0, dtype=np.float64)
+        self.sketches: List[KLLSketch] = []
+        self._pending: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._pending_n = 0
+
+    def _codes(self, items: Sequence[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+        """(row, group slot) pairs; new keys get the next free slot."""
+        index = self.index
+        if self.multi:
+            pairs = [(i, k) for i, it in enumerate(items) for k in _list_key(it.get(self.key))]
+        else:
+            keys = [it.get(self.key) for it in items]
+            keys = [k if k.__class__ is int else _scalar_key(k) for k in keys]
+            codes = np.array(
+                [-1 if k is None else index.setdefault(k, len(index)) for k in keys],
+                dtype=np.int64,
+            )
+            rows = np.flatnonzero(codes >= 0)
+            return rows, codes[rows]
+        rows = np.fromiter((i for i, _ in pairs), dtype=np.int64, count=len(pairs))
+        codes = np.fromiter(
+            (index.setdefault(k, len(index)) for _, k in pairs), dtype=np.int64, count=len(pairs)
+        )
+        return rows, codes
+
+    def _grow(self) -> None:
+        extra = len(self.index) - len(self.count)
+        if extra <= 0:
+            return
+        self.count = np.concatenate((self.count, np.zeros(extra, dtype=np.int64)))
+        self.priced = np.concatenate((self.priced, np.zeros(extra, dtype=np.int64)))
+        self.profitable = np.concatenate((self.profitable, np.zeros(extra, dtype=np.int64)))
+        self.sold = np.concatenate((self.sold, np.zeros(extra)))
+        # seeded by slot, so a rerun on the same input gives the same report
+        start = len(self.sketches)
+        self.sketches += [KLLSketch(GROUP_SKETCH_K, seed=start + i) for i in range(extra)]
+
+    def add(
+        self,
+        items: Sequence[Dict[str, Any]],
+        prices: np.ndarray,
+        profitable: np.ndarray,
+        sold: np.ndarray,
+    ) -> None:
+        rows, codes = self._codes(items)
+        self._grow()
+        if not len(rows):
+            return
+        n = len(self.index)
+        p = prices[rows]
+        has_price = ~np.isnan(p)
+        self.count += np.bincount(codes, minlength=n)
+        self.priced += np.bincount(codes[has_price], minlength=n)
+        self.profitable += np.bincount(codes[profitable[rows]], minlength=n)
+        self.sold += np.bincount(codes, weights=np.nan_to_num(sold[rows]), minlength=n)
+        self._pending.append((codes[has_price], p[has_price]))
+        self._pending_n += int(has_price.sum())
+        if self._pending_n >= FLUSH_VALUES:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        codes = np.concatenate([c for c, _ in self._pending])
+        p = np.concatenate([v for _, v in self._pending])
+        self._pending, self._pending_n = [], 0
+        # prices of each group as one contiguous slice
+        order = np.argsort(codes, kind="stable")
+        codes, p = codes[order], p[order]
+        bounds = np.flatnonzero(np.diff(codes)) + 1
+        for start, stop in zip(
+            itertools.chain((0,), bounds), itertools.chain(bounds, (len(codes),))
+        ):
+            if stop > start:
+                self.sketches[codes[start]].update(p[start:stop])
+
+    def merge(self, other: "_KeyGroups") -> None:
+        self._flush()
+        other._flush()
+        codes = np.fromiter(
+            (self.index.setdefault(k, len(self.index)) for k in other.index),
+            dtype=np.int64,
+            count=len(other.index),
+        )
+        self._grow()
+        np.add.at(self.count, codes, other.count)
+        np.add.at(self.priced, codes, other.priced)
+        np.add.at(self.profitable, codes, other.profitable)
+        np.add.at(self.sold, codes, other.sold)
+        for code, sketch in zip(codes, other.sketches):
+            self.sketches[code].merge(sketch)
+
+    def report(self, limit: int) -> Dict[str, Any]:
+        """Largest groups first, at most `limit` rows."""
+        self._flush()
+        keys = list(self.index)
+        order = np.argsort(-self.count, kind="stable")[:limit]
+        rows = []
+        for g in order:
+            priced = int(self.priced[g])
+            quantiles = self.sketches[g].percentiles(PERCENTILES)
+            rows.append(
+                [
+                    keys[g],
+                    int(self.count[g]),
+                    priced,
+                    round(int(self.profitable[g]) / priced, 4) if priced else None,
+                    float(self.sold[g]),
+                ]
+                + [None if (v := quantiles.get(float(p))) is None else round(v, 2) for p in PERCENTILES]
+            )
+        return {"groupCount": len(keys), "columns": list(GROUP_COLUMNS), "rows": rows}
+
+
+class TopK:
+    """The K largest values seen, each with its row summary; a min-heap of size K."""
+
+    def __init__(self, k: int) -> None:
+        self.k = k
+        # (value, -arrival, row): on ties the latest arrival is evicted first
+        self._heap: List[Tuple[float, int, Dict[str, Any]]] = []
+        self._seq = itertools.count()
+
+    def _push(self, v: float, row: Callable[[], Dict[str, Any]]) -> None:
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, (v, -next(self._seq), row()))
+        elif v > self._heap[0][0]:
+            heapq.heapreplace(self._heap, (v, -next(self._seq), row()))
+
+    def add(self, values: np.ndarray, row: Callable[[int], Dict[str, Any]]) -> None:
+        if self.k <= 0:
+            return
+        finite = np.flatnonzero(np.isfinite(values))
+        if len(finite) > self.k:
+            # only the chunk's own top K can enter the heap
+            part = np.argpartition(values[finite], len(finite) - self.k)[-self.k :]
+            finite = np.sort(finite[part])  # back in row order
+        for i in finite:
+            self._push(float(values[i]), lambda i=int(i): row(i))
+
+    def merge(self, other: "TopK") -> None:
+        for v, _, r in sorted(other._heap, key=lambda e: -e[1]):
+            self._push(v, lambda r=r: r)
+
+    def items(self) -> List[Dict[str, Any]]:
+        # ties keep the earlier row first
+        ordered = sorted(self._heap, key=lambda e: (-e[0], -e[1]))
+        return [{**r, "value": v} for v, _, r in ordered]
+
+
+class GroupBy:
+    def __init__(self, keys: Iterable[str] = GROUP_KEYS, top_k: int = 10, limit: int = 50) -> None:
+        self.groups = [_KeyGroups(k) for k in keys]
+        self.top = {m: TopK(top_k) for m in TOP_METRICS} if top_k > 0 else {}
+        self.limit = limit
+
+    def add(
+        self,
+        items: Sequence[Dict[str, Any]],
+        prices: np.ndarray,
+        columns: Dict[str, np.ndarray],
+    ) -> None:
+        """Fold in a chunk: its items, prices and engine.evaluate() columns."""
+        sold = number_array(items, "soldLast3Days")
+        for g in self.groups:
+            g.add(items, prices, columns["profitable"], sold)
+        if not self.top:
+            return
+
+        def row(i: int) -> Dict[str, Any]:
+            it = items[i]
+            price = float(prices[i])
+            return {
+                "productId": it.get("productId"),
+                "name": it.get("name"),
+                "brand": it.get("brand"),
+                "price": None if price != price else price,
+            }
+
+        metrics = {
+            "profit": columns["profit"],
+            "soldLast3Days": sold,
+            "favoritedCount": number_array(items, "favoritedCount"),
+        }
+        for name, top in self.top.items():
+            top.add(metrics[name], row)
+
+    def merge(self, other: "GroupBy") -> None:
+        """Fold in the groups of another part of the input (same keys)."""
+        for mine, theirs in zip(self.groups, other.groups):
+            mine.merge(theirs)
+        for name, top in self.top.items():
+            if name in other.top:
+                top.merge(other.top[name])
+
+    def report(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "groups": {g.key: g.report(self.limit) for g in self.groups},
+            "groupPriceRankError": round(rank_error(GROUP_SKETCH_K), 6),
+        }
+        if self.top:
+            out["topProducts"] = {name: top.items() for name, top in self.top.items()}
+        return out
+
+
+def parse_keys(text: Optional[str]) -> List[str]:
+    """--group-by value -> known keys, in order; "" disables grouping."""
+    keys = [k.strip() for k in (text or "").split(",") if k.strip()]
+    unknown = [k for k in keys if k not in GROUP_KEYS]
+    if unknown:
+        raise ValueError(f"bilinmeyen grup anahtarı: {', '.join(unknown)}")
+    return list(dict.fromkeys(keys))
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Memoized analysis results. A result is keyed by the input's fingerprint and
+# the normalized analysis parameters; the artifacts themselves stay the usual
+# analysis-*.json/.md files in the output folder, and a small SQLite index
+# there maps keys to them. Bump CACHE_VERSION when the report format changes.
+
+CACHE_VERSION = 1
+INDEX_NAME = "results-cache.sqlite"
+
+# Fingerprint: size + mtime, plus a hash of evenly spaced blocks
+SAMPLE_BLOCKS = 16
+BLOCK_SIZE = 64 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    params TEXT NOT NULL,
+    json_path TEXT NOT NULL,
+    md_path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_accessed ON results(accessed_at);
+"""
+
+
+def fingerprint(path: Path) -> str:
+    """
+    Cheap content fingerprint: size, mtime and a BLAKE2 hash of up to
+    SAMPLE_BLOCKS blocks spread over the file (the whole file when small).
+    A SQLite write-ahead log next to the file is part of the content too,
+    unless it is empty: merely opening the database leaves an empty one.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    st = path.stat()
+    h.update(f"{st.st_size}:{st.st_mtime_ns}".encode())
+    with path.open("rb") as f:
+        if st.st_size <= SAMPLE_BLOCKS * BLOCK_SIZE:
+            h.update(f.read())
+        else:
+            step = (st.st_size - BLOCK_SIZE) // (SAMPLE_BLOCKS - 1)
+            for i in range(SAMPLE_BLOCKS):
+                f.seek(i * step)
+                h.update(f.read(BLOCK_SIZE))
+    wal = path.with_name(path.name + "-wal")
+    try:
+        wst = wal.stat()
+    except FileNotFoundError:
+        wst = None
+    if wst is not None and wst.st_size > 0:
+        h.update(f"wal:{wst.st_size}:{wst.st_mtime_ns}".encode())
+    return h.hexdigest()
+
+
+def cache_key(inp: Path, params: Dict[str, Any]) -> str:
+    payload = {
+        "version": CACHE_VERSION,
+        "input": str(inp.resolve()),
+        "fingerprint": fingerprint(inp),
+        "params": params,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class ResultCache:
+    """
+    Index of analysis artifacts under `directory`. Entries older than
+    `max_age` seconds are dropped with their files; when the tracked files
+    exceed `max_bytes`, least recently used entries go first.
+    """
+
+    directory: Path
+    max_age: float = 30 * 86400.0
+    max_bytes: int = 512 * 1024 * 1024
+
+    def __post_init__(self) -> None:
+        self.directory = Path(self.directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # several analyses may finish at once (API jobs)
+        self._db = sqlite3.connect(str(self.directory / INDEX_NAME), timeout=30)
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, str]]:
+        """{"json": path, "md": path} of a stored result, or None."""
+        row = self._db.execute(
+            "SELECT json_path, md_path, created_at FROM results WHERE key = ?", (key,)
+        ).fetchone()
+        if not row:
+            return None
+        now = time.time()
+        if now - row[2] > self.max_age or not all(Path(p).exists() for p in row[:2]):
+            self._delete(key, row[:2])
+            self._db.commit()
+            return None
+        self._db.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+        self._db.commit()
+        return {"json": row[0], "md": row[1]}
+
+    def put(self, key: str, params: Dict[str, Any], json_path: Path, md_path: Path) -> None:
+        now = time.time()
+        size = json_path.stat().st_size + md_path.stat().st_size
+        old = self._db.execute(
+            "SELECT json_path, md_path FROM results WHERE key = ?", (key,)
+        ).fetchone()
+        if old and old != (str(json_path), str(md_path)):
+            self._delete(key, old)  # a forced rerun replaces the old artifact
+        self._db.execute(
+            "INSERT OR REPLACE INTO results"
+            "(key, params, json_path, md_path, size, created_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, json.dumps(params, sort_keys=True), str(json_path), str(md_path), size, now, now),
+        )
+        self._evict(now)
+        self._db.commit()
+
+    def total_bytes(self) -> int:
+        return int(self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0])
+
+    def _delete(self, key: str, paths: Any) -> None:
+        self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+        for p in paths:
+            try:
+                os.unlink(p)
+            except FileNotFoundError:
+                pass
+
+    def _evict(self, now: float) -> None:
+        for key, *paths in self._db.execute(
+            "SELECT key, json_path, md_path FROM results WHERE created_at < ?",
+            (now - self.max_age,),
+        ).fetchall():
+            self._delete(key, paths)
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return
+        # Evict down to 90% of the cap so we don't evict on every store
+        target = int(self.max_bytes * 0.9)
+        rows = self._db.execute(
+            "SELECT key, json_path, md_path, size FROM results ORDER BY accessed_at ASC"
+        ).fetchall()
+        for key, json_path, md_path, size in rows[:-1]:  # never the newest result
+            if total <= target:
+                break
+            self._delete(key, (json_path, md_path))
+            total -= size
+
+    def close(self) -> None:
+        self._db.close()
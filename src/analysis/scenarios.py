@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import itertools
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from . import engine
+from .pricing import ShippingTier, break_even, ladder_prices
+
+# Sensitivity grid for analyze.py: every combination of commission rate,
+# default cost and shipping tier table is evaluated against the same parsed
+# prices. Per tier table and commission rate the items' profit-before-cost is
+# sorted once; profitable counts for all costs then come from one
+# searchsorted, and profit sums follow from price and fee sums.
+
+MAX_SCENARIOS = 10_000
+
+COLUMNS = (
+    "commissionPercent",
+    "defaultCost",
+    "tiers",
+    "breakEven",
+    "ladder",
+    "profitableCount",
+    "profitableShare",
+    "profitSum",
+    "profitMean",
+)
+
+
+def parse_grid(text: str) -> List[float]:
+    """
+    "12" -> [12.0]; "10,12.5" -> [10.0, 12.5]; "10:20:5" -> [10.0, 15.0, 20.0]
+    (start:stop:step, stop included). Parts may be combined: "5,10:20:5".
+    """
+    values: List[float] = []
+    for part in str(text).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if ":" in part:
+            bits = part.split(":")
+            if len(bits) != 3:
+                raise ValueError(f"aralık başlangıç:bitiş:adım olmalı: {part!r}")
+            start, stop, step = (float(b) for b in bits)
+            if step <= 0 or stop < start:
+                raise ValueError(f"geçersiz aralık: {part!r}")
+            count = int(np.floor((stop - start) / step + 1e-9)) + 1
+            values.extend(round(start + i * step, 10) for i in range(count))
+        else:
+            values.append(float(part))
+    if not values:
+        raise ValueError("boş değer listesi")
+    return list(dict.fromkeys(values))  # drop repeats, keep order
+
+
+class ScenarioGrid:
+    def __init__(
+        self,
+        commissions: Sequence[float],
+        costs: Sequence[float],
+        tier_tables: Sequence[Sequence[ShippingTier]],
+        margins: Sequence[float],
+    ) -> None:
+        self.commissions = np.asarray(commissions, dtype=np.float64)
+        self.costs = np.asarray(costs, dtype=np.float64)
+        self.tier_tables = list(tier_tables)
+        self.margins = list(margins)
+        shape = (len(self.tier_tables), len(self.commissions), len(self.costs))
+        self.priced = 0
+        self.price_sum = 0.0
+        self.fee_sums = np.zeros(shape[0])
+        self.profitable = np.zeros(shape, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return self.profitable.size
+
+    def add(self, prices: np.ndarray) -> None:
+        """Fold in a chunk of prices (NaN = no price)."""
+        prices = prices[~np.isnan(prices)]
+        if not len(prices):
+            return
+        self.priced += len(prices)
+        self.price_sum += float(prices.sum())
+        for t, tiers in enumerate(self.tier_tables):
+            fees = engine.shipping_fees(prices, tiers)
+            self.fee_sums[t] += float(fees.sum())
+            after_fees = prices - fees
+            for c, rate in enumerate(self.commissions):
+                # profit + cost, in the same operation order as engine.evaluate
+                before_cost = np.sort(after_fees - engine.commission_amounts(prices, rate))
+                # profitable where before_cost > cost, for every cost at once
+                self.profitable[t, c] += len(prices) - np.searchsorted(
+                    before_cost, self.costs, side="right"
+                )
+
+    def merge(self, other: "ScenarioGrid") -> None:
+        """Fold in the grid of another part of the input (same axes)."""
+        if self.profitable.shape != other.profitable.shape:
+            raise ValueError("senaryo ızgaraları aynı eksenlere sahip olmalı")
+        self.priced += other.priced
+        self.price_sum += other.price_sum
+        self.fee_sums += other.fee_sums
+        self.profitable += other.profitable
+
+    def profit_sums(self) -> np.ndarray:
+        """(tier table, commission, cost) matrix of summed profit."""
+        kept = self.price_sum * (1.0 - self.commissions / 100.0)  # (C,)
+        return (
+            kept[None, :, None]
+            - self.fee_sums[:, None, None]
+            - self.costs[None, None, :] * self.priced
+        )
+
+    def report(self) -> Dict[str, Any]:
+        """Scenario x metric matrix; `tiers` indexes into `tierTables`."""
+        sums = self.profit_sums()
+        rows = []
+        for t, c, k in itertools.product(
+            range(len(self.tier_tables)), range(len(self.commissions)), range(len(self.costs))
+        ):
+            rate, cost = float(self.commissions[c]), float(self.costs[k])
+            be = break_even(cost=cost, commission_rate_percent=rate, tiers=self.tier_tables[t])
+            count = int(self.profitable[t, c, k])
+            total = float(sums[t, c, k])
+            rows.append(
+                [
+                    rate,
+                    cost,
+                    t,
+                    round(be, 2),
+                    [round(x, 2) for x in ladder_prices(be, self.margins)],
+                    count,
+                    round(count / self.priced, 4) if self.priced else None,
+                    round(total, 2),
+                    round(total / self.priced, 2) if self.priced else None,
+                ]
+            )
+        return {
+            "columns": list(COLUMNS),
+            "tierTables": [
+                [dict(up_to=x.up_to, fee=x.fee) for x in tiers] for tiers in self.tier_tables
+            ],
+            "margins": self.margins,
+            "pricedCount": self.priced,
+            "rows": rows,
+        }
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import math
+import random
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# KLL quantile sketch (Karnin, Lang, Liberty 2016) for streaming analysis.
+# Values are kept in compactors of geometrically shrinking capacity; an item
+# on level h stands for 2**h inputs. Sketches of separate streams (chunks,
+# groups, files) merge into a sketch of the combined stream.
+
+DEFAULT_K = 200
+_MIN_CAPACITY = 8
+_C = 2.0 / 3.0
+
+
+def rank_error(k: int) -> float:
+    """
+    Normalized rank error of a single quantile query at 99% confidence,
+    from the empirical fit published with Apache DataSketches' KLL sketch.
+    """
+    return 2.296 / k**0.9723
+
+
+class KLLSketch:
+    def __init__(self, k: int = DEFAULT_K, seed: Optional[int] = None) -> None:
+        self.k = k
+        self.n = 0
+        self.levels: List[np.ndarray] = [np.empty(0, dtype=np.float64)]
+        self._rng = random.Random(seed)
+        self._min: Optional[float] = None
+        self._max: Optional[float] = None
+
+    def _capacity(self, h: int) -> int:
+        depth = len(self.levels) - 1 - h
+        return max(_MIN_CAPACITY, int(math.ceil(self.k * _C**depth)))
+
+    def update(self, values: Any) -> None:
+        """Add a batch of values; NaNs are ignored."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.n += len(values)
+        lo, hi = float(values.min()), float(values.max())
+        self._min = lo if self._min is None else min(self._min, lo)
+        self._max = hi if self._max is None else max(self._max, hi)
+        self.levels[0] = np.concatenate((self.levels[0], values))
+        self._compress()
+
+    def merge(self, other: "KLLSketch") -> None:
+        if not other.n:
+            return
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate((self.levels[h], items))
+        self.n += other.n
+        self._min = other._min if self._min is None else min(self._min, other._min)
+        self._max = other._max if self._max is None else max(self._max, other._max)
+        self._compress()
+
+    def _compress(self) -> None:
+        h = 0
+        while h < len(self.levels):
+            if len(self.levels[h]) <= self._capacity(h):
+                h += 1
+                continue
+            if h == len(self.levels) - 1:
+                self.levels.append(np.empty(0, dtype=np.float64))
+            items = np.sort(self.levels[h])
+            # an odd item stays behind; of each sorted pair one survives, with
+            # a random offset so rank errors cancel in expectation
+            keep = items[:1] if len(items) % 2 else items[:0]
+            items = items[len(keep):]
+            promoted = items[self._rng.getrandbits(1) :: 2]
+            self.levels[h] = keep
+            self.levels[h + 1] = np.concatenate((self.levels[h + 1], promoted))
+            # a new top level lowers every capacity below it
+            h = 0
+
+    @property
+    def retained(self) -> int:
+        return sum(len(items) for items in self.levels)
+
+    def quantiles(self, qs: Sequence[float]) -> List[Optional[float]]:
+        """Values at the given ranks (0..1); None for an empty sketch."""
+        if not self.n:
+            return [None for _ in qs]
+        values = np.concatenate(self.levels)
+        weights = np.concatenate(
+            [np.full(len(items), 2**h, dtype=np.int64) for h, items in enumerate(self.levels)]
+        )
+        order = np.argsort(values, kind="stable")
+        values, cum = values[order], np.cumsum(weights[order])
+        total = cum[-1]
+        out: List[Optional[float]] = []
+        for q in qs:
+            if q <= 0:
+                out.append(self._min)
+            elif q >= 1:
+                out.append(self._max)
+            else:
+                i = int(np.searchsorted(cum, q * total, side="left"))
+                out.append(float(values[min(i, len(values) - 1)]))
+        return out
+
+    def percentiles(self, ps: Sequence[float]) -> Dict[float, float]:
+        """{p: value} for percentiles 0..100, like engine.percentiles()."""
+        if not self.n:
+            return {}
+        return {float(p): v for p, v in zip(ps, self.quantiles([p / 100.0 for p in ps]))}
+
+    def percentile_bounds(self, ps: Sequence[float]) -> Dict[float, List[float]]:
+        """[low, high] values each percentile lies between at 99% confidence."""
+        if not self.n:
+            return {}
+        eps = self.rank_error()
+        lows = self.quantiles([max(0.0, p / 100.0 - eps) for p in ps])
+        highs = self.quantiles([min(1.0, p / 100.0 + eps) for p in ps])
+        return {float(p): [lo, hi] for p, lo, hi in zip(ps, lows, highs)}
+
+    def rank_error(self) -> float:
+        # exact while nothing has been compacted away
+        return 0.0 if len(self.levels) == 1 else rank_error(self.k)
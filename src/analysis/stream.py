@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence
+
+from . import engine
+from .groupby import GroupBy
+from .pricing import ShippingTier
+from .scenarios import ScenarioGrid
+from .sketch import DEFAULT_K, KLLSketch
+
+# Single-pass analysis for inputs too large to load (`analyze.py --stream`):
+# rows arrive in chunks, each chunk is evaluated with the array engine and
+# folded into running sums and a KLL price sketch, then dropped. Memory is
+# bounded by the chunk size, the sketch, the item preview and, with a group-by
+# stage, the number of groups.
+
+PERCENTILES = (10, 25, 50, 75, 90)
+
+
+class StreamingAnalysis:
+    def __init__(
+        self,
+        cost: float,
+        commission_rate_percent: float,
+        tiers: Sequence[ShippingTier],
+        preview: int = 100,
+        k: int = DEFAULT_K,
+        grid: Optional[ScenarioGrid] = None,
+        groups: Optional[GroupBy] = None,
+    ) -> None:
+        self.cost = cost
+        self.commission = commission_rate_percent
+        self.tiers = tiers
+        self.preview = preview
+        self.grid = grid
+        self.groups = groups
+        self.count = 0
+        self.sums = {"pricedCount": 0, "profitableCount": 0, "profitSum": 0.0}
+        self.prices = KLLSketch(k)
+        self.items: List[Dict[str, Any]] = []
+
+    def add(self, items: Sequence[Dict[str, Any]]) -> None:
+        self.count += len(items)
+        prices = engine.price_array(items)
+        self.prices.update(prices)
+        if self.grid is not None:
+            self.grid.add(prices)
+        columns = engine.evaluate(prices, self.cost, self.commission, self.tiers)
+        for key, value in engine.totals(columns).items():
+            self.sums[key] += value
+        if self.groups is not None:
+            self.groups.add(items, prices, columns)
+        if len(self.items) < self.preview:
+            self.items += engine.item_rows(
+                items, prices, columns, self.preview - len(self.items)
+            )
+
+    def merge(self, other: "StreamingAnalysis") -> None:
+        """Fold in the analysis of another part of the input."""
+        self.count += other.count
+        for key, value in other.sums.items():
+            self.sums[key] += value
+        self.prices.merge(other.prices)
+        if self.grid is not None and other.grid is not None:
+            self.grid.merge(other.grid)
+        if self.groups is not None and other.groups is not None:
+            self.groups.merge(other.groups)
+        self.items += other.items[: max(0, self.preview - len(self.items))]
+
+    def price_stats(self) -> Dict[float, float]:
+        return self.prices.percentiles(PERCENTILES)
+
+    def quantile_error(self) -> Dict[str, Any]:
+        """How far priceStats may be off, for the JSON report."""
+        return {
+            "method": "kll",
+            "k": self.prices.k,
+            "retained": self.prices.retained,
+            "rankError": round(self.prices.rank_error(), 6),
+            "confidence": 0.99,
+            "bounds": self.prices.percentile_bounds(PERCENTILES),
+        }
@@ -1,24 +1,54 @@
 from __future__ import annotations
 
 import argparse
+import csv
 import json
 import os
-from dataclasses import asdict
+from dataclasses import asdict, dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional
-
-from .analysis.prepare import parse_price_str, read_ndjson, read_csv, percentiles
-from .analysis.pricing import (
-    ShippingTier,
-    normalize_tiers,
-    shipping_fee,
-    commission_amount,
-    profit,
-    break_even,
-    ladder_prices,
-)
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .analysis.prepare import read_ndjson, read_csv
+from .analysis.pricing import ShippingTier, normalize_tiers, break_even, ladder_prices
+from .analysis import engine
+from .analysis.groupby import GROUP_KEYS, GroupBy, parse_keys
+from .analysis.memo import ResultCache, cache_key
+from .analysis.scenarios import MAX_SCENARIOS, ScenarioGrid, parse_grid
+from .analysis.stream import PERCENTILES, StreamingAnalysis
 from .analysis.llm_client import call_llm
+from . import sqlite_store
+from .columnar import iter_batches, read_rows
+from .compress import codec_of, open_text
+
+# Fields the analysis reads; columnar inputs decode only these
+ANALYSIS_COLUMNS = (
+    "productId",
+    "name",
+    "brand",
+    "price",
+    "priceKurus",
+    "merchantId",
+    "boutiqueId",
+    "badges",
+    "rating",
+    "ratingCount",
+    "soldLast3Days",
+    "favoritedCount",
+)
+
+# Rows per chunk in --stream mode
+STREAM_CHUNK_ROWS = 50_000
+
+# Scenario rows listed in the Markdown summary
+MD_SCENARIO_ROWS = 50
+
+# Group rows per key listed in the Markdown summary
+MD_GROUP_ROWS = 10
+
+# Result cache limits (see --cache-max-age / --cache-max-mb)
+CACHE_MAX_AGE_DAYS = 30.0
+CACHE_MAX_MB = 512.0
 
 
 def build_arg_parser() -> argparse.ArgumentParser:
@@ -26,33 +56,89 @@ def build_arg_parser() -> argparse.ArgumentParser:
         description="Kategori verilerini fiyat/karlılık açısından analiz eder"
     )
     p.add_argument(
-        "--in", dest="inp", required=True, help="Girdi dosyası (NDJSON veya CSV)"
+        "--in",
+        dest="inp",
+        required=True,
+        help="Girdi dosyası (NDJSON, CSV, Parquet veya SQLite)",
     )
     p.add_argument(
-        "--format", choices=["ndjson", "csv"], default="ndjson", help="Girdi formatı"
+        "--format",
+        choices=["ndjson", "csv", "parquet", "sqlite"],
+        default="ndjson",
+        help="Girdi formatı",
     )
     p.add_argument(
-        "--commission", type=float, required=True, help="Komisyon yüzdesi (örn 12.0)"
+        "--commission",
+        type=str,
+        required=True,
+        help="Komisyon yüzdesi (örn 12.0); liste veya aralık senaryo ızgarası kurar (10,12 veya 10:20:2)",
     )
     p.add_argument(
         "--default-cost",
-        type=float,
+        type=str,
         required=True,
-        help="Varsayılan ürün maliyeti (TL)",
+        help="Varsayılan ürün maliyeti (TL); liste veya aralık olabilir (örn 60:120:20)",
     )
     p.add_argument(
         "--tiers",
         type=str,
-        default='[{"up_to":150,"fee":42.70},{"up_to":300,"fee":72.20}]',
-        help='Kargo baremleri JSON listesi (örn: [{"up_to":150,"fee":42.7},{"up_to":300,"fee":72.2}])',
+        action="append",
+        default=None,
+        help='Kargo baremleri JSON listesi (örn: [{"up_to":150,"fee":42.7},{"up_to":300,"fee":72.2}]); birden çok tablo için tekrarlayın',
     )
     p.add_argument(
         "--margins",
         type=str,
         default="5,10,15",
-        help="Break-even üzerine yüzde marjlar (virgülle, örn: 5,10,15)",
+        help="Break-even üzerine yüzde marjlar (virgülle veya aralık, örn: 5,10,15 veya 5:30:5)",
     )
     p.add_argument("--out-dir", type=str, default="analysis", help="Çıktı klasörü")
+    p.add_argument(
+        "--stream",
+        action="store_true",
+        help="Girdiyi tek geçişte, sabit bellekle işle; yüzdelikler yaklaşık (KLL) hesaplanır",
+    )
+    p.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=STREAM_CHUNK_ROWS,
+        help="--stream ile bir seferde işlenen satır sayısı",
+    )
+    p.add_argument(
+        "--group-by",
+        type=str,
+        default=",".join(GROUP_KEYS),
+        help="Kırılım anahtarları (virgülle: brand,merchantId,boutiqueId,badges); boş bırakılırsa kapalı",
+    )
+    p.add_argument(
+        "--group-limit",
+        type=int,
+        default=50,
+        help="Her anahtar için raporlanan en büyük grup sayısı",
+    )
+    p.add_argument(
+        "--top-k",
+        type=int,
+        default=10,
+        help="Kâr, satış ve favoriye göre listelenen ürün sayısı (0: kapalı)",
+    )
+    p.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Aynı girdi ve parametrelerle önceki sonucu kullanma; yeniden hesapla",
+    )
+    p.add_argument(
+        "--cache-max-age",
+        type=float,
+        default=CACHE_MAX_AGE_DAYS,
+        help="Önbellekteki sonuçların saklanacağı gün sayısı",
+    )
+    p.add_argument(
+        "--cache-max-mb",
+        type=float,
+        default=CACHE_MAX_MB,
+        help="Önbellekteki sonuç dosyalarının toplam boyut sınırı (MB)",
+    )
     p.add_argument(
         "--use-llm",
         action="store_true",
@@ -68,87 +154,248 @@ def build_arg_parser() -> argparse.ArgumentParser:
 
 
 def load_items(path: Path, fmt: str) -> List[Dict[str, Any]]:
+    if fmt == "parquet":
+        return read_rows(path, ANALYSIS_COLUMNS)
+    if fmt == "sqlite":
+        return sqlite_store.read_rows(path, ANALYSIS_COLUMNS)
+    if codec_of(path):
+        # .gz/.zst: decompress while reading, one row at a time
+        with open_text(path, newline="" if fmt == "csv" else None) as f:
+            if fmt == "csv":
+                return list(csv.DictReader(f))
+            items = []
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    items.append(json.loads(line))
+                except ValueError:
+                    continue  # e.g. a torn last line
+            return items
     if fmt == "ndjson":
         return read_ndjson(path)
     return read_csv(path)
 
 
-def main(argv: Optional[Iterable[str]] = None) -> int:
-    args = build_arg_parser().parse_args(argv)
-    inp = Path(args.inp)
-    out_dir = Path(args.out_dir)
-    out_dir.mkdir(parents=True, exist_ok=True)
+DEFAULT_TIERS = '[{"up_to":150,"fee":42.70},{"up_to":300,"fee":72.20}]'
+
 
-    # Shipping tiers
+def parse_tiers(text: str) -> List[ShippingTier]:
     try:
-        raw = json.loads(args.tiers)
-        tiers = normalize_tiers([(d.get("up_to"), float(d["fee"])) for d in raw])
+        raw = json.loads(text)
+        return normalize_tiers([(d.get("up_to"), float(d["fee"])) for d in raw])
     except Exception:
-        tiers = normalize_tiers([(150.0, 42.70), (300.0, 72.20)])
+        return normalize_tiers([(150.0, 42.70), (300.0, 72.20)])
 
-    margins = [float(x) for x in str(args.margins).split(",") if x.strip()]
 
-    items = load_items(inp, args.format)
-    # parse numeric prices
-    prices: List[float] = []
-    for it in items:
-        p = parse_price_str(it.get("price"))
-        if p is not None:
-            prices.append(p)
+def iter_items(path: Path, fmt: str) -> Iterator[Dict[str, Any]]:
+    """Rows of the input one at a time, without loading the file."""
+    if fmt == "parquet":
+        for batch in iter_batches(path, ANALYSIS_COLUMNS):
+            yield from batch.to_pylist()
+    elif fmt == "sqlite":
+        yield from sqlite_store.iter_rows(path, ANALYSIS_COLUMNS)
+    elif fmt == "csv":
+        with open_text(path, newline="") as f:
+            yield from csv.DictReader(f)
+    else:
+        with open_text(path, errors="ignore") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue  # e.g. a torn last line
 
-    price_stats = percentiles(prices, [10, 25, 50, 75, 90]) if prices else {}
+
+def iter_chunks(rows: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    chunk: List[Dict[str, Any]] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def profit_totals(sums: Dict[str, Any]) -> Dict[str, Any]:
+    priced = sums["pricedCount"]
+    return {
+        **sums,
+        "profitSum": round(sums["profitSum"], 2),
+        "profitMean": round(sums["profitSum"] / priced, 2) if priced else None,
+        "profitableShare": round(sums["profitableCount"] / priced, 4) if priced else None,
+    }
+
+
+@dataclass
+class Settings:
+    """Parsed option values the analysis runs with."""
+
+    tier_tables: List[List[ShippingTier]]
+    commissions: List[float]
+    costs: List[float]
+    margins: List[float]
+    group_keys: List[str]
+
+
+def parse_settings(parser: argparse.ArgumentParser, args: argparse.Namespace) -> Settings:
+    # Shipping tiers, one table per --tiers
+    tier_tables = [parse_tiers(t) for t in (args.tiers or [DEFAULT_TIERS])]
+    try:
+        return Settings(
+            tier_tables=tier_tables,
+            commissions=parse_grid(args.commission),
+            costs=parse_grid(args.default_cost),
+            margins=parse_grid(args.margins) if args.margins.strip() else [],
+            group_keys=parse_keys(args.group_by),
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+
+def cache_params(args: argparse.Namespace, settings: Settings) -> Dict[str, Any]:
+    """Everything that shapes the report, normalized ("12" and "12.0" agree)."""
+    return {
+        "format": args.format,
+        "commission": settings.commissions,
+        "defaultCost": settings.costs,
+        "tiers": [[[t.up_to, t.fee] for t in tiers] for tiers in settings.tier_tables],
+        "margins": settings.margins,
+        "stream": args.stream,
+        # streamed quantiles depend on the chunking
+        "chunkRows": max(1, args.chunk_rows) if args.stream else None,
+        "groupBy": settings.group_keys,
+        "groupLimit": max(0, args.group_limit),
+        "topK": max(0, args.top_k),
+        "llmModel": (args.llm_model or os.environ.get("OPENAI_MODEL", "gpt-4o-mini"))
+        if args.use_llm
+        else None,
+    }
+
+
+def open_cache(args: argparse.Namespace) -> ResultCache:
+    return ResultCache(
+        Path(args.out_dir),
+        max_age=args.cache_max_age * 86400.0,
+        max_bytes=int(args.cache_max_mb * 1024 * 1024),
+    )
+
+
+def find_cached(argv: Iterable[str]) -> Optional[Dict[str, str]]:
+    """The stored result of an earlier run with these arguments, if any."""
+    parser = build_arg_parser()
+    try:
+        args = parser.parse_args(list(argv))
+        settings = parse_settings(parser, args)
+    except SystemExit:
+        return None  # the run itself reports the error
+    inp = Path(args.inp)
+    if args.no_cache or not inp.is_file():
+        return None
+    cache = open_cache(args)
+    try:
+        return cache.get(cache_key(inp, cache_params(args, settings)))
+    finally:
+        cache.close()
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    inp = Path(args.inp)
+
+    settings = parse_settings(parser, args)
+    tier_tables, commissions, costs = settings.tier_tables, settings.commissions, settings.costs
+    margins, group_keys = settings.margins, settings.group_keys
+    # the first value of each axis is the base scenario of the report
+    tiers, commission, cost = tier_tables[0], commissions[0], costs[0]
+    grid = None
+    if len(tier_tables) * len(commissions) * len(costs) > 1:
+        grid = ScenarioGrid(commissions, costs, tier_tables, margins)
+        if len(grid) > MAX_SCENARIOS:
+            parser.error(f"en fazla {MAX_SCENARIOS} senaryo: {len(grid)}")
+    groups = None
+    if group_keys or args.top_k > 0:
+        groups = GroupBy(group_keys, top_k=args.top_k, limit=max(0, args.group_limit))
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    # Same input content and parameters as an earlier run: reuse its result
+    cache = result_key = None
+    if inp.is_file():
+        cache = open_cache(args)
+        params = cache_params(args, settings)
+        result_key = cache_key(inp, params)
+        hit = None if args.no_cache else cache.get(result_key)
+        if hit:
+            cache.close()
+            print(f"Analiz önbellekten: {hit['json']} ve {hit['md']}")
+            return 0
+
+    extra: Dict[str, Any] = {}
+    if args.stream:
+        # one pass in chunks: running sums and a KLL sketch of the prices
+        acc = StreamingAnalysis(cost, commission, tiers, preview=100, grid=grid, groups=groups)
+        for chunk in iter_chunks(iter_items(inp, args.format), max(1, args.chunk_rows)):
+            acc.add(chunk)
+        count = acc.count
+        price_stats = acc.price_stats()
+        sums = acc.sums
+        per_item = acc.items
+        extra["priceStatsError"] = acc.quantile_error()
+    else:
+        items = load_items(inp, args.format)
+        count = len(items)
+        # prices as one array (priceKurus, or the text of files from older
+        # parsers); everything below is computed on whole columns
+        prices = engine.price_array(items)
+        price_stats = engine.percentiles(prices, PERCENTILES)
+        # Per-item evaluation at current price
+        columns = engine.evaluate(prices, cost, commission, tiers)
+        if grid is not None:
+            grid.add(prices)
+        if groups is not None:
+            groups.add(items, prices, columns)
+        sums = engine.totals(columns)
+        per_item = engine.item_rows(items, prices, columns, limit=100)  # cap preview
 
     # Determine a recommended minimal profitable price at dataset-level using default cost
     be = break_even(
-        cost=float(args.default_cost),
-        commission_rate_percent=float(args.commission),
+        cost=cost,
+        commission_rate_percent=commission,
         tiers=tiers,
     )
     ladder = ladder_prices(be, margins)
 
-    # Per-item evaluation at current price
-    per_item: List[Dict[str, Any]] = []
-    for it in items:
-        current_price = parse_price_str(it.get("price"))
-        if current_price is None:
-            continue
-        pf = profit(
-            current_price, float(args.default_cost), float(args.commission), tiers
-        )
-        per_item.append(
-            {
-                "productId": it.get("productId"),
-                "name": it.get("name"),
-                "brand": it.get("brand"),
-                "currentPrice": current_price,
-                "shippingFee": shipping_fee(current_price, tiers),
-                "commissionFee": commission_amount(
-                    current_price, float(args.commission)
-                ),
-                "profit": round(pf, 2),
-                "profitable": pf > 0,
-                "rating": it.get("rating"),
-                "ratingCount": it.get("ratingCount"),
-                "soldLast3Days": it.get("soldLast3Days"),
-                "favoritedCount": it.get("favoritedCount"),
-            }
-        )
-
     ts = datetime.now().strftime("%Y%m%d-%H%M%S")
-    out_json = out_dir / f"analysis-{ts}.json"
-    out_md = out_dir / f"analysis-{ts}.md"
+    stem, n = f"analysis-{ts}", 1
+    # runs within the same second must not overwrite a cached result
+    while (out_dir / f"{stem}.json").exists() or (out_dir / f"{stem}.md").exists():
+        n += 1
+        stem = f"analysis-{ts}-{n}"
+    out_json = out_dir / f"{stem}.json"
+    out_md = out_dir / f"{stem}.md"
 
     result: Dict[str, Any] = {
         "input": str(inp),
-        "count": len(items),
-        "commissionPercent": float(args.commission),
-        "defaultCost": float(args.default_cost),
+        "count": count,
+        "commissionPercent": commission,
+        "defaultCost": cost,
         "shippingTiers": [dict(up_to=t.up_to, fee=t.fee) for t in tiers],
         "priceStats": price_stats,
+        **extra,
+        "profitTotals": profit_totals(sums),
         "breakEven": round(be, 2),
         "ladder": [round(x, 2) for x in ladder],
-        "itemsEvaluated": per_item[:100],  # cap preview
+        "itemsEvaluated": per_item,
     }
+    if grid is not None:
+        result["scenarios"] = grid.report()
+    if groups is not None:
+        result.update(groups.report())
 
     # Optional LLM summary
     if bool(getattr(args, "use_llm", False)):
@@ -176,9 +423,9 @@ def main(argv: Optional[Iterable[str]] = None) -> int:
     lines = []
     lines.append(f"# Analiz Özeti\n")
     lines.append(f"Girdi: `{inp}`  ")
-    lines.append(f"Toplam ürün: {len(items)}  ")
-    lines.append(f"Komisyon: {args.commission}%  ")
-    lines.append(f"Varsayılan Maliyet: {args.default_cost} TL  ")
+    lines.append(f"Toplam ürün: {count}  ")
+    lines.append(f"Komisyon: {commission}%  ")
+    lines.append(f"Varsayılan Maliyet: {cost} TL  ")
     lines.append(
         f"Kargo Baremleri: {json.dumps(result['shippingTiers'], ensure_ascii=False)}  "
     )
@@ -188,6 +435,14 @@ def main(argv: Optional[Iterable[str]] = None) -> int:
             v = price_stats.get(k)
             if v is not None:
                 lines.append(f"- P{k:.0f}: {v:.2f}")
+        if "priceStatsError" in result:
+            err = result["priceStatsError"]["rankError"]
+            lines.append(f"\n_Yaklaşık değerler (KLL), sıra hatası en fazla %{err * 100:.2f} (%99 güven)._")
+    totals = result["profitTotals"]
+    if totals["pricedCount"]:
+        lines.append("\n## Kârlılık (mevcut fiyatla)")
+        lines.append(f"- Kârlı ürün: {totals['profitableCount']} / {totals['pricedCount']}")
+        lines.append(f"- Ortalama kâr: {totals['profitMean']} TL")
     lines.append("\n## Kârlılık Eşiği")
     lines.append(f"- Break-even: {result['breakEven']} TL")
     lines.append(
@@ -195,6 +450,40 @@ def main(argv: Optional[Iterable[str]] = None) -> int:
     )
     lines.append("\n_Not: Break-even ve merdiven varsayılan maliyete göredir._\n")
 
+    if grid is not None:
+        sc = result["scenarios"]
+        lines.append(f"\n## Senaryolar ({len(sc['rows'])})")
+        lines.append("| Komisyon % | Maliyet | Barem | Break-even | Kârlı pay | Ort. kâr |")
+        lines.append("|---|---|---|---|---|---|")
+        for row in sc["rows"][:MD_SCENARIO_ROWS]:
+            r = dict(zip(sc["columns"], row))
+            lines.append(
+                f"| {r['commissionPercent']} | {r['defaultCost']} | {r['tiers'] + 1} "
+                f"| {r['breakEven']} | {r['profitableShare']} | {r['profitMean']} |"
+            )
+        if len(sc["rows"]) > MD_SCENARIO_ROWS:
+            lines.append(f"\n_İlk {MD_SCENARIO_ROWS} senaryo; tamamı JSON çıktısında._")
+
+    for key, g in result.get("groups", {}).items():
+        if not g["rows"]:
+            continue
+        lines.append(f"\n## {key} kırılımı ({g['groupCount']} grup)")
+        lines.append("| Grup | Ürün | Kârlı pay | Satış (3 gün) | Medyan fiyat |")
+        lines.append("|---|---|---|---|---|")
+        for row in g["rows"][:MD_GROUP_ROWS]:
+            r = dict(zip(g["columns"], row))
+            lines.append(
+                f"| {r['key']} | {r['count']} | {r['profitableShare']} "
+                f"| {r['soldLast3DaysSum']:.0f} | {r['priceP50']} |"
+            )
+    titles = {"profit": "kâr", "soldLast3Days": "satış (3 gün)", "favoritedCount": "favori"}
+    for metric, top in result.get("topProducts", {}).items():
+        if not top:
+            continue
+        lines.append(f"\n## En yüksek {titles[metric]}")
+        for it in top:
+            lines.append(f"- {it['name'] or it['productId']} ({it['brand'] or '-'}): {round(it['value'], 2)}")
+
     # Append LLM insights if available
     if result.get("llm"):
         lines.append("\n## LLM Özet İçgörüler")
@@ -209,6 +498,11 @@ def main(argv: Optional[Iterable[str]] = None) -> int:
             lines.append(f"Hata: {llm['error']}")
 
     out_md.write_text("\n".join(lines), encoding="utf-8")
+    if cache is not None:
+        # a failed LLM call is worth retrying, so it is not cached
+        if "error" not in result.get("llm", {}):
+            cache.put(result_key, params, out_json, out_md)
+        cache.close()
 
     print(f"Analiz üretildi: {out_json} ve {out_md}")
     return 0
@@ -1,12 +1,18 @@
 from __future__ import annotations
 
 import sys
+import tempfile
 from pathlib import Path
-from typing import Optional, List
+from typing import Dict, List, Optional, Union
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 
+from ... import sqlite_store
+from ...columnar import num_rows, read_rows
+from ...sqlite_store import is_sqlite_path
+from ...history import PriceHistory
+from ...compress import CODECS, codec_of, data_suffix, open_text, require_codec
 from ..core.jobs import JOB_MANAGER
 
 
@@ -18,10 +24,11 @@ class StartJobRequest(BaseModel):
     max_pages: int = 50
     max_items: Optional[int] = None
     out: str = "output.ndjson"
-    fmt: str = Field("ndjson", pattern="^(csv|ndjson)$")
+    fmt: str = Field("ndjson", pattern="^(csv|ndjson|parquet|sqlite)$")
     checkpoint: Optional[str] = ".checkpoints/ui.json"
     resume: bool = True
     delay_ms: int = 800
+    history: Optional[str] = None
     log_level: str = Field("INFO", pattern="^(CRITICAL|ERROR|WARNING|INFO|DEBUG)$")
 
 
@@ -55,6 +62,8 @@ def start_job(req: StartJobRequest):
         cmd += ["--checkpoint", req.checkpoint]
     if req.resume:
         cmd += ["--resume"]
+    if req.history:
+        cmd += ["--history", req.history]
 
     job = JOB_MANAGER.start(cmd)
     pid = job.process.pid if job.process else -1
@@ -66,6 +75,8 @@ class StartPDPJobRequest(BaseModel):
     urls: List[str]
     out: str = "pdp.ndjson"
     delay_ms: int = 800
+    workers: int = 4
+    history: Optional[str] = None
     log_level: str = Field("INFO", pattern="^(CRITICAL|ERROR|WARNING|INFO|DEBUG)$")
 
 
@@ -73,6 +84,14 @@ class StartPDPJobRequest(BaseModel):
 def start_pdp_job(req: StartPDPJobRequest):
     if not req.urls:
         raise HTTPException(status_code=400, detail="urls boş olamaz")
+    # Hand the URL list over via a file; long lists overflow the argv limit.
+    # The job manager removes it when the job finishes.
+    Path(".logs").mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", dir=".logs", prefix="pdp-urls-", suffix=".txt", delete=False
+    ) as f:
+        f.write("".join(u.strip() + "\n" for u in req.urls if u.strip()))
+    urls_file = Path(f.name)
     cmd = [
         sys.executable,
         "-m",
@@ -81,11 +100,16 @@ def start_pdp_job(req: StartPDPJobRequest):
         req.out,
         "--delay-ms",
         str(req.delay_ms),
+        "--workers",
+        str(req.workers),
         "--log-level",
         req.log_level,
-        "--urls",
-    ] + req.urls
-    job = JOB_MANAGER.start(cmd)
+        "--urls-file",
+        str(urls_file),
+    ]
+    if req.history:
+        cmd += ["--history", req.history]
+    job = JOB_MANAGER.start(cmd, temp_files=[urls_file])
     pid = job.process.pid if job.process else -1
     return StartJobResponse(job_id=job.id, pid=pid)
 
@@ -112,6 +136,7 @@ def get_job(job_id: str):
         "started_at": job.start_time,
         "stdout": str(job.stdout_path),
         "stderr": str(job.stderr_path),
+        "rate": JOB_MANAGER.rate(job.id),
     }
 
 
@@ -126,27 +151,35 @@ def get_logs(job_id: str):
 # ---------------------- Analysis ----------------------
 class StartAnalysisRequest(BaseModel):
     inp: str
-    format: str = Field("ndjson", pattern="^(csv|ndjson)$")
-    commission: float
-    default_cost: float
-    tiers: str = '[{"up_to":150,"fee":42.70},{"up_to":300,"fee":72.20}]'
+    format: str = Field("ndjson", pattern="^(csv|ndjson|parquet|sqlite)$")
+    # a number, or a list/range ("10,12" or "10:20:2") for a scenario grid
+    commission: Union[float, str]
+    default_cost: Union[float, str]
+    # one tier table, or several to compare
+    tiers: Union[str, List[str]] = '[{"up_to":150,"fee":42.70},{"up_to":300,"fee":72.20}]'
     margins: str = "5,10,15"
     out_dir: str = "analysis"
+    stream: bool = False
+    # breakdown keys (comma separated, "" = off), rows per key, top-K size
+    group_by: str = "brand,merchantId,boutiqueId,badges"
+    group_limit: int = 50
+    top_k: int = 10
+    # recompute even when an identical earlier result is stored
+    no_cache: bool = False
     use_llm: bool = False
     llm_model: Optional[str] = None
 
 
 class StartAnalysisResponse(BaseModel):
-    job_id: str
-    pid: int
+    job_id: Optional[str] = None
+    pid: int = -1
+    # {"json": path, "md": path} when an identical analysis already exists
+    cached: Optional[Dict[str, str]] = None
 
 
 @router.post("/analyze", response_model=StartAnalysisResponse)
 def start_analysis(req: StartAnalysisRequest):
-    cmd = [
-        sys.executable,
-        "-m",
-        "src.analyze",
+    args = [
         "--in",
         req.inp,
         "--format",
@@ -155,18 +188,34 @@ def start_analysis(req: StartAnalysisRequest):
         str(req.commission),
         "--default-cost",
         str(req.default_cost),
-        "--tiers",
-        req.tiers,
         "--margins",
         req.margins,
+        "--group-by",
+        req.group_by,
+        "--group-limit",
+        str(req.group_limit),
+        "--top-k",
+        str(req.top_k),
         "--out-dir",
         req.out_dir,
     ]
+    for table in [req.tiers] if isinstance(req.tiers, str) else req.tiers:
+        args += ["--tiers", table]
+    if req.stream:
+        args.append("--stream")
+    if req.no_cache:
+        args.append("--no-cache")
     if req.use_llm:
-        cmd.append("--use-llm")
+        args.append("--use-llm")
         if req.llm_model:
-            cmd += ["--llm-model", req.llm_model]
-    job = JOB_MANAGER.start(cmd)
+            args += ["--llm-model", req.llm_model]
+    if not req.no_cache:
+        from ...analyze import find_cached
+
+        hit = find_cached(args)
+        if hit:
+            return StartAnalysisResponse(cached=hit)
+    job = JOB_MANAGER.start([sys.executable, "-m", "src.analyze", *args])
     pid = job.process.pid if job.process else -1
     return StartAnalysisResponse(job_id=job.id, pid=pid)
 
@@ -197,7 +246,9 @@ def list_recent_outputs(limit: int = 50):
     root = Path(".")
     exclude_dirs = {"analysis", ".git", ".logs", ".venv", "__pycache__", "node_modules"}
     files = []
-    for pattern in ("**/*.ndjson", "**/*.csv"):
+    patterns = ["**/*.ndjson", "**/*.csv", "**/*.parquet", "**/*.sqlite"]
+    patterns += [f"**/*.{fmt}{ext}" for fmt in ("ndjson", "csv") for ext in CODECS]
+    for pattern in patterns:
         for p in root.glob(pattern):
             # Exclude directories and hidden/system
             parts = set(part for part in p.parts if part)
@@ -217,7 +268,9 @@ def list_recent_outputs(limit: int = 50):
                     "path": str(p),
                     "mtime": stat.st_mtime,
                     "size": stat.st_size,
-                    "type": p.suffix.lstrip("."),
+                    # data format, ignoring a .gz/.zst suffix
+                    "type": data_suffix(p).lstrip("."),
+                    "compression": codec_of(p),
                 }
             )
     files.sort(key=lambda x: x["mtime"], reverse=True)
@@ -226,7 +279,12 @@ def list_recent_outputs(limit: int = 50):
 
 # ---------------------- Generic NDJSON reader (for UI previews) ----------------------
 @router.get("/ndjson")
-def read_ndjson_file(path: str, limit: int = 200):
+def read_ndjson_file(path: str, limit: int = 200, columns: Optional[str] = None):
+    """
+    First `limit` rows of an output file. `columns` (comma separated) narrows
+    each row; Parquet and SQLite files then read only those columns and take
+    the row count from the footer / primary key.
+    """
     p = Path(path)
     # Basic guard: only allow files under current working directory
     try:
@@ -239,24 +297,92 @@ def read_ndjson_file(path: str, limit: int = 200):
     except Exception:
         raise HTTPException(status_code=400, detail="Yol işlenemedi")
 
+    cols = [c.strip() for c in columns.split(",") if c.strip()] if columns else None
+    try:
+        require_codec(rp)
+    except RuntimeError as e:  # zstandard missing
+        raise HTTPException(status_code=400, detail=str(e))
+    limit = max(1, min(2000, limit))
+    if is_sqlite_path(rp):
+        # SQL projection and LIMIT; the count comes from the primary key index
+        items = sqlite_store.read_rows(rp, cols, limit=limit)
+        total = sqlite_store.count_rows(rp)
+        return {"items": items, "total": total, "truncated": total > len(items)}
+    if rp.suffix == ".parquet":
+        try:
+            items = read_rows(rp, cols, limit=limit)
+            total = num_rows(rp)
+        except RuntimeError as e:  # pyarrow missing
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"items": items, "total": total, "truncated": total > len(items)}
+
     items = []
     total = 0
-    with rp.open("r", encoding="utf-8", errors="ignore") as f:
+    with open_text(rp, errors="ignore") as f:
         for line in f:
             line = line.strip()
             if not line:
                 continue
             total += 1
-            if len(items) < max(1, min(2000, limit)):
+            if len(items) < limit:
                 try:
                     import json as _json
 
-                    items.append(_json.loads(line))
+                    row = _json.loads(line)
+                    if cols is not None:
+                        row = {k: row.get(k) for k in cols}
+                    items.append(row)
                 except Exception:
                     pass
     return {"items": items, "total": total, "truncated": total > len(items)}
 
 
+# ---------------------- Price history ----------------------
+# Stores stay open between requests so their merged view is reused; it is
+# rebuilt only when a crawl has added segments since.
+_HISTORY: Dict[Path, PriceHistory] = {}
+
+
+def _history_store(path: str) -> PriceHistory:
+    try:
+        cwd = Path.cwd().resolve()
+        rp = Path(path).resolve()
+    except Exception:
+        raise HTTPException(status_code=400, detail="Yol işlenemedi")
+    if cwd not in rp.parents and rp != cwd:
+        raise HTTPException(status_code=400, detail="Geçersiz yol")
+    if not rp.is_dir():
+        raise HTTPException(status_code=404, detail="Geçmiş klasörü bulunamadı")
+    store = _HISTORY.get(rp)
+    if store is None:
+        try:
+            store = _HISTORY[rp] = PriceHistory(rp)
+        except RuntimeError as e:  # numpy missing
+            raise HTTPException(status_code=400, detail=str(e))
+    return store
+
+
+@router.get("/history/changes")
+def history_changes(path: str, since: str, pct: float = 10.0, limit: int = 100):
+    """Products whose price moved by at least `pct` percent since `since`."""
+    store = _history_store(path)
+    try:
+        items = store.changed_since(since, pct, limit=max(1, min(5000, limit)))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items}
+
+
+@router.get("/history/{product_id}")
+def history_product(product_id: int, path: str, since: Optional[str] = None):
+    """Observations of one product, oldest first."""
+    store = _history_store(path)
+    try:
+        return {"items": store.history(product_id, since=since)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 # ---------------------- PDP LLM Scoring ----------------------
 class StartPDPScoreRequest(BaseModel):
     inp: str
@@ -274,7 +400,7 @@ def start_pdp_score(req: StartPDPScoreRequest):
     # Check at least one non-empty line
     has_line = False
     try:
-        with inp_path.open("r", encoding="utf-8", errors="ignore") as f:
+        with open_text(inp_path, errors="ignore") as f:
             for line in f:
                 if line.strip():
                     has_line = True
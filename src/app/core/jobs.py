@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import re
 import subprocess
 import sys
 import threading
@@ -8,6 +9,9 @@ from dataclasses import dataclass, field, asdict
 from pathlib import Path
 from typing import Dict, List, Optional
 
+# Scraper CLIs log "rate=<req/s>/s" (see src.ratelimit.format_rate)
+_RATE_RE = re.compile(r"rate=([0-9.]+)/s")
+
 
 @dataclass
 class Job:
@@ -22,6 +26,8 @@ class Job:
         default_factory=lambda: Path(".logs") / f"job-{int(time.time()*1000)}.err"
     )
     returncode: Optional[int] = None
+    # files the job reads (e.g. a URL list); removed once it finishes
+    temp_files: List[Path] = field(default_factory=list)
 
 
 class JobManager:
@@ -44,10 +50,12 @@ class JobManager:
         finally:
             stdout_f.close()
             stderr_f.close()
+            for path in job.temp_files:
+                path.unlink(missing_ok=True)
 
-    def start(self, cmd: List[str]) -> Job:
+    def start(self, cmd: List[str], temp_files: Optional[List[Path]] = None) -> Job:
         job_id = f"job-{int(time.time()*1000)}"
-        job = Job(id=job_id, cmd=cmd)
+        job = Job(id=job_id, cmd=cmd, temp_files=list(temp_files or []))
         with self._lock:
             self._jobs[job_id] = job
         t = threading.Thread(target=self._run_job, args=(job,), daemon=True)
@@ -75,6 +83,7 @@ class JobManager:
                         "started_at": job.start_time,
                         "stdout": str(job.stdout_path),
                         "stderr": str(job.stderr_path),
+                        "rate": self._read_rate(job),
                         "cmd": job.cmd,
                     }
                 )
@@ -98,6 +107,22 @@ class JobManager:
         )
         return {"stdout": stdout, "stderr": stderr}
 
+    def rate(self, job_id: str) -> Optional[float]:
+        """Latest rate limiter rate reported in the job's log, if any."""
+        job = self.get(job_id)
+        return self._read_rate(job) if job else None
+
+    def _read_rate(self, job: Job, tail_bytes: int = 16384) -> Optional[float]:
+        if not job.stderr_path.exists():
+            return None
+        with job.stderr_path.open("rb") as f:
+            f.seek(0, 2)
+            size = f.tell()
+            f.seek(max(0, size - tail_bytes))
+            tail = f.read().decode("utf-8", errors="ignore")
+        found = _RATE_RE.findall(tail)
+        return float(found[-1]) if found else None
+
 
 # Singleton manager
 JOB_MANAGER = JobManager()
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+# Query parameters that only record where a click came from; URLs that differ
+# only in them fetch the same page
+TRACKING_PARAMS = frozenset({"gclid", "fbclid", "msclkid", "yclid", "_ga"})
+TRACKING_PREFIXES = ("utm_", "adjust_")
+
+
+def normalize_url(url: str) -> str:
+    """Cache identity of a URL: tracking parameters and fragment dropped, query sorted."""
+    u = urlsplit(url.strip())
+    query = sorted(
+        (k, v)
+        for k, v in parse_qsl(u.query, keep_blank_values=True)
+        if k not in TRACKING_PARAMS and not k.startswith(TRACKING_PREFIXES)
+    )
+    return urlunsplit((u.scheme.lower(), u.netloc.lower(), u.path, urlencode(query), ""))
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    body: bytes
+    content_type: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+
+    def age(self, now: Optional[float] = None) -> float:
+        return (now if now is not None else time.time()) - self.stored_at
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    revalidated: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    bytes_saved: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "bytesSaved": self.bytes_saved,
+        }
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    blob TEXT NOT NULL,
+    content_type TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed_at);
+CREATE INDEX IF NOT EXISTS entries_blob ON entries(blob);
+"""
+
+
+@dataclass
+class HTTPCache:
+    """
+    On-disk response cache.
+
+    Bodies are stored zlib-compressed and content-addressed under
+    `directory/blobs/` (identical pages share one blob); a small SQLite index maps
+    the normalized URL to its blob plus ETag/Last-Modified for revalidation.
+    Entries younger than `ttl` are served without a request; older ones are
+    revalidated with If-None-Match / If-Modified-Since. When compressed blobs
+    exceed `max_bytes`, least recently used entries are evicted.
+    """
+
+    directory: Path
+    ttl: float = 3600.0
+    max_bytes: int = 512 * 1024 * 1024
+    stats: CacheStats = field(default_factory=CacheStats)
+
+    def __post_init__(self) -> None:
+        self.directory = Path(self.directory)
+        (self.directory / "blobs").mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            str(self.directory / "index.sqlite"), check_same_thread=False
+        )
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.directory / "blobs" / digest[:2] / f"{digest}.z"
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        """Return the stored entry for url (fresh or stale), or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT blob, content_type, etag, last_modified, stored_at "
+                "FROM entries WHERE key = ?",
+                (self._key(url),),
+            ).fetchone()
+            if not row:
+                return None
+            try:
+                body = zlib.decompress(self._blob_path(row[0]).read_bytes())
+            except (OSError, zlib.error):
+                self._delete_entry(self._key(url), row[0])
+                self._db.commit()
+                return None
+            self._db.execute(
+                "UPDATE entries SET accessed_at = ? WHERE key = ?",
+                (time.time(), self._key(url)),
+            )
+            self._db.commit()
+        return CacheEntry(url, body, row[1], row[2], row[3], row[4])
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return self.ttl > 0 and entry.age() < self.ttl
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        """get() plus accounting: a fresh entry counts as a hit."""
+        entry = self.get(url)
+        if entry is not None and self.is_fresh(entry):
+            with self._lock:
+                self.stats.hits += 1
+                self.stats.bytes_saved += len(entry.body)
+        return entry
+
+    def conditional_headers(self, entry: CacheEntry) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def put(
+        self,
+        url: str,
+        body: bytes,
+        content_type: Optional[str] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._blob_path(digest)
+        now = time.time()
+        with self._lock:
+            known = self._db.execute(
+                "SELECT 1 FROM blobs WHERE hash = ?", (digest,)
+            ).fetchone()
+            if not known or not path.exists():
+                data = zlib.compress(body, 6)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.parent / f"{path.name}.tmp{os.getpid()}-{threading.get_ident()}"
+                tmp.write_bytes(data)
+                os.replace(tmp, path)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO blobs(hash, size) VALUES (?, ?)",
+                    (digest, len(data)),
+                )
+            key = self._key(url)
+            old = self._db.execute(
+                "SELECT blob FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries"
+                "(key, url, blob, content_type, etag, last_modified, stored_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, digest, content_type, etag, last_modified, now, now),
+            )
+            if old and old[0] != digest:
+                self._drop_blob_if_orphan(old[0])
+            self.stats.misses += 1
+            self.stats.stores += 1
+            self._evict()
+            self._db.commit()
+
+    def touch(self, entry: CacheEntry) -> None:
+        """Mark an entry revalidated by a 304 as fresh again."""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE entries SET stored_at = ?, accessed_at = ? WHERE key = ?",
+                (now, now, self._key(entry.url)),
+            )
+            self._db.commit()
+            self.stats.revalidated += 1
+            self.stats.bytes_saved += len(entry.body)
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._total_bytes()
+
+    def _total_bytes(self) -> int:
+        return int(self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0])
+
+    def _delete_entry(self, key: str, digest: str) -> int:
+        """Drop an entry; returns the bytes freed (0 while its blob is shared)."""
+        self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+        return self._drop_blob_if_orphan(digest)
+
+    def _drop_blob_if_orphan(self, digest: str) -> int:
+        if self._db.execute(
+            "SELECT 1 FROM entries WHERE blob = ? LIMIT 1", (digest,)
+        ).fetchone():
+            return 0
+        row = self._db.execute("SELECT size FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        self._db.execute("DELETE FROM blobs WHERE hash = ?", (digest,))
+        try:
+            self._blob_path(digest).unlink()
+        except FileNotFoundError:
+            pass
+        return int(row[0]) if row else 0
+
+    def _evict(self) -> None:
+        total = self._total_bytes()
+        if total <= self.max_bytes:
+            return
+        # Evict down to 90% of the cap so we don't evict on every store
+        target = int(self.max_bytes * 0.9)
+        rows = self._db.execute(
+            "SELECT key, blob FROM entries ORDER BY accessed_at ASC"
+        ).fetchall()
+        for key, digest in rows:
+            if total <= target:
+                break
+            total -= self._delete_entry(key, digest)
+            self.stats.evictions += 1
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -7,12 +7,19 @@ import json
 import sys
 from dataclasses import asdict
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import Any, Callable, Iterable, List, Optional
 
+from .cache import HTTPCache
 from .fetch import Fetcher
-from .parse import parse_products
-from .writer import NDJSONWriter, CSVWriter
-from .state import load_checkpoint, save_checkpoint, read_seen_ids_from_output
+from .columnar import ROW_GROUP_ROWS
+from .ratelimit import format_rate
+from .parse import PARSE_STATS, parse_products
+from .parse_pool import ParsePool
+from .history import PriceHistory
+from .pipeline import PDPPipeline, pdp_out_problem
+from .writer import WRITERS, BackgroundWriter, ParquetWriter, output_problem
+from .seen_index import RunSeenIds, SeenIndex, index_path
+from .state import CheckpointJournal, load_checkpoint
 
 
 def build_arg_parser() -> argparse.ArgumentParser:
@@ -26,6 +33,29 @@ def build_arg_parser() -> argparse.ArgumentParser:
         default=1,
         help="Çekilecek en fazla sayfa sayısı (varsayılan 1)",
     )
+    p.add_argument(
+        "--max-connections",
+        type=int,
+        default=10,
+        help="Bağlantı havuzundaki en fazla eşzamanlı bağlantı (keep-alive ile yeniden kullanılır)",
+    )
+    p.add_argument(
+        "--http2",
+        action="store_true",
+        help="HTTP/2 kullan (h2 paketi gerekir: pip install httpx[http2])",
+    )
+    p.add_argument(
+        "--cache-dir",
+        type=str,
+        default=None,
+        help="HTTP yanıt önbelleği klasörü (boşsa önbellek kapalı)",
+    )
+    p.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=3600.0,
+        help="Önbellek tazelik süresi (sn); süresi dolanlar ETag/If-Modified-Since ile doğrulanır",
+    )
     p.add_argument(
         "--log-level",
         type=str,
@@ -36,9 +66,35 @@ def build_arg_parser() -> argparse.ArgumentParser:
     p.add_argument(
         "--delay-ms", type=int, default=800, help="İstekler arası gecikme (ms)"
     )
-    p.add_argument("--out", type=str, default="products.csv", help="Çıktı dosyası")
     p.add_argument(
-        "--format", choices=["csv", "ndjson"], default="csv", help="Çıktı formatı"
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Aynı anda çekilecek sayfa sayısı (1 = sıralı, >1 = asyncio ile eşzamanlı)",
+    )
+    p.add_argument(
+        "--parse-workers",
+        type=int,
+        default=0,
+        help="Parse için süreç havuzu boyutu (0 = ana süreçte parse et)",
+    )
+    p.add_argument(
+        "--out",
+        type=str,
+        default="products.csv",
+        help="Çıktı dosyası (.gz/.zst uzantısı sıkıştırarak yazar)",
+    )
+    p.add_argument(
+        "--format",
+        choices=["csv", "ndjson", "parquet", "sqlite"],
+        default="csv",
+        help="Çıktı formatı (parquet için pyarrow gerekir; sqlite ürünleri productId ile günceller)",
+    )
+    p.add_argument(
+        "--row-group-rows",
+        type=int,
+        default=ROW_GROUP_ROWS,
+        help="Parquet satır grubu başına satır sayısı",
     )
     p.add_argument("--user-agent", type=str, default=None, help="Özel User-Agent")
     p.add_argument(
@@ -53,6 +109,18 @@ def build_arg_parser() -> argparse.ArgumentParser:
         default=".checkpoints/scrape.json",
         help="Checkpoint dosya yolu (devre dışı bırakmak için boş bırak)",
     )
+    p.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=1,
+        help="Checkpoint günlüğünü kaç sayfada bir diske yaz (varsayılan 1)",
+    )
+    p.add_argument(
+        "--checkpoint-seconds",
+        type=float,
+        default=0.0,
+        help="Checkpoint günlüğünü en geç bu kadar saniyede bir diske yaz (0 = kapalı)",
+    )
     p.add_argument(
         "--resume",
         action="store_true",
@@ -64,11 +132,65 @@ def build_arg_parser() -> argparse.ArgumentParser:
         default=None,
         help="Toplam yazılacak maksimum ürün sayısı (opsiyonel)",
     )
+    p.add_argument(
+        "--dedupe",
+        choices=["exact", "bitmap", "bloom"],
+        default="exact",
+        help="Bu çalışmada görülen ID'lerin bellekte tutulma şekli: exact (set), bitmap (sıkıştırılmış, kesin), bloom (sabit bellek, yanlış pozitif olabilir)",
+    )
+    p.add_argument(
+        "--dedupe-capacity",
+        type=int,
+        default=10_000_000,
+        help="Bloom filtresinin boyutlandırıldığı beklenen ID sayısı",
+    )
+    p.add_argument(
+        "--dedupe-fp-rate",
+        type=float,
+        default=0.001,
+        help="Bloom filtresi yanlış pozitif oranı (yeni ürünün atlanma olasılığı)",
+    )
+    p.add_argument(
+        "--pdp-out",
+        type=str,
+        default=None,
+        help="Verilirse yeni ürünlerin PDP'leri liste taranırken aynı süreçte çekilip bu NDJSON'a (.ndjson, .ndjson.gz/.zst) yazılır",
+    )
+    p.add_argument(
+        "--pdp-workers",
+        type=int,
+        default=4,
+        help="PDP hattı işçi sayısı (--pdp-out ile)",
+    )
+    p.add_argument(
+        "--pdp-queue",
+        type=int,
+        default=200,
+        help="PDP kuyruğu kapasitesi; dolunca liste taraması bekler",
+    )
+    p.add_argument(
+        "--history",
+        type=str,
+        default=None,
+        help="Fiyat geçmişi klasörü; görülen her ürünün fiyat/satış gözlemi eklenir (numpy gerekir)",
+    )
     return p
 
 
 def main(argv: Optional[Iterable[str]] = None) -> int:
-    args = build_arg_parser().parse_args(list(argv) if argv is not None else None)
+    parser = build_arg_parser()
+    args = parser.parse_args(list(argv) if argv is not None else None)
+    problem = output_problem(Path(args.out), args.format)
+    if not problem and args.pdp_out:
+        problem = pdp_out_problem(Path(args.pdp_out))
+    if problem:
+        parser.error(problem)
+    history = None
+    if args.history:
+        try:
+            history = PriceHistory(Path(args.history))
+        except RuntimeError as e:
+            parser.error(str(e))
 
     # Logging setup
     logging.basicConfig(
@@ -77,64 +199,165 @@ def main(argv: Optional[Iterable[str]] = None) -> int:
     )
     log = logging.getLogger("trendyol.scraper")
 
+    cache = (
+        HTTPCache(Path(args.cache_dir), ttl=args.cache_ttl) if args.cache_dir else None
+    )
     fetcher = Fetcher(
-        user_agent=args.user_agent, proxy=args.proxy, delay_ms=args.delay_ms
+        user_agent=args.user_agent,
+        proxy=args.proxy,
+        delay_ms=args.delay_ms,
+        cache=cache,
+        max_connections=args.max_connections,
+        max_keepalive=args.max_connections,
+        http2=args.http2,
     )
 
     out_path = Path(args.out)
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
-    writer = CSVWriter(out_path) if args.format == "csv" else NDJSONWriter(out_path)
+    # --resume keeps the existing output and appends to it; otherwise start fresh
+    if args.format == "parquet":
+        inner = ParquetWriter(out_path, append=args.resume, row_group_rows=args.row_group_rows)
+    else:
+        inner = WRITERS[args.format](out_path, append=args.resume)
+    # rows are serialized and written on a background thread
+    writer = BackgroundWriter(inner)
+    if writer.repaired_bytes:
+        log.warning(
+            "Çıktının yarım kalan son satırı silindi: %d bayt", writer.repaired_bytes
+        )
 
     # Deduplication: previously written productIds
-    seen_ids = read_seen_ids_from_output(out_path, args.format)
-    if seen_ids:
+    dedupe_kwargs = dict(
+        dedupe=args.dedupe, capacity=args.dedupe_capacity, fp_rate=args.dedupe_fp_rate
+    )
+    if writer.upserts:
+        # products already in the store are updated, not skipped
+        seen_ids = RunSeenIds(**dedupe_kwargs)
+    elif not writer.incremental and not args.resume:
+        # a fresh Parquet file replaces the old one on close, so the old rows
+        # (and their sidecar index) must not count as already written
+        index_path(out_path).unlink(missing_ok=True)
+        seen_ids = RunSeenIds(**dedupe_kwargs)
+    else:
+        seen_ids = SeenIndex.open(out_path, args.format, log=log, **dedupe_kwargs)
+    if len(seen_ids):
         log.info("Önceden yazılmış ürün sayısı (seen set): %d", len(seen_ids))
 
     # Checkpoint
     start_page = 1
     last_written = 0
+    done_pages: List[int] = []
     if args.resume and args.checkpoint:
         cp = load_checkpoint(Path(args.checkpoint))
         if cp and cp.get("url") == args.url:
             start_page = int(cp.get("nextPage", start_page))
             last_written = int(cp.get("written", 0))
+            done_pages = cp.get("done") or []
             log.info(
                 "Checkpoint yüklendi: nextPage=%s, written=%s", start_page, last_written
             )
+            if cp.get("inFlight"):
+                log.info("Yarım kalan sayfalar yeniden çekilecek: %s", cp["inFlight"])
 
     log.info(
-        "Başlıyor: url=%s, out=%s, format=%s, start_page=%d, max_pages=%d, delay_ms=%d",
+        "Başlıyor: url=%s, out=%s, format=%s, start_page=%d, max_pages=%d, delay_ms=%d, concurrency=%d",
         args.url,
         out_path,
         args.format,
         start_page,
         args.max_pages,
         args.delay_ms,
+        args.concurrency,
+    )
+
+    parse_pool = ParsePool(args.parse_workers) if args.parse_workers > 0 else None
+    if parse_pool:
+        log.info("Parse süreç havuzu: workers=%d", parse_pool.workers)
+
+    pipeline = None
+    if args.pdp_out:
+        pipeline = PDPPipeline(
+            fetcher,
+            Path(args.pdp_out),
+            workers=args.pdp_workers,
+            queue_size=args.pdp_queue,
+            log=log,
+            parse_pool=parse_pool,
+            history=history,
+        ).start()
+        log.info("PDP hattı açık: out=%s, workers=%d", args.pdp_out, args.pdp_workers)
+
+    pages = fetcher.iter_pages(
+        args.url,
+        max_pages=args.max_pages,
+        start_page=start_page,
+        concurrency=args.concurrency,
+        raw=parse_pool is not None,
     )
+    if parse_pool:
+        parsed = parse_pool.parse_pages(pages)
+    else:
+        parsed = ((pi, parse_products(html, page_index=pi)) for pi, html in pages)
+
+    def sync_outputs() -> None:
+        # Rows the checkpoint vouches for must be on disk before it is saved;
+        # once the writer has drained, the file size covers every id added
+        writer.sync()
+        if writer.incremental:
+            seen_ids.flush(out_path.stat().st_size)
+            seen_ids.sync()
+
+    journal = None
+    if args.checkpoint:
+        every_pages, every_seconds = args.checkpoint_every, args.checkpoint_seconds
+        if not writer.incremental:
+            # Parquet rows are committed on close only; so is the checkpoint
+            every_pages, every_seconds = sys.maxsize, 0.0
+        journal = CheckpointJournal(
+            Path(args.checkpoint),
+            {"url": args.url, "out": str(out_path), "format": args.format},
+            next_page=start_page,
+            written=last_written,
+            done=done_pages,
+            every_pages=every_pages,
+            every_seconds=every_seconds,
+            before_flush=sync_outputs,
+        )
+
+    def page_done(page_idx: int) -> None:
+        if journal:
+            journal.page_done(page_idx, last_written)
+            log.debug("Checkpoint: sayfa %d bitti, nextPage=%d", page_idx, journal.next_page)
 
     total = 0
     try:
-        for page_idx, html in fetcher.iter_pages(
-            args.url, max_pages=args.max_pages, start_page=start_page
-        ):
-            products = parse_products(html, page_index=page_idx)
+        for page_idx, products in parsed:
+            if journal:
+                if page_idx in journal.done:
+                    continue  # finished before the restart
+                journal.start(page_idx)
             log.info("Sayfa %d: %d ürün bulundu", page_idx, len(products))
             if not products:
                 log.info("Boş sayfa geldi, durduruluyor")
                 break
-            # dedupe
+            if history:
+                # every sighting is an observation, including already written products
+                history.add_rows(products)
+            # dedupe (ids enter seen_ids once their rows are written)
             to_write = []
+            page_ids = set()
             for p in products:
                 pid = p.get("productId")
-                if isinstance(pid, int) and pid in seen_ids:
-                    continue
-                to_write.append(p)
                 if isinstance(pid, int):
-                    seen_ids.add(pid)
+                    if pid in seen_ids or pid in page_ids:
+                        continue
+                    page_ids.add(pid)
+                to_write.append(p)
 
             if not to_write:
                 log.info("Sayfa %d: yazılacak yeni ürün yok (tamamı duplike)", page_idx)
+                page_done(page_idx)
                 continue
 
             # Max-items'e göre son batch'i kırp
@@ -142,18 +365,6 @@ def main(argv: Optional[Iterable[str]] = None) -> int:
                 remain = args.max_items - total
                 if remain <= 0:
                     log.info("Max items sınırına ulaşıldı: %d", args.max_items)
-                    # checkpoint kaydet ve çık
-                    if args.checkpoint:
-                        save_checkpoint(
-                            Path(args.checkpoint),
-                            {
-                                "url": args.url,
-                                "nextPage": page_idx,
-                                "written": last_written,
-                                "out": str(out_path),
-                                "format": args.format,
-                            },
-                        )
                     break
                 log.info(
                     "Max-items nedeniyle parti kırpılıyor: orijinal=%d, yazılacak=%d",
@@ -163,44 +374,106 @@ def main(argv: Optional[Iterable[str]] = None) -> int:
                 to_write = to_write[:remain]
 
             writer.write_many(to_write)
+            for p in to_write:
+                if isinstance(p.get("productId"), int):
+                    seen_ids.add(p["productId"])
+            if pipeline:
+                for p in to_write:
+                    if p.get("productUrl"):
+                        pipeline.submit(p["productUrl"])
             total += len(to_write)
             last_written += len(to_write)
-            log.info("Sayfa %d: yazıldı=%d, toplam=%d", page_idx, len(to_write), total)
+            log.info(
+                "Sayfa %d: yazıldı=%d, toplam=%d, rate=%s",
+                page_idx,
+                len(to_write),
+                total,
+                format_rate(fetcher.current_rate()),
+            )
 
             # max-items sınırı (yazımdan sonra kontrol, checkpoint'i kaydedip kır)
             if args.max_items is not None and total >= args.max_items:
                 log.info("Max items sınırına ulaşıldı: %d", args.max_items)
-                if args.checkpoint:
-                    save_checkpoint(
-                        Path(args.checkpoint),
-                        {
-                            "url": args.url,
-                            "nextPage": page_idx + 1,
-                            "written": last_written,
-                            "out": str(out_path),
-                            "format": args.format,
-                        },
-                    )
-                    log.debug("Checkpoint güncellendi: nextPage=%d", page_idx + 1)
+                page_done(page_idx)
                 break
 
             # checkpoint kaydet
-            if args.checkpoint:
-                save_checkpoint(
-                    Path(args.checkpoint),
-                    {
-                        "url": args.url,
-                        "nextPage": page_idx + 1,
-                        "written": last_written,
-                        "out": str(out_path),
-                        "format": args.format,
-                    },
-                )
-                log.debug("Checkpoint güncellendi: nextPage=%d", page_idx + 1)
+            page_done(page_idx)
     finally:
-        writer.close()
+        # sys.exc_info() is set here only when the crawl is failing
+        failing = sys.exc_info()[0] is not None
+        # Each step runs even if an earlier one fails (writer.close() re-raises
+        # a writer-thread error); the first error is raised once all are done.
+        errors: List[BaseException] = []
+
+        def step(fn: Callable[[], Any]) -> bool:
+            try:
+                fn()
+                return True
+            except BaseException as e:
+                errors.append(e)
+                return False
+
+        # stop fetching/parsing pages the loop will not consume
+        step(parsed.close)
+        step(pages.close)
+        if journal:
+            # commit the file before the checkpoint vouches for it; a file
+            # that failed to commit is not vouched for at all
+            if writer.incremental or step(writer.close):
+                step(journal.close)
+        step(writer.close)
+
+        def close_seen() -> None:
+            seen_ids.flush(out_path.stat().st_size)
+            log.info("Yazıcı: %s", writer.stats())
+            log.info("Dedupe belleği: %s", seen_ids.memory_report())
+
+        step(close_seen)
+        step(seen_ids.close)
+        if pipeline:
+
+            def close_pipeline() -> None:
+                pipeline.close(abort=failing or bool(errors))
+                log.info(
+                    "PDP hattı bitti: kuyruğa=%d, yazılan=%d, hatalı=%d",
+                    pipeline.submitted,
+                    pipeline.written,
+                    pipeline.failed,
+                )
+
+            step(close_pipeline)
+        if history:
+
+            def close_history() -> None:
+                history.close()
+                log.info("Fiyat geçmişi: eklenen gözlem=%d, klasör=%s", history.added, history.path)
+
+            step(close_history)
+        if parse_pool:
+            step(parse_pool.close)
+        step(fetcher.close)
+        if cache:
+            step(cache.close)
+        if errors:
+            if not failing:
+                raise errors[0]
+            # the crawl's own exception propagates; do not hide cleanup failures
+            for e in errors:
+                log.error("Kapatma hatası: %r", e)
 
     log.info("Bitti: toplam yazılan=%d, dosya=%s", total, out_path)
+    log.info(
+        "Parse yolu: state=%d, dom=%d, okunamayan state=%d",
+        PARSE_STATS["state"],
+        PARSE_STATS["dom"],
+        PARSE_STATS["state_error"],
+    )
+    if fetcher.rate_limiter:
+        log.info("Rate limiter: %s", fetcher.rate_limiter.snapshot())
+    log.info("Bağlantı havuzu: %s", fetcher.conn_stats.summary())
+    if cache:
+        log.info("HTTP önbellek: %s", cache.stats.as_dict())
     return 0
 
 
@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from .normalize import price_value
+
+# Parquet output (`--format parquet`). pyarrow is optional: everything here
+# imports it lazily and require_pyarrow() turns its absence into one message.
+
+PARQUET_HINT = "parquet için pyarrow gerekli: pip install pyarrow"
+
+# Default rows per Parquet row group (`--row-group-rows`)
+ROW_GROUP_ROWS = 50_000
+
+# Column types by field name (listing rows from src/parse.py and PDP rows from
+# src/parse_pdp.py). Listing prices arrive as text ("1.150,90 TL") and are
+# stored as float next to their exact kuruş columns; fields not listed here
+# get an inferred scalar type, and nested values are kept as JSON text.
+_INT = "int64"
+_FLOAT = "float64"
+_STR = "string"
+_STRS = "list<string>"
+_JSON = "json"
+
+FIELD_TYPES: Dict[str, str] = {
+    "productId": _INT,
+    "productCode": _STR,
+    "brand": _STR,
+    "name": _STR,
+    "subtitle": _STR,
+    "price": _FLOAT,
+    "priceOriginal": _FLOAT,
+    "priceDiscounted": _FLOAT,
+    "priceKurus": _INT,
+    "priceOriginalKurus": _INT,
+    "priceDiscountedKurus": _INT,
+    "priceLabels": _STRS,
+    "currency": _STR,
+    "rating": _FLOAT,
+    "ratingCount": _INT,
+    "productUrl": _STR,
+    "imageUrl": _STR,
+    "merchantId": _INT,
+    "boutiqueId": _INT,
+    "variantSummary": _STR,
+    "badges": _STRS,
+    "topBadges": _STRS,
+    "socialProof": _STRS,
+    "soldLast3Days": _INT,
+    "addedToBasket3Days": _INT,
+    "favoritedCount": _INT,
+    "viewedLast24Hours": _INT,
+    "pageIndex": _INT,
+    "collectedAt": _STR,
+    "favoriteCount": _INT,
+    "categoryPath": _STRS,
+    "seller": _STR,
+    "sellerId": _INT,
+    "images": _STRS,
+    "variants": _JSON,
+    "sourceUrl": _STR,
+}
+
+# Low-cardinality columns stored with Parquet dictionary encoding
+DICTIONARY_COLUMNS = ("brand", "merchantId", "currency", "seller", "sellerId", "subtitle")
+
+def require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError(PARQUET_HINT) from e
+    return pq
+
+
+def _int_value(v: Any) -> Optional[int]:
+    if v is None or isinstance(v, bool):
+        return None
+    if isinstance(v, int):
+        return v
+    try:
+        return int(str(v).strip())
+    except ValueError:
+        return None
+
+
+def _float_value(v: Any) -> Optional[float]:
+    if isinstance(v, str):
+        return price_value(v)
+    if v is None or isinstance(v, bool):
+        return None
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+
+def _strs_value(v: Any) -> Optional[List[str]]:
+    if v is None:
+        return None
+    if isinstance(v, (list, tuple)):
+        return [x if isinstance(x, str) else json.dumps(x, ensure_ascii=False) for x in v]
+    return [str(v)]
+
+
+def _json_value(v: Any) -> Optional[str]:
+    return None if v is None else json.dumps(v, ensure_ascii=False)
+
+
+def _str_value(v: Any) -> Optional[str]:
+    if v is None:
+        return None
+    if isinstance(v, (dict, list)):
+        return json.dumps(v, ensure_ascii=False)
+    return str(v)
+
+
+def _infer_kind(values: Sequence[Any]) -> str:
+    """Column kind for a field without a FIELD_TYPES entry."""
+    kinds = set()
+    for v in values:
+        if v is None:
+            continue
+        if isinstance(v, bool):
+            return _STR
+        if isinstance(v, int):
+            kinds.add(_INT)
+        elif isinstance(v, float):
+            kinds.add(_FLOAT)
+        elif isinstance(v, str):
+            kinds.add(_STR)
+        else:
+            return _JSON
+    if kinds == {_INT}:
+        return _INT
+    if kinds <= {_INT, _FLOAT} and kinds:
+        return _FLOAT
+    return _STR
+
+
+_CONVERT = {
+    _INT: _int_value,
+    _FLOAT: _float_value,
+    _STR: _str_value,
+    _STRS: _strs_value,
+    _JSON: _json_value,
+}
+
+
+def kind_for(name: str, values: Sequence[Any]) -> str:
+    """Column kind of a field: FIELD_TYPES entry, else inferred from sample values."""
+    return FIELD_TYPES.get(name) or _infer_kind(values)
+
+
+def converter(kind: str):
+    """Function turning a raw row value into the Python value for `kind`."""
+    return _CONVERT[kind]
+
+
+def _arrow_type(kind: str):
+    import pyarrow as pa
+
+    return {
+        _INT: pa.int64(),
+        _FLOAT: pa.float64(),
+        _STR: pa.string(),
+        _STRS: pa.list_(pa.string()),
+        _JSON: pa.string(),
+    }[kind]
+
+
+def schema_for(rows: Sequence[Dict[str, Any]]):
+    """Arrow schema for a first batch of rows: known fields typed, others inferred."""
+    import pyarrow as pa
+
+    names: Dict[str, None] = {}
+    for r in rows:
+        names.update(dict.fromkeys(r))
+    fields = []
+    for name in names:
+        kind = kind_for(name, [r.get(name) for r in rows])
+        # the logical kind travels in field metadata so later batches convert alike
+        fields.append(
+            pa.field(name, _arrow_type(kind), metadata={b"kind": kind.encode()})
+        )
+    return pa.schema(fields)
+
+
+def _field_kind(field) -> str:
+    import pyarrow as pa
+
+    if field.metadata and b"kind" in field.metadata:
+        return field.metadata[b"kind"].decode()
+    # a file written elsewhere: go by the Arrow type
+    if pa.types.is_integer(field.type):
+        return _INT
+    if pa.types.is_floating(field.type):
+        return _FLOAT
+    if pa.types.is_list(field.type):
+        return _STRS
+    return FIELD_TYPES.get(field.name, _STR)
+
+
+def rows_to_table(rows: Sequence[Dict[str, Any]], schema):
+    """Convert rows column by column; keys missing from the schema are dropped."""
+    import pyarrow as pa
+
+    arrays = []
+    for field in schema:
+        name = field.name
+        kind = _field_kind(field)
+        values = [r.get(name) for r in rows]
+        # (a bare string would become a list of characters in a list column)
+        if kind != _JSON and not (kind == _STRS and any(isinstance(v, str) for v in values)):
+            # most columns already hold the right Python type; convert value by
+            # value only when Arrow rejects the column (price text, bools, ...)
+            try:
+                arrays.append(pa.array(values, type=field.type))
+                continue
+            except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, OverflowError):
+                pass
+        conv = _CONVERT[kind]
+        arrays.append(pa.array([conv(v) for v in values], type=field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def column_names(path: Path) -> List[str]:
+    pq = require_pyarrow()
+    return list(pq.ParquetFile(str(path)).schema_arrow.names)
+
+
+def num_rows(path: Path) -> int:
+    """Row count from the footer; no data pages are read."""
+    pq = require_pyarrow()
+    return pq.ParquetFile(str(path)).metadata.num_rows
+
+
+def iter_batches(
+    path: Path, columns: Optional[Iterable[str]] = None, batch_size: int = 65_536
+) -> Iterator[Any]:
+    """Record batches with only `columns` decoded (unknown names are ignored)."""
+    pq = require_pyarrow()
+    pf = pq.ParquetFile(str(path))
+    cols = None
+    if columns is not None:
+        present = set(pf.schema_arrow.names)
+        cols = [c for c in columns if c in present]
+    yield from pf.iter_batches(batch_size=batch_size, columns=cols)
+
+
+def read_rows(
+    path: Path, columns: Optional[Iterable[str]] = None, limit: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Rows as dicts, reading only the projected columns."""
+    rows: List[Dict[str, Any]] = []
+    for batch in iter_batches(path, columns):
+        if limit is not None and len(rows) + batch.num_rows > limit:
+            batch = batch.slice(0, limit - len(rows))
+        rows.extend(batch.to_pylist())
+        if limit is not None and len(rows) >= limit:
+            break
+    return rows
+
+
+def iter_column(path: Path, name: str) -> Iterator[Any]:
+    """Values of a single column (e.g. productId for dedupe)."""
+    for batch in iter_batches(path, [name]):
+        if batch.num_columns:
+            yield from batch.column(0).to_pylist()
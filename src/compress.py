@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import io
+import os
+import zlib
+from pathlib import Path
+from typing import BinaryIO, Optional, TextIO
+
+# Transparent compression for line-oriented outputs, chosen by file suffix
+# (`products.ndjson.zst`, `products.csv.gz`). Writers emit a sequence of
+# independent gzip members / zstd frames, one per flush(), so a file stays
+# readable up to its last flush after a crash and can be appended to or read
+# from any flush boundary. zstandard is optional.
+
+CODECS = {".gz": "gzip", ".zst": "zstd"}
+ZSTD_HINT = ".zst için zstandard gerekli: pip install zstandard"
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+_CHUNK = 1 << 16
+
+
+def codec_of(path: Path) -> Optional[str]:
+    return CODECS.get(Path(path).suffix.lower())
+
+
+def strip_codec(path: Path) -> Path:
+    """`out.ndjson.zst` -> `out.ndjson`; other paths are returned unchanged."""
+    path = Path(path)
+    return path.with_suffix("") if codec_of(path) else path
+
+
+def data_suffix(path: Path) -> str:
+    """Suffix of the data format, ignoring compression (`.ndjson`, `.csv`)."""
+    return strip_codec(path).suffix.lower()
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise RuntimeError(ZSTD_HINT) from e
+    return zstandard
+
+
+def require_codec(path: Path) -> None:
+    """Raise RuntimeError early when the codec for path is unavailable."""
+    if codec_of(path) == "zstd":
+        _zstd()
+
+
+def _compressor(codec: str):
+    if codec == "gzip":
+        return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    return _zstd().ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+
+def _decompressor(codec: str):
+    if codec == "gzip":
+        return zlib.decompressobj(31)
+    return _zstd().ZstdDecompressor().decompressobj()
+
+
+class FrameWriter:
+    """
+    Binary file-like sink that compresses into `raw`.
+
+    Each flush() closes the current member/frame, so everything written
+    before it decodes on its own.
+    """
+
+    def __init__(self, raw: BinaryIO, codec: str) -> None:
+        self.raw = raw
+        self.codec = codec
+        self._c = None
+
+    @property
+    def closed(self) -> bool:
+        return self.raw.closed
+
+    def write(self, data: bytes) -> int:
+        if self._c is None:
+            self._c = _compressor(self.codec)
+        out = self._c.compress(data)
+        if out:
+            self.raw.write(out)
+        return len(data)
+
+    def flush(self) -> None:
+        if self._c is not None:
+            self.raw.write(self._c.flush())
+            self._c = None
+        self.raw.flush()
+
+    def fileno(self) -> int:
+        return self.raw.fileno()
+
+    def close(self) -> None:
+        if self.raw.closed:
+            return
+        try:
+            self.flush()
+        finally:
+            self.raw.close()
+
+
+class _FramesReader(io.RawIOBase):
+    """Decompresses consecutive members/frames; a torn last one yields what decodes."""
+
+    def __init__(self, raw: BinaryIO, codec: str) -> None:
+        self.raw = raw
+        self.codec = codec
+        self._d = None
+        self._pending = b""
+        self._out = b""
+        self._eof = False
+
+    def readable(self) -> bool:
+        return True
+
+    def _fill(self) -> None:
+        while not self._out and not self._eof:
+            data = self._pending or self.raw.read(_CHUNK)
+            self._pending = b""
+            if not data:
+                self._eof = True
+                return
+            if self._d is None:
+                self._d = _decompressor(self.codec)
+            try:
+                self._out = self._d.decompress(data)
+            except Exception:
+                self._eof = True  # corrupt tail: stop at what decoded so far
+                return
+            if self._d.eof:
+                self._pending = self._d.unused_data
+                self._d = None
+
+    def readinto(self, b) -> int:
+        self._fill()
+        n = min(len(b), len(self._out))
+        b[:n] = self._out[:n]
+        self._out = self._out[n:]
+        return n
+
+    def close(self) -> None:
+        if not self.closed:
+            self.raw.close()
+        super().close()
+
+
+def open_read(path: Path, offset: int = 0) -> BinaryIO:
+    """Binary reader over the decompressed content, starting at a flush boundary."""
+    path = Path(path)
+    codec = codec_of(path)
+    raw = path.open("rb")
+    if offset:
+        raw.seek(offset)
+    if codec is None:
+        return raw
+    return io.BufferedReader(_FramesReader(raw, codec), buffer_size=_CHUNK)
+
+
+def open_text(
+    path: Path, offset: int = 0, newline: Optional[str] = None, errors: str = "strict"
+) -> TextIO:
+    return io.TextIOWrapper(
+        open_read(path, offset), encoding="utf-8", newline=newline, errors=errors
+    )
+
+
+def open_write(path: Path, append: bool = False, buffering: int = -1):
+    """Binary sink for path: plain file, or a FrameWriter for .gz/.zst."""
+    path = Path(path)
+    codec = codec_of(path)
+    raw = path.open("ab" if append else "wb", buffering=buffering)
+    if codec is None:
+        return raw
+    return FrameWriter(raw, codec)
+
+
+def repair_frames(path: Path) -> int:
+    """
+    Truncate a compressed file after its last complete member/frame (a crash
+    mid-write leaves a partial one). Returns the number of bytes dropped.
+    """
+    path = Path(path)
+    codec = codec_of(path)
+    if codec is None or not path.exists():
+        return 0
+    size = path.stat().st_size
+    good = pos = 0
+    d = None
+    data = b""
+    with path.open("rb") as f:
+        while True:
+            if not data:
+                data = f.read(_CHUNK)
+                if not data:
+                    break
+            if d is None:
+                d = _decompressor(codec)
+            try:
+                d.decompress(data)
+            except Exception:
+                break  # corrupt from here on
+            if d.eof:
+                rest = d.unused_data
+                pos += len(data) - len(rest)
+                good = pos
+                d = None
+                data = rest
+            else:
+                pos += len(data)
+                data = b""
+    if good < size:
+        with path.open("r+b") as f:
+            f.truncate(good)
+            f.flush()
+            os.fsync(f.fileno())
+    return size - good
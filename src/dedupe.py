@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import math
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, Union
+
+# In-memory productId sets for dedupe (`--dedupe`). All backends share the
+# interface add() -> bool (True if the id was new), `in`, len() and
+# memory_bytes() (approximate heap footprint, for the end-of-run report).
+
+DEFAULT_CAPACITY = 10_000_000
+DEFAULT_FP_RATE = 0.001
+
+
+class ExactIds:
+    """Plain Python set: exact, ~60-90 bytes per id."""
+
+    kind = "exact"
+
+    def __init__(self) -> None:
+        self._ids: set = set()
+
+    def add(self, pid: int) -> bool:
+        if pid in self._ids:
+            return False
+        self._ids.add(pid)
+        return True
+
+    def update(self, ids: Iterable[int]) -> None:
+        self._ids.update(ids)
+
+    def __contains__(self, pid: object) -> bool:
+        return pid in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def memory_bytes(self) -> int:
+        # boxed ints are all about the same size; sampling one avoids a full walk
+        sample = next(iter(self._ids), 0)
+        return sys.getsizeof(self._ids) + len(self._ids) * sys.getsizeof(sample)
+
+
+# Ids are split into 16-bit chunks (roaring layout): a chunk holds a sorted
+# array of its low halves until that would outgrow a fixed 8 KiB bitmap.
+_CHUNK_BITS = 16
+_LOW_MASK = (1 << _CHUNK_BITS) - 1
+_BITMAP_BYTES = (1 << _CHUNK_BITS) // 8
+_ARRAY_MAX = _BITMAP_BYTES // 2
+
+
+class IntBitmap:
+    """Compressed bitmap of non-negative ints: exact, ~2 bytes per id when sparse."""
+
+    kind = "bitmap"
+
+    def __init__(self) -> None:
+        self._chunks: Dict[int, Union[array, bytearray]] = {}
+        self._n = 0
+
+    @staticmethod
+    def _to_bitmap(values: array) -> bytearray:
+        bits = bytearray(_BITMAP_BYTES)
+        for lo in values:
+            bits[lo >> 3] |= 1 << (lo & 7)
+        return bits
+
+    def add(self, pid: int) -> bool:
+        if pid < 0:
+            raise ValueError(f"negatif id desteklenmiyor: {pid}")
+        hi, lo = pid >> _CHUNK_BITS, pid & _LOW_MASK
+        chunk = self._chunks.get(hi)
+        if chunk is None:
+            self._chunks[hi] = array("H", (lo,))
+        elif type(chunk) is array:
+            i = bisect_left(chunk, lo)
+            if i < len(chunk) and chunk[i] == lo:
+                return False
+            if len(chunk) < _ARRAY_MAX:
+                chunk.insert(i, lo)
+            else:
+                bits = self._chunks[hi] = self._to_bitmap(chunk)
+                bits[lo >> 3] |= 1 << (lo & 7)
+        else:
+            mask = 1 << (lo & 7)
+            if chunk[lo >> 3] & mask:
+                return False
+            chunk[lo >> 3] |= mask
+        self._n += 1
+        return True
+
+    def update(self, ids: Iterable[int]) -> None:
+        for pid in ids:
+            self.add(pid)
+
+    def __contains__(self, pid: object) -> bool:
+        if not isinstance(pid, int) or pid < 0:
+            return False
+        chunk = self._chunks.get(pid >> _CHUNK_BITS)
+        if chunk is None:
+            return False
+        lo = pid & _LOW_MASK
+        if type(chunk) is array:
+            i = bisect_left(chunk, lo)
+            return i < len(chunk) and chunk[i] == lo
+        return bool(chunk[lo >> 3] & (1 << (lo & 7)))
+
+    def __len__(self) -> int:
+        return self._n
+
+    def memory_bytes(self) -> int:
+        return sys.getsizeof(self._chunks) + sum(
+            sys.getsizeof(c) for c in self._chunks.values()
+        )
+
+
+_MASK64 = (1 << 64) - 1
+
+
+def _mix64(x: int) -> int:
+    # splitmix64 finalizer: spreads sequential ids over all 64 bits
+    x = (x + 0x9E3779B97F4A7C15) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+
+class BloomFilter:
+    """
+    Bloom filter sized for `capacity` ids at `fp_rate` false positives.
+
+    Fixed memory (~1.8 bytes per id at 0.1%); a false positive makes a new
+    product look already seen, so it is skipped. len() counts ids accepted as new.
+    """
+
+    kind = "bloom"
+
+    def __init__(
+        self, capacity: int = DEFAULT_CAPACITY, fp_rate: float = DEFAULT_FP_RATE
+    ) -> None:
+        if not 0 < fp_rate < 1:
+            raise ValueError("fp_rate 0 ile 1 arasında olmalı")
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.m = max(8, math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.k = max(1, round(self.m / capacity * math.log(2)))
+        self._bits = bytearray((self.m + 7) // 8)
+        self._probes = range(self.k)
+        self._n = 0
+
+    def _positions(self, pid: int):
+        h = _mix64(pid)
+        # double hashing (Kirsch-Mitzenmacher): k probes from two 32-bit halves
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        m = self.m
+        return [(h1 + i * h2) % m for i in self._probes]
+
+    def add(self, pid: int) -> bool:
+        bits = self._bits
+        new = False
+        for p in self._positions(pid):
+            mask = 1 << (p & 7)
+            if not bits[p >> 3] & mask:
+                bits[p >> 3] |= mask
+                new = True
+        if new:
+            self._n += 1
+        return new
+
+    def update(self, ids: Iterable[int]) -> None:
+        for pid in ids:
+            self.add(pid)
+
+    def __contains__(self, pid: object) -> bool:
+        if not isinstance(pid, int):
+            return False
+        bits = self._bits
+        for p in self._positions(pid):
+            if not bits[p >> 3] & (1 << (p & 7)):
+                return False
+        return True
+
+    def __len__(self) -> int:
+        return self._n
+
+    def memory_bytes(self) -> int:
+        return sys.getsizeof(self._bits)
+
+
+BACKENDS = {"exact": ExactIds, "bitmap": IntBitmap, "bloom": BloomFilter}
+
+
+def make_ids(
+    kind: str = "exact",
+    capacity: int = DEFAULT_CAPACITY,
+    fp_rate: float = DEFAULT_FP_RATE,
+):
+    """Construct a dedupe backend by name (see BACKENDS)."""
+    if kind not in BACKENDS:
+        raise ValueError(f"bilinmeyen dedupe türü: {kind}")
+    if kind == "bloom":
+        return BloomFilter(capacity, fp_rate)
+    return BACKENDS[kind]()
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import asyncio
+import queue
 import random
+import threading
 import time
-from dataclasses import dataclass
-from typing import Generator, Optional, Tuple
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Dict, Generator, Optional, Tuple, Union
 from urllib.parse import urlparse, urlunparse, parse_qs, urlencode
 
 import httpx
@@ -14,6 +18,9 @@ from tenacity import (
     retry_if_exception_type,
 )
 
+from .cache import CacheEntry, HTTPCache
+from .ratelimit import RateLimiter
+
 
 DEFAULT_UAS = [
     # A few desktop UA strings; can be extended
@@ -23,11 +30,127 @@ DEFAULT_UAS = [
 ]
 
 
+@dataclass(frozen=True)
+class RawPage:
+    """Undecoded response body; cheap to pickle to parse worker processes."""
+
+    content: bytes
+    encoding: Optional[str] = None
+
+    @classmethod
+    def from_response(cls, resp: httpx.Response) -> "RawPage":
+        return cls(resp.content, resp.encoding)
+
+    def text(self) -> str:
+        # Same decoding as httpx.Response.text
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+
+Page = Union[str, RawPage]
+
+
+def _body(resp: httpx.Response, raw: bool) -> Page:
+    return RawPage.from_response(resp) if raw else resp.text
+
+
+@dataclass
+class ConnectionStats:
+    """Counts requests per pooled connection to show keep-alive reuse."""
+
+    requests: int = 0
+    per_connection: Dict[int, int] = field(default_factory=dict)
+    _ids: "weakref.WeakKeyDictionary[Any, int]" = field(
+        default_factory=weakref.WeakKeyDictionary, repr=False
+    )
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, resp: httpx.Response) -> None:
+        stream = resp.extensions.get("network_stream")
+        with self._lock:
+            self.requests += 1
+            if stream is None:
+                return
+            try:
+                conn_id = self._ids.get(stream)
+                if conn_id is None:
+                    conn_id = self._ids[stream] = len(self.per_connection) + 1
+            except TypeError:  # stream type not weak-referenceable
+                conn_id = id(stream)
+            self.per_connection[conn_id] = self.per_connection.get(conn_id, 0) + 1
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            conns = len(self.per_connection)
+            counts = list(self.per_connection.values())
+            return {
+                "requests": self.requests,
+                "connections": conns,
+                "reusedRequests": max(0, sum(counts) - conns),
+                "maxPerConnection": max(counts) if counts else 0,
+                "avgPerConnection": round(sum(counts) / conns, 2) if conns else 0.0,
+            }
+
+
 @dataclass
 class Fetcher:
     user_agent: Optional[str] = None
     proxy: Optional[str] = None
     delay_ms: int = 800
+    # Shared per-host limiter; defaults to one starting at 1000/delay_ms req/s
+    rate_limiter: Optional[RateLimiter] = None
+    # Optional on-disk response cache (see src/cache.py)
+    cache: Optional[HTTPCache] = None
+    # Connection pool shared by every get_page/iter_pages call on this Fetcher
+    max_connections: int = 10
+    max_keepalive: int = 10
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+
+    def __post_init__(self) -> None:
+        if self.rate_limiter is None:
+            self.rate_limiter = RateLimiter.from_delay_ms(self.delay_ms)
+        self.conn_stats = ConnectionStats()
+        self._client: Optional[httpx.Client] = None
+        self._client_lock = threading.Lock()
+
+    def __enter__(self) -> "Fetcher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _client_kwargs(self) -> Dict[str, Any]:
+        proxies = (
+            {"http://": self.proxy, "https://": self.proxy} if self.proxy else None
+        )
+        return {
+            # HTTP/2 needs the optional `h2` package (pip install httpx[http2])
+            "http2": self.http2,
+            "follow_redirects": True,
+            "proxies": proxies,
+            "limits": httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+        }
+
+    @property
+    def client(self) -> httpx.Client:
+        """Long-lived pooled client, created on first use."""
+        with self._client_lock:
+            if self._client is None:
+                self._client = httpx.Client(**self._client_kwargs())
+            return self._client
+
+    def close(self) -> None:
+        with self._client_lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    def current_rate(self) -> Optional[float]:
+        return self.rate_limiter.current_rate() if self.rate_limiter else None
 
     def _headers(self) -> dict:
         ua = self.user_agent or random.choice(DEFAULT_UAS)
@@ -55,36 +178,220 @@ class Fetcher:
         retry=retry_if_exception_type(httpx.HTTPError),
     )
     def _get(self, client: httpx.Client, url: str) -> httpx.Response:
-        r = client.get(url, headers=self._headers(), timeout=20.0)
+        entry = self.cache.lookup(url) if self.cache else None
+        if entry is not None and self.cache.is_fresh(entry):
+            return self._cached_response(entry)
+        if self.rate_limiter:
+            self.rate_limiter.acquire(url)
+        t0 = time.monotonic()
+        try:
+            r = client.get(url, headers=self._request_headers(entry), timeout=20.0)
+        except httpx.TransportError:
+            self._observe(url, None)
+            raise
+        self.conn_stats.record(r)
+        self._observe(url, r, time.monotonic() - t0)
+        return self._finish(url, r, entry)
+
+    @retry(
+        reraise=True,
+        stop=stop_after_attempt(4),
+        wait=wait_exponential(multiplier=0.8, min=1, max=8),
+        retry=retry_if_exception_type(httpx.HTTPError),
+    )
+    async def _aget(self, client: httpx.AsyncClient, url: str) -> httpx.Response:
+        # cache reads/writes are blocking SQLite + file I/O: keep them off the loop
+        entry = await asyncio.to_thread(self.cache.lookup, url) if self.cache else None
+        if entry is not None and self.cache.is_fresh(entry):
+            return self._cached_response(entry)
+        if self.rate_limiter:
+            await self.rate_limiter.acquire_async(url)
+        t0 = time.monotonic()
+        try:
+            r = await client.get(
+                url, headers=self._request_headers(entry), timeout=20.0
+            )
+        except httpx.TransportError:
+            self._observe(url, None)
+            raise
+        self.conn_stats.record(r)
+        self._observe(url, r, time.monotonic() - t0)
+        if self.cache:
+            return await asyncio.to_thread(self._finish, url, r, entry)
+        return self._finish(url, r, entry)
+
+    def _request_headers(self, entry: Optional[CacheEntry]) -> dict:
+        headers = self._headers()
+        if entry is not None and self.cache:
+            # Revalidate a stale entry; our own no-cache headers would defeat it
+            headers.pop("Cache-Control", None)
+            headers.pop("Pragma", None)
+            headers.update(self.cache.conditional_headers(entry))
+        return headers
+
+    def _finish(
+        self, url: str, r: httpx.Response, entry: Optional[CacheEntry]
+    ) -> httpx.Response:
+        if entry is not None and r.status_code == 304:
+            self.cache.touch(entry)
+            return self._cached_response(entry)
         r.raise_for_status()
+        if self.cache:
+            self.cache.put(
+                url,
+                r.content,
+                content_type=r.headers.get("Content-Type"),
+                etag=r.headers.get("ETag"),
+                last_modified=r.headers.get("Last-Modified"),
+            )
         return r
 
-    def get_page(self, url: str) -> str:
-        """Fetch a single page and return response text."""
-        proxies = (
-            {"http://": self.proxy, "https://": self.proxy} if self.proxy else None
+    @staticmethod
+    def _cached_response(entry: CacheEntry) -> httpx.Response:
+        headers = {"Content-Type": entry.content_type} if entry.content_type else {}
+        return httpx.Response(
+            200,
+            content=entry.body,
+            headers=headers,
+            request=httpx.Request("GET", entry.url),
         )
-        with httpx.Client(
-            http2=False, follow_redirects=True, proxies=proxies
-        ) as client:
-            resp = self._get(client, url)
-            # polite delay
-            time.sleep(max(0, self.delay_ms) / 1000.0)
-            return resp.text
+
+    def _observe(
+        self, url: str, resp: Optional[httpx.Response], latency: Optional[float] = None
+    ) -> None:
+        if not self.rate_limiter:
+            return
+        if resp is None:
+            self.rate_limiter.observe(url, None)
+        else:
+            self.rate_limiter.observe(
+                url, resp.status_code, latency, resp.headers.get("Retry-After")
+            )
+
+    def get_page(self, url: str) -> str:
+        """Fetch a single page over the shared pool and return response text."""
+        return self._get(self.client, url).text
+
+    def get_page_raw(self, url: str) -> RawPage:
+        """get_page() without decoding, for handing the body to a parse process."""
+        return RawPage.from_response(self._get(self.client, url))
 
     def iter_pages(
-        self, url: str, max_pages: int = 1, start_page: int = 1
-    ) -> Generator[Tuple[int, str], None, None]:
-        proxies = (
-            {"http://": self.proxy, "https://": self.proxy} if self.proxy else None
-        )
-        # Use HTTP/1.1 for simplicity; avoids requiring h2 dependency
-        with httpx.Client(
-            http2=False, follow_redirects=True, proxies=proxies
-        ) as client:
-            for pi in range(start_page, start_page + max_pages):
-                u = self._next_url(url, pi)
-                resp = self._get(client, u)
-                yield pi, resp.text
-                # polite delay
-                time.sleep(max(0, self.delay_ms) / 1000.0)
+        self,
+        url: str,
+        max_pages: int = 1,
+        start_page: int = 1,
+        concurrency: int = 1,
+        raw: bool = False,
+    ) -> Generator[Tuple[int, Page], None, None]:
+        """Yield (page_index, html) in page order; html is a RawPage when raw=True.
+
+        With concurrency > 1 pages are fetched by an asyncio crawler running in a
+        background thread, up to `concurrency` pages in flight at once.
+        """
+        if concurrency > 1:
+            yield from self._iter_pages_concurrent(
+                url, max_pages, start_page, concurrency, raw
+            )
+            return
+        client = self.client
+        for pi in range(start_page, start_page + max_pages):
+            u = self._next_url(url, pi)
+            resp = self._get(client, u)
+            yield pi, _body(resp, raw)
+
+    async def aiter_pages(
+        self,
+        url: str,
+        max_pages: int = 1,
+        start_page: int = 1,
+        concurrency: int = 4,
+        raw: bool = False,
+    ) -> AsyncGenerator[Tuple[int, Page], None]:
+        """Async variant of iter_pages: keeps a sliding window of `concurrency`
+        pages in flight and yields them strictly in page order."""
+        end_page = start_page + max_pages
+        window = max(1, concurrency)
+
+        async def fetch(client: httpx.AsyncClient, pi: int) -> Page:
+            resp = await self._aget(client, self._next_url(url, pi))
+            return _body(resp, raw)
+
+        # An AsyncClient is bound to its event loop, so the crawl gets its own
+        # pool built with the same limits as the shared sync one.
+        async with httpx.AsyncClient(**self._client_kwargs()) as client:
+            pending: Dict[int, asyncio.Task] = {}
+            scheduled = start_page
+            try:
+                for pi in range(start_page, end_page):
+                    while scheduled < end_page and scheduled < pi + window:
+                        pending[scheduled] = asyncio.create_task(fetch(client, scheduled))
+                        scheduled += 1
+                    html = await pending.pop(pi)
+                    yield pi, html
+            finally:
+                for t in pending.values():
+                    t.cancel()
+                if pending:
+                    await asyncio.gather(*pending.values(), return_exceptions=True)
+
+    def _iter_pages_concurrent(
+        self, url: str, max_pages: int, start_page: int, concurrency: int, raw: bool
+    ) -> Generator[Tuple[int, Page], None, None]:
+        # Bridge the async crawler to the sync consumer in cli.main. The queue
+        # is bounded so the crawler cannot run arbitrarily far ahead.
+        q: "queue.Queue[Tuple[str, object]]" = queue.Queue(maxsize=concurrency)
+        stop = threading.Event()
+
+        def put(item: Tuple[str, object]) -> bool:
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        async def pump() -> None:
+            agen = self.aiter_pages(url, max_pages, start_page, concurrency, raw)
+            try:
+                async for item in agen:
+                    if not await asyncio.to_thread(put, ("page", item)):
+                        break
+            except BaseException as e:  # surface fetch errors to the consumer
+                put(("error", e))
+            else:
+                put(("done", None))
+            finally:
+                await agen.aclose()
+
+        loop = asyncio.new_event_loop()
+        main_task = loop.create_task(pump())
+
+        def run() -> None:
+            try:
+                loop.run_until_complete(main_task)
+            finally:
+                loop.run_until_complete(loop.shutdown_default_executor())
+                loop.close()
+
+        t = threading.Thread(target=run, name="fetch-crawler", daemon=True)
+        t.start()
+        try:
+            while True:
+                kind, payload = q.get()
+                if kind == "page":
+                    yield payload  # type: ignore[misc]
+                elif kind == "error":
+                    raise payload  # type: ignore[misc]
+                else:
+                    break
+        finally:
+            # Consumer stopped early (empty page, max-items, error): cancel the
+            # in-flight fetches instead of waiting for them.
+            stop.set()
+            try:
+                loop.call_soon_threadsafe(main_task.cancel)
+            except RuntimeError:
+                pass  # loop already closed
+            t.join()
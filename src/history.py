@@ -0,0 +1,425 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .normalize import row_price
+
+# Price history across runs (`--history DIR`): an append-only store of
+# observations keyed by productId. Each flush writes one immutable segment
+# (`seg-<n>-<id>.npz`, deflate-compressed columns sorted by productId,
+# timestamp; <n> orders the segments, the unique <id> keeps writers apart);
+# readers merge the segments once into an in-memory view and answer queries
+# with binary searches over it. numpy is optional and needed only here.
+
+NUMPY_HINT = "fiyat geçmişi için numpy gerekli: pip install numpy"
+
+# Observed metrics besides the timestamp; missing values are stored as NaN
+METRICS = ("price", "priceOriginal", "soldLast3Days", "favoritedCount", "ratingCount")
+_INT_METRICS = ("soldLast3Days", "favoritedCount", "ratingCount")
+
+FLUSH_POINTS = 50_000
+MAX_SEGMENTS = 8
+
+
+def _np():
+    try:
+        import numpy
+    except ImportError as e:
+        raise RuntimeError(NUMPY_HINT) from e
+    return numpy
+
+
+@lru_cache(maxsize=1024)
+def _epoch(text: str) -> Optional[int]:
+    # rows of one page share collectedAt, so parsed values are cached
+    try:
+        dt = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+def to_epoch(t: Any) -> int:
+    """Epoch seconds from a number, digit string, ISO timestamp or datetime."""
+    if isinstance(t, datetime):
+        return int((t if t.tzinfo else t.replace(tzinfo=timezone.utc)).timestamp())
+    if isinstance(t, (int, float)):
+        return int(t)
+    t = str(t).strip()
+    if t.isdigit():
+        return int(t)
+    v = _epoch(t)
+    if v is None:
+        raise ValueError(f"geçersiz zaman: {t!r}")
+    return v
+
+
+def _num(v: Any) -> float:
+    if v is None or isinstance(v, bool):
+        return float("nan")
+    if isinstance(v, (int, float)):
+        return float(v)
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def observation(row: Dict[str, Any], now: int) -> Optional[Tuple]:
+    """(productId, ts, *METRICS) for a listing or PDP row; None without an id."""
+    pid = row.get("productId")
+    if not isinstance(pid, int):
+        return None
+    ts = row.get("collectedAt")
+    if isinstance(ts, str):
+        ts = _epoch(ts) or now
+    elif not isinstance(ts, (int, float)) or isinstance(ts, bool):
+        ts = now
+    ts = int(ts)
+    price = row_price(row)
+    original = row_price(row, "priceOriginal")
+    fav = row.get("favoritedCount")
+    if fav is None:
+        fav = row.get("favoriteCount")  # PDP rows
+    return (
+        pid,
+        ts,
+        float("nan") if price is None else price,
+        float("nan") if original is None else original,
+        _num(row.get("soldLast3Days")),
+        _num(fav),
+        _num(row.get("ratingCount")),
+    )
+
+
+class _View:
+    """All points of the store merged and sorted by (productId, ts)."""
+
+    def __init__(self, arrays: Dict[str, Any]) -> None:
+        np = _np()
+        self.pid = arrays["pid"]
+        self.ts = arrays["ts"]
+        self.metrics = {m: arrays[m] for m in METRICS}
+        self.products = int(np.count_nonzero(np.diff(self.pid))) + 1 if len(self.pid) else 0
+        self._priced = None
+
+    def __len__(self) -> int:
+        return len(self.pid)
+
+    def priced(self):
+        """(pid, price, ts, group starts, group ends) of the points with a price."""
+        if self._priced is None and len(self.pid):
+            np = _np()
+            ok = np.isfinite(self.metrics["price"])
+            pid = self.pid[ok]
+            if len(pid):
+                starts = np.concatenate(([0], np.flatnonzero(np.diff(pid)) + 1))
+                last = np.concatenate((starts[1:], [len(pid)])) - 1
+                self._priced = (pid, self.metrics["price"][ok], self.ts[ok], starts, last)
+        return self._priced
+
+
+def _sort(arrays: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Order points by (productId, ts). Duplicates are merged metric by metric:
+    the last written non-NaN value wins, so a PDP row (no sales, no original
+    price) seen in the same second as a listing row only adds what it has.
+    """
+    np = _np()
+    order = np.lexsort((arrays["ts"], arrays["pid"]))
+    arrays = {c: a[order] for c, a in arrays.items()}
+    pid, ts = arrays["pid"], arrays["ts"]
+    dup = (pid[1:] == pid[:-1]) & (ts[1:] == ts[:-1])
+    if not dup.any():
+        return arrays
+    starts = np.flatnonzero(np.concatenate(([True], ~dup)))
+    out = {"pid": pid[starts], "ts": ts[starts]}
+    pos = np.arange(len(pid))
+    for m in METRICS:
+        a = arrays[m]
+        # lexsort is stable: within a group the latest write has the largest index
+        last = np.maximum.reduceat(np.where(np.isnan(a), -1, pos), starts)
+        out[m] = np.where(last >= 0, a[np.maximum(last, 0)], np.nan)
+    return out
+
+
+def _merge(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    np = _np()
+    if not parts:
+        return {
+            c: np.empty(0, dtype=np.int64 if c in ("pid", "ts") else np.float64)
+            for c in ("pid", "ts") + METRICS
+        }
+    if len(parts) == 1:
+        return parts[0]  # segments are stored sorted
+    # lexsort is stable, so newer segments (listed last) win duplicates
+    return _sort({c: np.concatenate([p[c] for p in parts]) for c in parts[0]})
+
+
+class PriceHistory:
+    """
+    Time-series store of product observations in directory `path`.
+
+    add_rows() buffers points; they are written as a new segment every
+    `flush_points` points and on close(), which also merges the segments
+    once there are more than MAX_SEGMENTS. Segments are written to a
+    temporary name and renamed, so a crash loses at most the buffer.
+    Thread-safe: the listing crawl and the PDP stage may feed one store.
+    Several processes may share the directory too: every segment name is
+    unique, compaction removes only the segments it merged, and
+    readers skip segments that a compaction removed under them.
+    """
+
+    def __init__(self, path: Path, flush_points: int = FLUSH_POINTS) -> None:
+        self.np = _np()
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.flush_points = max(1, flush_points)
+        self.added = 0
+        self._buf: List[Tuple] = []
+        self._lock = threading.Lock()
+        self._view: Optional[_View] = None
+        self._view_key: Optional[Tuple] = None
+
+    # Writing
+
+    def _segments(self) -> List[Path]:
+        return sorted(self.path.glob("seg-*.npz"))
+
+    def add_rows(self, rows: Iterable[Dict[str, Any]], now: Optional[int] = None) -> int:
+        now = int(time.time()) if now is None else now
+        points = [p for p in (observation(r, now) for r in rows) if p is not None]
+        with self._lock:
+            self._buf.extend(points)
+            self.added += len(points)
+            if len(self._buf) >= self.flush_points:
+                self._flush_locked()
+        return len(points)
+
+    def _write_segment(self, arrays: Dict[str, Any], seq: int) -> Path:
+        # another process may pick the same seq; the unique part keeps the
+        # names apart (segments sharing a seq were written concurrently)
+        final = self.path / f"seg-{seq:08d}-{os.getpid()}{uuid.uuid4().hex[:8]}.npz"
+        tmp = final.with_name(final.name + ".tmp")
+        with tmp.open("wb") as f:
+            self.np.savez_compressed(f, **arrays)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, final)
+        return final
+
+    @staticmethod
+    def _seq(seg: Path) -> int:
+        return int(seg.stem.split("-")[1])
+
+    def _next_seq(self) -> int:
+        segs = self._segments()
+        return self._seq(segs[-1]) + 1 if segs else 1
+
+    def _flush_locked(self) -> None:
+        if not self._buf:
+            return
+        np = self.np
+        cols = list(zip(*self._buf))
+        self._buf = []
+        arrays = {
+            "pid": np.asarray(cols[0], dtype=np.int64),
+            "ts": np.asarray(cols[1], dtype=np.int64),
+        }
+        for i, m in enumerate(METRICS, start=2):
+            arrays[m] = np.asarray(cols[i], dtype=np.float64)
+        self._write_segment(_sort(arrays), self._next_seq())
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def compact(self) -> None:
+        """Merge all segments into one."""
+        with self._lock:
+            self._flush_locked()
+            segs = self._segments()
+            if len(segs) < 2:
+                return
+            loaded = [(p, self._load(p)) for p in segs]
+            loaded = [(p, a) for p, a in loaded if a is not None]
+            if len(loaded) < 2:
+                return  # another process compacted them
+            # the merged segment takes its newest input's place in the order,
+            # so segments other processes write meanwhile still sort after it
+            merged = _merge([a for _, a in loaded])
+            self._write_segment(merged, self._seq(loaded[-1][0]))
+            for p, _ in loaded:
+                p.unlink(missing_ok=True)
+
+    def close(self) -> None:
+        self.flush()
+        if len(self._segments()) > MAX_SEGMENTS:
+            self.compact()
+
+    # Reading
+
+    def _load(self, seg: Path) -> Optional[Dict[str, Any]]:
+        """The segment's columns; None if a compaction removed it meanwhile."""
+        try:
+            with self.np.load(seg) as z:
+                return {k: z[k] for k in z.files}
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _stat(segs: List[Path]) -> List[Tuple[Path, os.stat_result]]:
+        """(segment, stat) of the listed segments that still exist."""
+        out = []
+        for p in segs:
+            try:
+                out.append((p, p.stat()))
+            except FileNotFoundError:
+                pass
+        return out
+
+    def view(self) -> _View:
+        """Merged view of the flushed segments, rebuilt only when they change."""
+        for attempt in range(3):
+            listed = self._segments()
+            segs = self._stat(listed)
+            key = tuple((p.name, st.st_mtime_ns) for p, st in segs)
+            if self._view is not None and key == self._view_key:
+                return self._view
+            parts = [self._load(p) for p, _ in segs]
+            if (len(segs) == len(listed) and None not in parts) or attempt == 2:
+                break
+            # a compaction replaced segments between the glob and the reads;
+            # its merged segment is in place by now, so list again
+        self._view = _View(_merge([a for a in parts if a is not None]))
+        self._view_key = key
+        return self._view
+
+    def history(
+        self, product_id: int, since: Any = None, until: Any = None
+    ) -> List[Dict[str, Any]]:
+        """Observations of one product in time order."""
+        v = self.view()
+        np = self.np
+        # the product's run of points, then the time window inside it
+        first = int(np.searchsorted(v.pid, product_id, side="left"))
+        ts = v.ts[first : int(np.searchsorted(v.pid, product_id, side="right"))]
+        lo = int(np.searchsorted(ts, to_epoch(since), side="left")) if since is not None else 0
+        hi = int(np.searchsorted(ts, to_epoch(until), side="right")) if until is not None else len(ts)
+        return [self._point(v, i) for i in range(first + lo, first + hi)]
+
+    @staticmethod
+    def _point(v: _View, i: int) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "productId": int(v.pid[i]),
+            "ts": int(v.ts[i]),
+            "collectedAt": datetime.fromtimestamp(int(v.ts[i]), timezone.utc).isoformat(),
+        }
+        for m, arr in v.metrics.items():
+            x = float(arr[i])
+            if x != x:  # NaN
+                out[m] = None
+            else:
+                out[m] = int(x) if m in _INT_METRICS else x
+        return out
+
+    def changed_since(
+        self, since: Any, min_pct: float, limit: Optional[int] = 100
+    ) -> List[Dict[str, Any]]:
+        """
+        Products whose latest price differs from their price at `since` (the
+        last observation at or before it) by at least `min_pct` percent,
+        largest changes first. Products first seen after `since` are skipped.
+        """
+        np = self.np
+        v = self.view()
+        if not len(v):
+            return []
+        t = to_epoch(since)
+        priced = v.priced()
+        if priced is None:
+            return []
+        pid, price, ts, starts, last = priced
+        pids = pid[starts]
+        # ts is sorted within each product, so the points at or before `since`
+        # are a prefix of its run and the base is the prefix's last point
+        before = np.add.reduceat((ts <= t).astype(np.int64), starts)
+        base = starts + before - 1
+        has_base = before > 0
+        base = np.where(has_base, base, 0)
+        old, new = price[base], price[last]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pct = (new - old) / old * 100.0
+        hit = has_base & (old > 0) & (np.abs(pct) >= min_pct)
+        idx = np.flatnonzero(hit)
+        idx = idx[np.argsort(-np.abs(pct[idx]), kind="stable")]
+        if limit is not None:
+            idx = idx[:limit]
+        return [
+            {
+                "productId": int(pids[i]),
+                "oldPrice": float(old[i]),
+                "newPrice": float(new[i]),
+                "changePct": round(float(pct[i]), 2),
+                "since": int(ts[base[i]]),
+                "latest": int(ts[last[i]]),
+            }
+            for i in idx
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        v = self.view()
+        segs = self._stat(self._segments())
+        return {
+            "points": len(v),
+            "products": v.products,
+            "segments": len(segs),
+            "bytes": sum(st.st_size for _, st in segs),
+        }
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="Fiyat geçmişi deposunu sorgular")
+    p.add_argument("--store", required=True, help="Geçmiş klasörü (--history ile yazılan)")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    h = sub.add_parser("product", help="Bir ürünün geçmişi")
+    h.add_argument("product_id", type=int)
+    h.add_argument("--since", default=None, help="ISO zaman veya epoch saniye")
+    c = sub.add_parser("changes", help="Fiyatı belirli bir zamandan beri değişen ürünler")
+    c.add_argument("--since", required=True, help="ISO zaman veya epoch saniye")
+    c.add_argument("--pct", type=float, default=10.0, help="En az yüzde değişim")
+    c.add_argument("--limit", type=int, default=100)
+    sub.add_parser("stats", help="Depo özeti")
+    sub.add_parser("compact", help="Segmentleri birleştir")
+    return p
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    store = PriceHistory(Path(args.store))
+    if args.cmd == "product":
+        out: Any = store.history(args.product_id, since=args.since)
+    elif args.cmd == "changes":
+        out = store.changed_since(args.since, args.pct, args.limit)
+    elif args.cmd == "compact":
+        store.compact()
+        out = store.stats()
+    else:
+        out = store.stats()
+    print(json.dumps(out, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
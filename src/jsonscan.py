@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Dict, Iterator, Mapping, Optional, Tuple
+
+# One token per JSON string literal (escape-aware) or bracket. Everything in
+# between (numbers, punctuation, JS glue code) is skipped by the regex engine.
+_STRING = r'"[^"\\]*(?:\\.[^"\\]*)*"'
+_TOKEN = re.compile(_STRING + r"|[{}\[\]]", re.S)
+_COLON = re.compile(r"\s*:\s*")
+_DECODER = json.JSONDecoder()
+
+# Value kinds accepted by find_json_values
+OBJECT = "object"
+ARRAY = "array"
+STRING = "string"
+NUMBER = "number"
+
+_FIRST_CHAR = {"{": OBJECT, "[": ARRAY, '"': STRING}
+
+
+def _kind_of_char(ch: str) -> Optional[str]:
+    kind = _FIRST_CHAR.get(ch)
+    if kind is None and (ch == "-" or ch.isdigit()):
+        return NUMBER
+    return kind
+
+
+def _kind_of(value: Any) -> Optional[str]:
+    if isinstance(value, dict):
+        return OBJECT
+    if isinstance(value, list):
+        return ARRAY
+    if isinstance(value, str):
+        return STRING
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return NUMBER
+    return None
+
+
+def _walk(value: Any) -> Iterator[Tuple[str, Any]]:
+    """(key, value) pairs of a decoded JSON value in document (pre-)order."""
+    stack = [iter(((None, value),))]
+    while stack:
+        for key, v in stack[-1]:
+            if key is not None:
+                yield key, v
+            if isinstance(v, dict):
+                stack.append(iter(v.items()))
+                break
+            if isinstance(v, list):
+                stack.append((None, x) for x in v)
+                break
+        else:
+            stack.pop()
+
+
+def find_json_values(
+    text: str, keys: Mapping[str, Optional[str]]
+) -> Dict[str, Any]:
+    """
+    Decode the first `"key": value` of several keys in one forward pass over text.
+
+    `keys` maps each key to the kind its value must have (OBJECT, ARRAY, STRING,
+    NUMBER) or None for any; occurrences of another kind are skipped. Text
+    outside JSON values (JS code) is tokenized by string literals and brackets
+    only, so braces or quotes inside strings never confuse the scan. A matched
+    value is decoded in place with the C decoder, and keys nested inside it are
+    looked up in the decoded value rather than by re-scanning its text. Values
+    that are not strict JSON are skipped and scanned token by token instead.
+    """
+    wanted = {json.dumps(k): k for k in keys}
+    found: Dict[str, Any] = {}
+    pos = 0
+    n = len(text)
+    while pos < n and len(found) < len(wanted):
+        m = _TOKEN.search(text, pos)
+        if m is None:
+            break
+        pos = m.end()
+        key = wanted.get(m.group())
+        if key is None or key in found:
+            continue
+        colon = _COLON.match(text, pos)
+        if colon is None:
+            # a string value, not a key
+            continue
+        vstart = colon.end()
+        if vstart >= n:
+            break
+        expect = keys[key]
+        if expect is not None and _kind_of_char(text[vstart]) != expect:
+            continue
+        try:
+            value, end = _DECODER.raw_decode(text, vstart)
+        except ValueError:
+            continue
+        found[key] = value
+        if isinstance(value, (dict, list)) and len(found) < len(wanted):
+            for k, v in _walk(value):
+                if k in keys and k not in found and (keys[k] is None or _kind_of(v) == keys[k]):
+                    found[k] = v
+                    if len(found) == len(wanted):
+                        break
+        pos = end
+    return found
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from . import sqlite_store
+from .columnar import iter_batches
+from .compress import open_text
+from .normalize import KURUS_FIELDS, add_price_fields
+from .writer import WRITERS, output_problem
+
+# Rewrites outputs from before the parsers emitted kuruş price fields
+# (`priceKurus`, ...), so readers of old and new files see the same columns.
+
+BATCH_ROWS = 1000
+
+
+def iter_rows(path: Path, fmt: str) -> Iterator[Dict[str, Any]]:
+    """All rows of an output file, streamed; undecodable NDJSON lines are skipped."""
+    if fmt == "parquet":
+        for batch in iter_batches(path):
+            yield from batch.to_pylist()
+    elif fmt == "sqlite":
+        # only the price columns are read; the upsert leaves the others alone
+        cols = ("productId",) + tuple(KURUS_FIELDS) + tuple(KURUS_FIELDS.values())
+        yield from sqlite_store.read_rows(path, cols)
+    elif fmt == "csv":
+        with open_text(path, newline="") as f:
+            yield from csv.DictReader(f)
+    else:
+        with open_text(path, errors="ignore") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def migrate(inp: Path, out: Path, fmt: str) -> int:
+    """Copy inp to out with the kuruş fields filled in; returns rows written."""
+    writer = WRITERS[fmt](out, append=fmt == "sqlite")
+    batch: List[Dict[str, Any]] = []
+    try:
+        for row in iter_rows(inp, fmt):
+            batch.append(add_price_fields(row))
+            if len(batch) >= BATCH_ROWS:
+                writer.write_many(batch)
+                batch = []
+        if batch:
+            writer.write_many(batch)
+    finally:
+        writer.close()
+    return writer.rows
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        description="Eski çıktılara kuruş cinsinden fiyat alanlarını (priceKurus, ...) ekler"
+    )
+    p.add_argument("--in", dest="inp", required=True, help="Eski çıktı dosyası")
+    p.add_argument(
+        "--out",
+        type=str,
+        default=None,
+        help="Yeni dosya (sqlite yerinde güncellenir, gerekmez)",
+    )
+    p.add_argument(
+        "--format",
+        choices=["ndjson", "csv", "parquet", "sqlite"],
+        default="ndjson",
+        help="Girdi ve çıktı formatı",
+    )
+    return p
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = build_arg_parser()
+    args = parser.parse_args(list(argv) if argv is not None else None)
+    inp = Path(args.inp)
+    if args.format == "sqlite":
+        # upserts by productId, so the store is updated in place
+        if args.out and Path(args.out).resolve() != inp.resolve():
+            parser.error("sqlite yerinde güncellenir; --out vermeyin")
+        out = inp
+    elif not args.out:
+        parser.error("--out gerekli (yerinde güncelleme yalnızca sqlite için)")
+    else:
+        out = Path(args.out)
+        if out.resolve() == inp.resolve():
+            parser.error("--out girdiden farklı olmalı")
+    problem = output_problem(out, args.format)
+    if problem:
+        parser.error(problem)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    rows = migrate(inp, out, args.format)
+    logging.getLogger("trendyol.migrate").info("Taşındı: %d satır -> %s", rows, out)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
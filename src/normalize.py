@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+# Turkish price normalization shared by the parsers, writers and analysis.
+# Listing cards show prices as text ("1.299,90 TL"); rows carry that text in
+# `price`/`priceOriginal`/`priceDiscounted` and the exact amount in integer
+# kuruş next to it (`priceKurus`, ...), so consumers never re-parse text.
+
+# Text field -> integer kuruş field
+KURUS_FIELDS: Dict[str, str] = {
+    "price": "priceKurus",
+    "priceOriginal": "priceOriginalKurus",
+    "priceDiscounted": "priceDiscountedKurus",
+}
+
+_NUM_RE = re.compile(r"\d[\d.,]*")
+
+
+@lru_cache(maxsize=65_536)
+def _kurus_text(text: str) -> Optional[int]:
+    # listing prices repeat a lot, so parsed texts are cached
+    m = _NUM_RE.search(text)
+    if not m:
+        return None
+    s = m.group(0).rstrip(".,")
+    if "," in s:
+        whole, _, frac = s.rpartition(",")
+        whole = whole.replace(".", "").replace(",", "")
+    elif s.count(".") > 1 or re.search(r"\.\d{3}$", s):
+        whole, frac = s.replace(".", ""), ""  # thousands separators only
+    else:
+        whole, _, frac = s.partition(".")
+    if (whole and not whole.isdigit()) or (frac and not frac.isdigit()):
+        return None
+    frac = (frac + "000")[:3]
+    # round half up on the third decimal, if any
+    return int(whole or "0") * 100 + int(frac[:2]) + (1 if frac[2] >= "5" else 0)
+
+
+def price_kurus(v: Any) -> Optional[int]:
+    """Price text ("1.299,90 TL") or a number in TL -> integer kuruş."""
+    if v is None or isinstance(v, bool):
+        return None
+    if isinstance(v, int):
+        return v * 100
+    if isinstance(v, float):
+        return None if v != v else int(round(v * 100))
+    return _kurus_text(str(v))
+
+
+def price_value(v: Any) -> Optional[float]:
+    """Price text or a number -> TL as float."""
+    if isinstance(v, float) or (isinstance(v, int) and not isinstance(v, bool)):
+        return float(v)
+    k = price_kurus(v)
+    return None if k is None else k / 100
+
+
+def row_price(row: Dict[str, Any], field: str = "price") -> Optional[float]:
+    """A row's price in TL: the kuruş field when present, else the text parsed."""
+    k = row.get(KURUS_FIELDS[field])
+    if isinstance(k, int) and not isinstance(k, bool):
+        return k / 100
+    if isinstance(k, float) and k == k:  # readers may widen ints
+        return k / 100
+    if isinstance(k, str) and k.isdigit():  # CSV
+        return int(k) / 100
+    return price_value(row.get(field))
+
+
+def add_price_fields(row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Fill the kuruş fields a row lacks from its price text (rows written
+    before the parsers emitted them). The row is updated in place.
+    """
+    for text_field, kurus_field in KURUS_FIELDS.items():
+        if row.get(kurus_field) in (None, "") and text_field in row:
+            row[kurus_field] = price_kurus(row[text_field])
+    return row
+
+
+def migrate_rows(rows: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    for row in rows:
+        yield add_price_fields(row)
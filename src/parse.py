@@ -1,12 +1,20 @@
 from __future__ import annotations
 
+import json
+from collections import Counter
 from dataclasses import dataclass
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 from urllib.parse import urljoin, urlparse, parse_qs
 
 from selectolax.parser import HTMLParser
 
+from .normalize import price_kurus, price_value
+
 BASE = "https://www.trendyol.com"
+CDN_BASE = "https://cdn.dsmcdn.com"
+
+# Which parser produced each listing page: "state" (embedded JSON) or "dom"
+PARSE_STATS: Counter = Counter()
 
 
 @dataclass
@@ -16,6 +24,7 @@ class Product:
     name: Optional[str]
     subtitle: Optional[str]
     price: Optional[str]
+    priceKurus: Optional[int]
     currency: str
     rating: Optional[float]
     ratingCount: Optional[int]
@@ -29,20 +38,6 @@ class Product:
     collectedAt: str
 
 
-def _text(node, sel: str) -> Optional[str]:
-    n = node.css_first(sel)
-    if not n:
-        return None
-    return n.text(strip=True) or None
-
-
-def _attr(node, sel: str, attr: str) -> Optional[str]:
-    n = node.css_first(sel)
-    if not n:
-        return None
-    return n.attributes.get(attr)
-
-
 def _parse_int(s: Optional[str]) -> Optional[int]:
     if not s:
         return None
@@ -59,14 +54,6 @@ def _parse_float(s: Optional[str]) -> Optional[float]:
         return None
 
 
-def _text_any(node, selectors: List[str]) -> Optional[str]:
-    for sel in selectors:
-        v = _text(node, sel)
-        if v:
-            return v
-    return None
-
-
 def _parse_turkish_compact_number(s: Optional[str]) -> Optional[int]:
     """
     Parse strings like "1B+", "4,6B", "147,1B", "100+" to integers.
@@ -109,7 +96,10 @@ def _parse_turkish_compact_number(s: Optional[str]) -> Optional[int]:
         return _parse_int(txt)
 
 
-def _extract_social_proof(card) -> Tuple[List[str], Dict[str, Optional[int]]]:
+def _social_proof_fields(
+    items: List[Tuple[str, Optional[str]]]
+) -> Tuple[List[str], Dict[str, Optional[int]]]:
+    """Normalize social proof lines given as (text, focused-number-text) pairs."""
     texts: List[str] = []
     data: Dict[str, Optional[int]] = {
         "soldLast3Days": None,
@@ -117,15 +107,10 @@ def _extract_social_proof(card) -> Tuple[List[str], Dict[str, Optional[int]]]:
         "favoritedCount": None,
         "viewedLast24Hours": None,
     }
-    # Collect raw texts
-    for n in card.css(".social-proof .social-proof-text"):
-        t = n.text(strip=True)
+    for t, focused_txt in items:
         if t:
             texts.append(t)
             low = t.lower()
-            # Try to find a highlighted number span first
-            focused = n.css_first(".focused-text")
-            focused_txt = focused.text(strip=True) if focused else None
             num = _parse_turkish_compact_number(focused_txt or t)
             if "satıldı" in low and "son 3 günde" in low:
                 data["soldLast3Days"] = max(data["soldLast3Days"] or 0, num or 0) or num
@@ -144,111 +129,394 @@ def _extract_social_proof(card) -> Tuple[List[str], Dict[str, Optional[int]]]:
     return texts, data
 
 
-def parse_products(html: str, page_index: int) -> List[Dict[str, Any]]:
-    tree = HTMLParser(html)
-    cards = tree.css("div.p-card-wrppr")
-    results: List[Dict[str, Any]] = []
-    if not cards:
-        return results
-
-    from datetime import datetime, timezone
+def _abs_url(href: str) -> str:
+    # Card links are site-absolute paths; skip urljoin's generic resolution
+    # unless the path could need normalizing.
+    if href.startswith("/") and not href.startswith("//") and "/." not in href:
+        return BASE + href
+    return urljoin(BASE, href)
+
+
+def _card_row(
+    page_index: int,
+    now: str,
+    pid: Optional[str],
+    href: Optional[str],
+    brand: Optional[str],
+    name: Optional[str],
+    subtitle: Optional[str],
+    price_discounted: Optional[str],
+    price_original: Optional[str],
+    price_any: Optional[str],
+    rating_txt: Optional[str],
+    rating_count_txt: Optional[str],
+    image_url: Optional[str],
+    v_value: Optional[str],
+    v_more: Optional[str],
+    badges: List[str],
+    top_badges: List[str],
+    price_labels: List[str],
+    social_texts: List[str],
+    social: Dict[str, Optional[int]],
+) -> Dict[str, Any]:
+    product_id = _parse_int(pid)
+    abs_url = _abs_url(href) if href else None
+
+    # Query params
+    boutique_id = merchant_id = None
+    if href:
+        try:
+            # same as urlparse(href).query, without the full URL split
+            q = parse_qs(href.split("#", 1)[0].partition("?")[2])
+            boutique_id = _parse_int((q.get("boutiqueId") or [None])[0])
+            merchant_id = _parse_int((q.get("merchantId") or [None])[0])
+        except Exception:
+            pass
+
+    # legacy price
+    price = price_discounted or price_any or price_original
+
+    variant_summary = None
+    if v_value or v_more:
+        variant_summary = " | ".join([x for x in [v_value, v_more] if x])
+
+    return {
+        "productId": product_id,
+        "brand": brand,
+        "name": name,
+        "subtitle": subtitle,
+        "price": price,
+        "priceOriginal": price_original,
+        "priceDiscounted": price_discounted,
+        # exact amounts in kuruş next to the card text
+        "priceKurus": price_kurus(price),
+        "priceOriginalKurus": price_kurus(price_original),
+        "priceDiscountedKurus": price_kurus(price_discounted),
+        "priceLabels": price_labels,
+        "currency": "TL",
+        "rating": _parse_float(rating_txt),
+        "ratingCount": _parse_int(rating_count_txt),
+        "productUrl": abs_url,
+        "imageUrl": image_url,
+        "merchantId": merchant_id,
+        "boutiqueId": boutique_id,
+        "variantSummary": variant_summary,
+        "badges": badges,
+        "topBadges": top_badges,
+        "socialProof": social_texts,
+        # normalized social proof
+        **social,
+        "pageIndex": page_index,
+        "collectedAt": now,
+    }
 
-    now = datetime.now(timezone.utc).isoformat()
 
-    for card in cards:
-        pid = _attr(card, "div.p-card-wrppr", "data-id") or card.attributes.get(
-            "data-id"
-        )
-        product_id = _parse_int(pid)
-        href = _attr(card, "a.p-card-chldrn-cntnr", "href")
-        abs_url = urljoin(BASE, href) if href else None
-
-        # Query params
-        boutique_id = merchant_id = None
-        if href:
-            try:
-                q = parse_qs(urlparse(href).query)
-                boutique_id = _parse_int((q.get("boutiqueId") or [None])[0])
-                merchant_id = _parse_int((q.get("merchantId") or [None])[0])
-            except Exception:
-                pass
-
-        brand = _text(card, ".prdct-desc-cntnr-ttl")
-        name = _text(card, ".prdct-desc-cntnr-name")
-        subtitle = _text(card, ".product-desc-sub-text")
-
-        # price details
-        price_discounted = _text_any(
-            card,
-            [
-                ".price-item.lowest-price-discounted",
-                ".price-item.discounted",
-            ],
-        )
-        price_original = _text_any(card, [".price-item.lowest-price-original"])
-        # legacy price
-        price = price_discounted or _text(card, ".price-item") or price_original
-
-        rating = _parse_float(_text(card, ".rating-score"))
-        rating_count = _parse_int(_text(card, ".ratingCount"))
-
-        image_url = _attr(card, ".p-card-img", "src")
-
-        variant_summary = None
-        v_value = _text(card, ".variant-options-overlay .variant-value")
-        v_more = _text(card, ".variant-options-overlay .other-variant-count")
-        if v_value or v_more:
-            variant_summary = " | ".join([x for x in [v_value, v_more] if x])
-
-        badges: List[str] = []
-        for b in card.css(".badges-wrapper .product-badge .name"):
-            t = b.text(strip=True)
+def _classes(node) -> Tuple[str, ...]:
+    c = node.attrs.get("class")
+    return tuple(c.split()) if c else ()
+
+
+def _under(node, chain: Tuple[str, ...]) -> bool:
+    """True if node has ancestors carrying classes chain[0], then chain[1], ...
+    walking upwards - i.e. it matches the CSS descendant selector
+    `.chain[-1] ... .chain[0] <node>`."""
+    i = 0
+    p = node.parent
+    while p is not None and i < len(chain):
+        if chain[i] in _classes(p):
+            i += 1
+        p = p.parent
+    return i == len(chain)
+
+
+# Single-class text fields: class -> field key (first match wins)
+_FIRST_TEXT = {
+    "prdct-desc-cntnr-ttl": "brand",
+    "prdct-desc-cntnr-name": "name",
+    "product-desc-sub-text": "subtitle",
+    "rating-score": "rating_txt",
+    "ratingCount": "rating_count_txt",
+}
+
+
+_WANTED = frozenset(_FIRST_TEXT) | {
+    "p-card-wrppr",
+    "p-card-chldrn-cntnr",
+    "price-item",
+    "p-card-img",
+    "variant-value",
+    "other-variant-count",
+    "name",
+    "badge-title",
+    "low-price-title",
+    "social-proof-text",
+    "focused-text",
+}
+
+
+def _extract_card(card, page_index: int, now: str) -> Dict[str, Any]:
+    """
+    Single-pass extractor with output identical to the per-selector one it
+    replaced (benchmarks/card_css.py, checked in tests/test_parse.py).
+
+    One `[class]` query walks the card subtree once and yields every classed
+    node in document order; each node is dispatched on its class names. The
+    "first match wins" rule of the per-field selectors is kept by only filling
+    a field the first time a matching node is seen. Ancestor constraints of the
+    descendant selectors are checked by walking up from the (rare) candidate.
+    """
+    first: Dict[str, Any] = {}
+    badges: List[str] = []
+    top_badges: List[str] = []
+    price_labels: List[str] = []
+    # social-proof-text mem_id -> [text, focused text]
+    social: Dict[int, List[Optional[str]]] = {}
+    card_id = card.mem_id
+
+    for node in card.css("[class]"):
+        classes = node.attrs.get("class").split()
+        if _WANTED.isdisjoint(classes):
+            continue  # wrappers, star icons, ...
+        for cls in classes:
+            key = _FIRST_TEXT.get(cls)
+            if key is not None and key not in first:
+                first[key] = node.text(strip=True) or None
+
+        if "p-card-wrppr" in classes:
+            if "pid" not in first and node.tag == "div":
+                first["pid"] = node.attrs.get("data-id")
+        if "p-card-chldrn-cntnr" in classes:
+            if "href" not in first and node.tag == "a":
+                first["href"] = node.attrs.get("href")
+        if "price-item" in classes:
+            if "price_any" not in first:
+                first["price_any"] = node.text(strip=True) or None
+            if "lowest-price-discounted" in classes and "pd1" not in first:
+                first["pd1"] = node.text(strip=True) or None
+            if "discounted" in classes and "pd2" not in first:
+                first["pd2"] = node.text(strip=True) or None
+            if "lowest-price-original" in classes and "po" not in first:
+                first["po"] = node.text(strip=True) or None
+        if "p-card-img" in classes and "image" not in first:
+            first["image"] = node.attrs.get("src")
+        if "variant-value" in classes and "v_value" not in first:
+            if _under(node, ("variant-options-overlay",)):
+                first["v_value"] = node.text(strip=True) or None
+        if "other-variant-count" in classes and "v_more" not in first:
+            if _under(node, ("variant-options-overlay",)):
+                first["v_more"] = node.text(strip=True) or None
+        if "name" in classes and _under(node, ("product-badge", "badges-wrapper")):
+            t = node.text(strip=True)
             if t:
                 badges.append(t)
-
-        # Top badge wrapper (e.g., "En Çok Satan 1. Ürün")
-        top_badges: List[str] = []
-        for b in card.css(".badge-wrapper .badge-title"):
-            t = b.text(strip=True)
+        if "badge-title" in classes and _under(node, ("badge-wrapper",)):
+            t = node.text(strip=True)
             if t:
                 top_badges.append(t)
-
-        # Price labels (e.g., Son 30 Günün En Düşük Fiyatı!)
-        price_labels: List[str] = []
-        for n in card.css(".price-label-wrapper .low-price-title"):
-            t = n.text(strip=True)
+        if "low-price-title" in classes and _under(node, ("price-label-wrapper",)):
+            t = node.text(strip=True)
             if t:
                 price_labels.append(t)
+        if "social-proof-text" in classes and _under(node, ("social-proof",)):
+            social[node.mem_id] = [node.text(strip=True), None]
+        if "focused-text" in classes and social:
+            # first focused-text inside (or on) each enclosing social-proof-text
+            p = node
+            while p is not None:
+                rec = social.get(p.mem_id)
+                if rec is not None and rec[1] is None:
+                    rec[1] = node.text(strip=True) or ""
+                if p.mem_id == card_id:
+                    break
+                p = p.parent
+
+    social_texts, social_data = _social_proof_fields(
+        [(t, f or None) for t, f in social.values() if t]
+    )
+    return _card_row(
+        page_index,
+        now,
+        pid=first.get("pid") or card.attrs.get("data-id"),
+        href=first.get("href"),
+        brand=first.get("brand"),
+        name=first.get("name"),
+        subtitle=first.get("subtitle"),
+        price_discounted=first.get("pd1") or first.get("pd2"),
+        price_original=first.get("po"),
+        price_any=first.get("price_any"),
+        rating_txt=first.get("rating_txt"),
+        rating_count_txt=first.get("rating_count_txt"),
+        image_url=first.get("image"),
+        v_value=first.get("v_value"),
+        v_more=first.get("v_more"),
+        badges=badges,
+        top_badges=top_badges,
+        price_labels=price_labels,
+        social_texts=social_texts,
+        social=social_data,
+    )
+
+
+# window.__SEARCH_APP_INITIAL_STATE__ = {...}; holds the server-side search result
+_STATE_MARKER = "__SEARCH_APP_INITIAL_STATE__"
+# social proof keys in the state -> normalized fields / Turkish card texts
+_STATE_SOCIAL = {
+    "orderCount": ("soldLast3Days", "Son 3 günde {} ürün satıldı!"),
+    "basketCount": ("addedToBasket3Days", "Son 3 günde {} kişi sepete ekledi!"),
+    "favoriteCount": ("favoritedCount", "{} kişi favoriledi!"),
+    "pageViewCount": ("viewedLast24Hours", "Son 24 saatte {} kişi inceledi!"),
+}
+
+
+def _extract_state(html: str) -> Optional[Dict[str, Any]]:
+    """Decode the embedded search state straight from the HTML string."""
+    idx = html.find(_STATE_MARKER)
+    while idx != -1:
+        eq = html.find("=", idx + len(_STATE_MARKER), idx + len(_STATE_MARKER) + 8)
+        if eq != -1:
+            start = eq + 1
+            while start < len(html) and html[start] in " \t\r\n":
+                start += 1
+            if html.startswith("{", start):
+                try:
+                    state, _ = json.JSONDecoder().raw_decode(html, start)
+                    if isinstance(state, dict):
+                        return state
+                except ValueError:
+                    pass
+        idx = html.find(_STATE_MARKER, idx + len(_STATE_MARKER))
+    return None
 
-        # Social proof
-        social_texts, social = _extract_social_proof(card)
-
-        results.append(
-            {
-                "productId": product_id,
-                "brand": brand,
-                "name": name,
-                "subtitle": subtitle,
-                "price": price,
-                "priceOriginal": price_original,
-                "priceDiscounted": price_discounted,
-                "priceLabels": price_labels,
-                "currency": "TL",
-                "rating": rating,
-                "ratingCount": rating_count,
-                "productUrl": abs_url,
-                "imageUrl": image_url,
-                "merchantId": merchant_id,
-                "boutiqueId": boutique_id,
-                "variantSummary": variant_summary,
-                "badges": badges,
-                "topBadges": top_badges,
-                "socialProof": social_texts,
-                # normalized social proof
-                **social,
-                "pageIndex": page_index,
-                "collectedAt": now,
-            }
-        )
+
+def _state_products(state: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+    for holder in (state, state.get("result"), state.get("searchResult")):
+        if isinstance(holder, dict) and isinstance(holder.get("products"), list):
+            return [p for p in holder["products"] if isinstance(p, dict)]
+    return None
+
+
+def _format_tl(value: Any) -> Optional[str]:
+    """Render a numeric price like the cards do: 1299.9 -> "1.299,90 TL"."""
+    try:
+        v = float(value)
+    except (TypeError, ValueError):
+        return None
+    txt = f"{v:,.0f}" if v.is_integer() else f"{v:,.2f}"
+    return txt.replace(",", "_").replace(".", ",").replace("_", ".") + " TL"
+
+
+def _image_url(path: Optional[str]) -> Optional[str]:
+    if not path:
+        return None
+    return path if path.startswith("http") else CDN_BASE + path
+
+
+def _state_price(v: Any) -> Optional[float]:
+    """A state price: a number, numeric text or {"value": ...} -> TL."""
+    if isinstance(v, dict):
+        v = v.get("value")
+    return price_value(v)
+
+
+def _row_from_state(prod: Dict[str, Any], page_index: int, now: str) -> Dict[str, Any]:
+    price = prod.get("price") if isinstance(prod.get("price"), dict) else {}
+    selling = _state_price(price.get("sellingPrice"))
+    discounted = _state_price(price.get("discountedPrice"))
+    original = _state_price(price.get("originalPrice"))
+    current = discounted if discounted is not None else selling
+    has_discount = original is not None and current is not None and original > current
+    brand = prod.get("brand")
+    if isinstance(brand, dict):
+        brand = brand.get("name")
+    rating = prod.get("ratingScore") if isinstance(prod.get("ratingScore"), dict) else {}
+    images = prod.get("images") or []
+
+    social_texts: List[str] = []
+    social: Dict[str, Optional[int]] = {
+        "soldLast3Days": None,
+        "addedToBasket3Days": None,
+        "favoritedCount": None,
+        "viewedLast24Hours": None,
+    }
+    for sp in prod.get("socialProof") or []:
+        if not isinstance(sp, dict) or sp.get("key") not in _STATE_SOCIAL:
+            continue
+        field_name, template = _STATE_SOCIAL[sp["key"]]
+        value = str(sp.get("value") or "").strip()
+        if value:
+            social_texts.append(template.format(value))
+            social[field_name] = _parse_turkish_compact_number(value)
+
+    def titles(items: Any) -> List[str]:
+        out: List[str] = []
+        for b in items or []:
+            t = (b.get("title") or b.get("name")) if isinstance(b, dict) else b
+            if isinstance(t, str) and t.strip():
+                out.append(t.strip())
+        return out
+
+    href = prod.get("url")
+    row = _card_row(
+        page_index,
+        now,
+        pid=str(prod.get("id")) if prod.get("id") is not None else None,
+        href=href,
+        brand=brand or None,
+        name=prod.get("name") or None,
+        subtitle=None,
+        price_discounted=_format_tl(current) if has_discount else None,
+        price_original=_format_tl(original) if has_discount else None,
+        price_any=_format_tl(current),
+        rating_txt=str(rating["averageRating"]) if rating.get("averageRating") is not None else None,
+        rating_count_txt=str(rating["totalCount"]) if rating.get("totalCount") is not None else None,
+        image_url=_image_url(images[0] if images else prod.get("image")),
+        v_value=None,
+        v_more=None,
+        badges=titles(prod.get("badges")),
+        top_badges=titles([prod["rankingBadge"]] if prod.get("rankingBadge") else []),
+        price_labels=[],
+        social_texts=social_texts,
+        social=social,
+    )
+    if row["merchantId"] is None and prod.get("merchantId") is not None:
+        row["merchantId"] = _parse_int(str(prod["merchantId"]))
+    return row
+
+
+def parse_products(
+    html: str, page_index: int, use_state: bool = True
+) -> List[Dict[str, Any]]:
+    """
+    Parse a listing page. The embedded search state is decoded first (one JSON
+    blob, no DOM needed); the card-by-card DOM parser is the fallback when the
+    state is missing, has no product list or cannot be read. PARSE_STATS
+    counts both paths and the state failures.
+    """
+    from datetime import datetime, timezone
+
+    now = datetime.now(timezone.utc).isoformat()
+
+    if use_state:
+        state = _extract_state(html)
+        products = _state_products(state) if state else None
+        if products is not None:
+            try:
+                rows = [_row_from_state(p, page_index, now) for p in products]
+            except (TypeError, ValueError, KeyError, AttributeError):
+                # a state shape we do not know: the cards are still there
+                PARSE_STATS["state_error"] += 1
+            else:
+                PARSE_STATS["state"] += 1
+                return rows
+
+    PARSE_STATS["dom"] += 1
+    tree = HTMLParser(html)
+    cards = tree.css("div.p-card-wrppr")
+    results: List[Dict[str, Any]] = []
+    if not cards:
+        return results
+
+    for card in cards:
+        results.append(_extract_card(card, page_index, now))
 
     return results
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+import re
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional
 from urllib.parse import urlparse, parse_qs
 
 from selectolax.parser import HTMLParser
 
+from . import jsonscan
+from .normalize import price_kurus, price_value
+
 
 @dataclass
 class PDPProduct:
@@ -14,6 +18,7 @@ class PDPProduct:
     name: Optional[str]
     brand: Optional[str]
     price: Optional[float]
+    priceKurus: Optional[int]
     currency: str
     rating: Optional[float]
     ratingCount: Optional[int]
@@ -40,6 +45,15 @@ def _parse_int(v: Optional[str]) -> Optional[int]:
         return int(digits) if digits else None
 
 
+def _int_value(v: Any) -> Optional[int]:
+    """An integer from parsed JSON: numbers as they are, strings via _parse_int."""
+    if isinstance(v, bool):
+        return None
+    if isinstance(v, (int, float)):
+        return int(v) if v == v else None  # 12.0 -> 12; NaN has no value
+    return _parse_int(v) if isinstance(v, str) else None
+
+
 def _parse_float(v: Optional[str]) -> Optional[float]:
     if v is None:
         return None
@@ -51,241 +65,182 @@ def _parse_float(v: Optional[str]) -> Optional[float]:
 
 # Core parser
 
+# Script bodies are raw text, so they can be sliced out without building a DOM
+_SCRIPT_OPEN = re.compile(r"<script\b[^>]*>", re.I)
+_SCRIPT_CLOSE = re.compile(r"</script\s*>", re.I)
+
+# Keys read from embedded scripts and the JSON kind each value must have
+_SCRIPT_KEYS = {
+    "product": jsonscan.OBJECT,
+    "images": jsonscan.ARRAY,
+    "variants": jsonscan.ARRAY,
+    "webCategoryTree": jsonscan.ARRAY,
+    "favoriteCount": jsonscan.NUMBER,
+    "merchant": jsonscan.OBJECT,
+}
+_SCRIPT_MARKERS = {k: f'"{k}"' for k in _SCRIPT_KEYS}
+
+# Class names targeted by the badge selectors; if none occurs in the page the
+# selectors cannot match and the DOM is not needed for badges.
+_BADGE_SELECTOR = ".category-top-ranking-wrap-text, .badge__text-wrapper span, .badge-title"
+_BADGE_MARKERS = ("category-top-ranking-wrap-text", "badge__text-wrapper", "badge-title")
+
+
+def _iter_scripts(html: str):
+    pos = 0
+    while True:
+        m = _SCRIPT_OPEN.search(html, pos)
+        if m is None:
+            return
+        end = _SCRIPT_CLOSE.search(html, m.end())
+        if end is None:
+            return
+        yield html[m.end() : end.start()]
+        pos = end.end()
+
+
+def _script_data(html: str) -> Dict[str, Any]:
+    """
+    First usable value of each _SCRIPT_KEYS key across the page's scripts.
+
+    Each script is scanned once for every key still missing (jsonscan), so
+    multi-MB state blobs are not re-walked per field.
+    """
+    data: Dict[str, Any] = {}
+    for txt in _iter_scripts(html):
+        wanted = {
+            k: kind
+            for k, kind in _SCRIPT_KEYS.items()
+            if k not in data and _SCRIPT_MARKERS[k] in txt
+        }
+        # seller info only comes from merchant listing state
+        if "merchant" in wanted and '"merchantListing"' not in txt:
+            del wanted["merchant"]
+        if not wanted:
+            continue
+        for key, value in jsonscan.find_json_values(txt, wanted).items():
+            # analytics/dataLayer scripts carry "product" objects too; the
+            # page's own one has an id and a name or brand
+            if key == "product" and not (
+                isinstance(value, dict)
+                and value.get("id") is not None
+                and (value.get("name") or value.get("brand"))
+            ):
+                continue
+            if key == "merchant" and not (
+                isinstance(value, dict) and value.get("id") is not None and value.get("name")
+            ):
+                continue
+            if isinstance(value, list) and not value:
+                continue
+            data[key] = value
+        if len(data) == len(_SCRIPT_KEYS):
+            break
+    return data
+
+
+def _product_price(product: Dict[str, Any]) -> Optional[float]:
+    winner = product.get("winnerVariant")
+    price_obj = winner.get("price") if isinstance(winner, dict) else None
+    if not isinstance(price_obj, dict):
+        return None
+    for key in ("discountedPrice", "sellingPrice"):
+        p = price_obj.get(key)
+        if isinstance(p, dict) and p.get("value"):
+            try:
+                return float(p["value"])
+            except (TypeError, ValueError):
+                continue
+    return None
+
 
 def parse_pdp(html: str) -> Dict[str, Any]:
     """
     Parse Trendyol PDP. Prefers embedded JSON-like window["__envoy_*__PROPS"] when present,
-    with fallbacks to visible DOM.
+    with fallbacks to visible DOM. The DOM is only parsed when script data does not cover
+    name/brand/price/rating or the page has badge markup.
     Returns a flat dict safe for NDJSON.
     """
-    tree = HTMLParser(html)
-
-    # 1) Try to extract from embedded scripts that include product fields
-    # We scan <script> tags text and look for patterns like '"product":{"id":...}
-    product: Dict[str, Any] = {}
-    images: List[str] = []
-    variants: List[Dict[str, Any]] = []
-    category_tree: List[str] = []
-    seller_name: Optional[str] = None
-    seller_id: Optional[int] = None
-    favorite_count: Optional[int] = None
-
-    for script in tree.css("script"):
-        txt = script.text() or ""
-        if (
-            '"product"' in txt
-            and '"id":' in txt
-            and '"name":' in txt
-            and '"brand"' in txt
-        ):
-            # crude slicing to the product object JSON
-            try:
-                # Find product object boundaries
-                start = txt.find('"product"')
-                if start == -1:
-                    continue
-                start = txt.find("{", start)
-                # Balance braces to extract JSON object
-                depth = 0
-                end = start
-                while end < len(txt):
-                    if txt[end] == "{":
-                        depth += 1
-                    elif txt[end] == "}":
-                        depth -= 1
-                        if depth == 0:
-                            end += 1
-                            break
-                    end += 1
-                blob = txt[start:end]
-                # Minify keys that we care about
-                # Use simple json parsing after fixing escaped sequences
-                import json, re
-
-                # Clean up invalid trailing commas etc. Attempt a best-effort parse
-                cleaned = blob
-                # Some windows props are JS, but often valid JSON
-                product_obj = json.loads(cleaned)
-                product = product_obj
-            except Exception:
-                continue
-        if '"favoriteCount"' in txt and favorite_count is None:
-            # rough parse for favoriteCount
-            import re
-
-            m = re.search(r'"favoriteCount"\s*:\s*(\d+)', txt)
-            if m:
-                favorite_count = _parse_int(m.group(1))
-        if '"images"' in txt and not images:
-            try:
-                import json
-
-                # naive parse for images array
-                idx = txt.find('"images"')
-                if idx != -1:
-                    start = txt.find("[", idx)
-                    depth = 0
-                    j = start
-                    while j < len(txt):
-                        if txt[j] == "[":
-                            depth += 1
-                        elif txt[j] == "]":
-                            depth -= 1
-                            if depth == 0:
-                                j += 1
-                                break
-                        j += 1
-                    arr = txt[start:j]
-                    images = json.loads(arr)
-            except Exception:
-                pass
-        if '"variants"' in txt and not variants:
-            try:
-                import json
-
-                idx = txt.find('"variants"')
-                if idx != -1:
-                    start = txt.find("[", idx)
-                    depth = 0
-                    j = start
-                    while j < len(txt):
-                        if txt[j] == "[":
-                            depth += 1
-                        elif txt[j] == "]":
-                            depth -= 1
-                            if depth == 0:
-                                j += 1
-                                break
-                        j += 1
-                    arr = txt[start:j]
-                    variants = json.loads(arr)
-            except Exception:
-                pass
-        if '"webCategoryTree"' in txt and not category_tree:
-            try:
-                import json
-
-                idx = txt.find('"webCategoryTree"')
-                if idx != -1:
-                    start = txt.find("[", idx)
-                    depth = 0
-                    j = start
-                    while j < len(txt):
-                        if txt[j] == "[":
-                            depth += 1
-                        elif txt[j] == "]":
-                            depth -= 1
-                            if depth == 0:
-                                j += 1
-                                break
-                        j += 1
-                    arr = txt[start:j]
-                    cats = json.loads(arr)
-                    category_tree = [
-                        c.get("name")
-                        for c in cats
-                        if isinstance(c, dict) and c.get("name")
-                    ]
-            except Exception:
-                pass
-        if '"merchantListing"' in txt and seller_id is None:
-            try:
-                import re
-
-                m1 = re.search(
-                    r'"merchant"\s*:\s*\{[^}]*"id"\s*:\s*(\d+)[^}]*"name"\s*:\s*"([^"]+)"',
-                    txt,
-                )
-                if m1:
-                    seller_id = _parse_int(m1.group(1))
-                    seller_name = m1.group(2)
-            except Exception:
-                pass
-
-    # Fallbacks from visible DOM
-    title = None
-    brand = None
-    rating_val = None
-    rating_count = None
-    price_val = None
+    data = _script_data(html)
+    product = data.get("product")
+    if not isinstance(product, dict):
+        product = {}
+
+    pid = _int_value(product.get("id"))
+    product_code = product.get("productCode")
+    brand_obj = product.get("brand")
+    brand = brand_obj.get("name") if isinstance(brand_obj, dict) else None
+    name = product.get("name")
+    price_val = _product_price(product)
+    rs = product.get("ratingScore")
+    rs = rs if isinstance(rs, dict) else {}
+    rating_val = rs.get("averageRating")
+    rating_count = rs.get("totalCount")
     currency = "TL"
 
-    h1 = tree.css_first('[data-testid="product-title"], h1.product-title')
-    if h1:
-        title = h1.text(strip=True)
-        # brand may be inside a strong or anchor within h1
-        b = h1.css_first("strong")
-        if b:
-            brand = b.text(strip=True)
-            # remove brand from title if duplicated
-            if title.startswith(brand):
-                title = title[len(brand) :].strip("- ").strip()
-
-    # rating
-    rv = tree.css_first(".reviews-summary-average-rating")
-    if rv:
-        rating_val = _parse_float(rv.text(strip=True))
-    rc = tree.css_first(".reviews-summary-reviews-detail b")
-    if rc:
-        rating_count = _parse_int(rc.text(strip=True))
-
-    # price (try various selectors)
-    price_node = (
-        tree.css_first('[data-testid="price-current-price"]')
-        or tree.css_first(".prc-dsc")
-        or tree.css_first(".product-price .pr-bx-w .prc-dsc")
-    )
-    if price_node:
-        price_val = _parse_float(price_node.text(strip=True))
-
-    # badges
-    badges: List[str] = []
-    for n in tree.css(
-        ".category-top-ranking-wrap-text, .badge__text-wrapper span, .badge-title"
-    ):
-        t = n.text(strip=True)
-        if t and t not in badges:
-            badges.append(t)
-
-    # Compose result, preferring script data if available
-    pid = _parse_int(str(product.get("id"))) if product else None
-    product_code = product.get("productCode") if isinstance(product, dict) else None
-    brand_final = (
-        (product.get("brand") or {}).get("name")
-        if isinstance(product, dict) and isinstance(product.get("brand"), dict)
-        else brand
-    )
-    name_final = product.get("name") if isinstance(product, dict) else title
-
-    # price from product object if present
-    try:
-        p_price = None
-        if isinstance(product, dict):
-            winner = product.get("winnerVariant") or {}
-            price_obj = winner.get("price") or {}
-            p_price = price_obj.get("discountedPrice", {}).get(
-                "value"
-            ) or price_obj.get("sellingPrice", {}).get("value")
-        price_val = float(p_price) if p_price is not None else price_val
-    except Exception:
-        pass
+    favorite_count = _int_value(data.get("favoriteCount"))
+    if favorite_count is None:
+        favorite_count = _int_value(product.get("favoriteCount"))
 
-    # rating from product object
-    if isinstance(product, dict) and not rating_val:
-        rs = product.get("ratingScore") or {}
-        rating_val = rs.get("averageRating")
-        rating_count = rs.get("totalCount") or rating_count
+    category_tree = [
+        c.get("name")
+        for c in data.get("webCategoryTree") or []
+        if isinstance(c, dict) and c.get("name")
+    ]
+    merchant = data.get("merchant") or {}
+    seller_id = _int_value(merchant.get("id")) if merchant else None
+    seller_name = merchant.get("name") if merchant else None
 
-    # favorites from script
-    if favorite_count is None and isinstance(product, dict):
-        favorite_count = product.get("favoriteCount")
+    badges: List[str] = []
+    need_badges = any(marker in html for marker in _BADGE_MARKERS)
+    if need_badges or None in (name, brand, price_val, rating_val, rating_count):
+        # Fallbacks from visible DOM
+        tree = HTMLParser(html)
+        if name is None or brand is None:
+            h1 = tree.css_first('[data-testid="product-title"], h1.product-title')
+            if h1:
+                title = h1.text(strip=True)
+                # brand may be inside a strong or anchor within h1
+                b = h1.css_first("strong")
+                dom_brand = b.text(strip=True) if b else None
+                if dom_brand and title.startswith(dom_brand):
+                    # remove brand from title if duplicated
+                    title = title[len(dom_brand) :].strip("- ").strip()
+                name = name if name is not None else title
+                brand = brand if brand is not None else dom_brand
+
+        if rating_val is None:
+            rv = tree.css_first(".reviews-summary-average-rating")
+            if rv:
+                rating_val = _parse_float(rv.text(strip=True))
+        if rating_count is None:
+            rc = tree.css_first(".reviews-summary-reviews-detail b")
+            if rc:
+                rating_count = _parse_int(rc.text(strip=True))
+
+        # price (try various selectors)
+        if price_val is None:
+            price_node = (
+                tree.css_first('[data-testid="price-current-price"]')
+                or tree.css_first(".prc-dsc")
+                or tree.css_first(".product-price .pr-bx-w .prc-dsc")
+            )
+            if price_node:
+                price_val = price_value(price_node.text(strip=True))
+
+        if need_badges:
+            for n in tree.css(_BADGE_SELECTOR):
+                t = n.text(strip=True)
+                if t and t not in badges:
+                    badges.append(t)
 
     out: Dict[str, Any] = {
         "productId": pid,
         "productCode": product_code,
-        "name": name_final,
-        "brand": brand_final,
+        "name": name,
+        "brand": brand,
         "price": price_val,
+        "priceKurus": price_kurus(price_val),
         "currency": currency,
         "rating": rating_val,
         "ratingCount": rating_count,
@@ -293,8 +248,8 @@ def parse_pdp(html: str) -> Dict[str, Any]:
         "categoryPath": category_tree,
         "seller": seller_name,
         "sellerId": seller_id,
-        "variants": variants,
-        "images": images,
+        "variants": data.get("variants") or [],
+        "images": data.get("images") or [],
         "badges": badges,
     }
 
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .fetch import RawPage
+from .parse import PARSE_STATS, parse_products
+from .parse_pdp import parse_pdp
+
+
+# Worker-side functions. Pages travel as raw bytes plus the response encoding:
+# bytes pickle as a single buffer copy, and decoding happens in the worker.
+
+
+def _parse_listing(
+    page_index: int, content: bytes, encoding: Optional[str]
+) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    before = PARSE_STATS.copy()
+    rows = parse_products(RawPage(content, encoding).text(), page_index=page_index)
+    # PARSE_STATS lives in the worker process; hand the increments back
+    return rows, dict(PARSE_STATS - before)
+
+
+def _parse_pdp(content: bytes, encoding: Optional[str]) -> Dict[str, Any]:
+    return parse_pdp(RawPage(content, encoding).text())
+
+
+class ParsePool:
+    """
+    Process pool for the CPU-bound parse stage (`--parse-workers`).
+
+    Fetching stays in the parent; workers receive RawPage bodies and return
+    parsed rows, so parsing scales across cores instead of sharing the GIL
+    with the fetch loop. Workers are started with "spawn" because the parent
+    already runs fetch threads by the time the pool is used.
+    """
+
+    def __init__(self, workers: int, lookahead: Optional[int] = None) -> None:
+        self.workers = max(1, workers)
+        # pages handed to workers ahead of the one the caller is waiting for
+        self.lookahead = max(1, lookahead if lookahead is not None else self.workers * 2)
+        self._ex = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def __enter__(self) -> "ParsePool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._ex.shutdown(wait=True, cancel_futures=True)
+
+    @staticmethod
+    def _collect(page_index: int, fut: Future) -> Tuple[int, List[Dict[str, Any]]]:
+        rows, stats = fut.result()
+        PARSE_STATS.update(stats)
+        return page_index, rows
+
+    def parse_pages(
+        self, pages: Iterable[Tuple[int, RawPage]]
+    ) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        parse_products over (page_index, RawPage) pairs, yielding (page_index, rows)
+        in input order. Up to `lookahead` pages are pulled from `pages` and parsed
+        while the caller handles earlier ones; finished pages are yielded as soon
+        as everything before them is done.
+        """
+        pending: Deque[Tuple[int, Future]] = deque()
+        try:
+            for pi, page in pages:
+                pending.append(
+                    (pi, self._ex.submit(_parse_listing, pi, page.content, page.encoding))
+                )
+                while pending and (len(pending) >= self.lookahead or pending[0][1].done()):
+                    yield self._collect(*pending.popleft())
+            while pending:
+                yield self._collect(*pending.popleft())
+        finally:
+            for _, fut in pending:
+                fut.cancel()
+
+    def parse_pdp(self, page: RawPage) -> Dict[str, Any]:
+        """parse_pdp in a worker process; blocks the calling thread until done."""
+        return self._ex.submit(_parse_pdp, page.content, page.encoding).result()
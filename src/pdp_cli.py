@@ -1,24 +1,94 @@
 from __future__ import annotations
 
 import argparse
-import json
 import logging
+import sys
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Iterable, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
+from .cache import HTTPCache
 from .fetch import Fetcher
+from .history import PriceHistory
 from .parse_pdp import parse_pdp
+from .parse_pool import ParsePool
+from .ratelimit import format_rate
+from .writer import WRITERS, BackgroundWriter, output_problem
+
+# A URL source may yield IDLE when no URL is ready yet (the listing -> PDP
+# pipeline); scrape_pdps then hands back finished results instead of
+# waiting for the next URL, and asks the source again after IDLE_WAIT.
+IDLE = object()
+IDLE_WAIT = 0.2
 
 
 def build_arg_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(
         description="Trendyol PDP scraper: URL listesi alır, her bir ürün sayfasını parse eder."
     )
-    p.add_argument("--urls", nargs="+", help="Ürün sayfası URL(ler)i", required=True)
-    p.add_argument("--out", type=str, default="pdp.ndjson", help="Çıktı NDJSON dosyası")
+    p.add_argument("--urls", nargs="+", help="Ürün sayfası URL(ler)i")
+    p.add_argument(
+        "--urls-file",
+        type=str,
+        default=None,
+        help="Satır başına bir URL içeren dosya ('-' = stdin); akış olarak okunur",
+    )
+    p.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Eşzamanlı PDP çekme/parse işçisi sayısı",
+    )
+    p.add_argument(
+        "--parse-workers",
+        type=int,
+        default=0,
+        help="Parse için süreç havuzu boyutu (0 = çekme işçilerinde parse et)",
+    )
+    p.add_argument(
+        "--out",
+        type=str,
+        default="pdp.ndjson",
+        help="Çıktı dosyası (.gz/.zst uzantısı sıkıştırarak yazar)",
+    )
+    p.add_argument(
+        "--format",
+        choices=["ndjson", "parquet", "sqlite"],
+        default="ndjson",
+        help="Çıktı formatı (parquet için pyarrow gerekir ve dosya kapanışta yazılır; sqlite ürünleri productId ile günceller)",
+    )
+    p.add_argument(
+        "--history",
+        type=str,
+        default=None,
+        help="Fiyat geçmişi klasörü; her PDP'nin fiyat gözlemi eklenir (numpy gerekir)",
+    )
     p.add_argument(
         "--delay-ms", type=int, default=800, help="İstekler arası gecikme (ms)"
     )
+    p.add_argument(
+        "--max-connections",
+        type=int,
+        default=10,
+        help="Bağlantı havuzundaki en fazla eşzamanlı bağlantı (keep-alive ile yeniden kullanılır)",
+    )
+    p.add_argument(
+        "--http2",
+        action="store_true",
+        help="HTTP/2 kullan (h2 paketi gerekir: pip install httpx[http2])",
+    )
+    p.add_argument(
+        "--cache-dir",
+        type=str,
+        default=None,
+        help="HTTP yanıt önbelleği klasörü (boşsa önbellek kapalı)",
+    )
+    p.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=3600.0,
+        help="Önbellek tazelik süresi (sn); süresi dolanlar ETag/If-Modified-Since ile doğrulanır",
+    )
     p.add_argument(
         "--log-level",
         type=str,
@@ -28,8 +98,100 @@ def build_arg_parser() -> argparse.ArgumentParser:
     return p
 
 
+def iter_urls(urls: Optional[List[str]], urls_file: Optional[str]) -> Iterator[str]:
+    """URLs from argv followed by a file/stdin, read lazily line by line."""
+    for u in urls or []:
+        if u.strip():
+            yield u.strip()
+    if not urls_file:
+        return
+    f = sys.stdin if urls_file == "-" else open(urls_file, "r", encoding="utf-8")
+    try:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def fetch_pdp(
+    fetcher: Fetcher, url: str, parse_pool: Optional[ParsePool] = None
+) -> Dict[str, Any]:
+    if parse_pool is not None:
+        data = parse_pool.parse_pdp(fetcher.get_page_raw(url))
+    else:
+        data = parse_pdp(fetcher.get_page(url))
+    data["sourceUrl"] = url
+    return data
+
+
+def scrape_pdps(
+    fetcher: Fetcher,
+    urls: Iterable[str],
+    workers: int = 4,
+    parse_pool: Optional[ParsePool] = None,
+) -> Iterator[Tuple[str, Optional[Dict[str, Any]], Optional[BaseException]]]:
+    """
+    Fetch+parse PDPs on a bounded thread pool.
+    Yields (url, row, error) in completion order; at most 2*workers URLs are
+    pulled from `urls` ahead of the results, so huge inputs stream through.
+    `urls` may yield IDLE while it has nothing ready (see IDLE above).
+    With a parse_pool the threads only fetch and wait while a worker process
+    parses each page.
+    """
+    workers = max(1, workers)
+    it = iter(urls)
+    pending: Dict[Future, str] = {}
+    exhausted = False
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pdp") as pool:
+
+        def fill() -> None:
+            nonlocal exhausted
+            while not exhausted and len(pending) < workers * 2:
+                url = next(it, None)
+                if url is None:
+                    exhausted = True
+                elif url is IDLE:
+                    return
+                else:
+                    pending[pool.submit(fetch_pdp, fetcher, url, parse_pool)] = url
+
+        fill()
+        try:
+            while pending or not exhausted:
+                # while the source may still produce URLs, wake up now and then
+                # to take them even if nothing finished
+                done, _ = wait(
+                    pending,
+                    timeout=None if exhausted else IDLE_WAIT,
+                    return_when=FIRST_COMPLETED,
+                )
+                for fut in done:
+                    url = pending.pop(fut)
+                    err = fut.exception()
+                    yield url, (None if err else fut.result()), err
+                fill()
+        finally:
+            for fut in pending:
+                fut.cancel()
+
+
 def main(argv: Optional[Iterable[str]] = None) -> int:
-    args = build_arg_parser().parse_args(list(argv) if argv is not None else None)
+    parser = build_arg_parser()
+    args = parser.parse_args(list(argv) if argv is not None else None)
+    if not args.urls and not args.urls_file:
+        parser.error("--urls veya --urls-file gerekli")
+    problem = output_problem(Path(args.out), args.format)
+    if problem:
+        parser.error(problem)
+    history = None
+    if args.history:
+        try:
+            history = PriceHistory(Path(args.history))
+        except RuntimeError as e:
+            parser.error(str(e))
 
     logging.basicConfig(
         level=getattr(logging, args.log_level.upper(), logging.INFO),
@@ -37,23 +199,69 @@ def main(argv: Optional[Iterable[str]] = None) -> int:
     )
     log = logging.getLogger("trendyol.pdp")
 
-    fetcher = Fetcher(delay_ms=args.delay_ms)
+    cache = (
+        HTTPCache(Path(args.cache_dir), ttl=args.cache_ttl) if args.cache_dir else None
+    )
+    fetcher = Fetcher(
+        delay_ms=args.delay_ms,
+        cache=cache,
+        max_connections=args.max_connections,
+        max_keepalive=args.max_connections,
+        http2=args.http2,
+    )
     out_path = Path(args.out)
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
+    parse_pool = ParsePool(args.parse_workers) if args.parse_workers > 0 else None
+
     written = 0
-    with out_path.open("a", encoding="utf-8") as f:
-        for url in args.urls:
-            try:
-                html = fetcher.get_page(url)
-                data = parse_pdp(html)
-                data["sourceUrl"] = url
-                f.write(json.dumps(data, ensure_ascii=False) + "\n")
+    failed = 0
+    urls = iter_urls(args.urls, args.urls_file)
+    writer = BackgroundWriter(WRITERS[args.format](out_path, append=True))
+    try:
+        with fetcher:
+            for url, data, err in scrape_pdps(
+                fetcher, urls, workers=args.workers, parse_pool=parse_pool
+            ):
+                if err is not None:
+                    failed += 1
+                    log.error("Hata: %s: %s", url, err)
+                    continue
+                writer.write_many([data])
+                if history:
+                    history.add_rows([data])
                 written += 1
-                log.info("Yazıldı: %s", url)
-            except Exception as e:
-                log.exception("Hata: %s", url)
-    log.info("Bitti. Toplam yazılan: %d", written)
+                log.info("Yazıldı: %s, rate=%s", url, format_rate(fetcher.current_rate()))
+    finally:
+        # as in cli.py: every step runs even if an earlier one fails
+        # (writer.close() re-raises a writer-thread error), then the first
+        # error is raised unless the scrape itself is failing
+        failing = sys.exc_info()[0] is not None
+        errors: List[BaseException] = []
+
+        def step(fn: Callable[[], Any]) -> None:
+            try:
+                fn()
+            except BaseException as e:
+                errors.append(e)
+
+        step(writer.close)
+        if history:
+            step(history.close)
+        if parse_pool:
+            step(parse_pool.close)
+        if cache:
+            step(cache.close)
+        if errors:
+            if not failing:
+                raise errors[0]
+            for e in errors:
+                log.error("Kapatma hatası: %r", e)
+    log.info("Bitti. Toplam yazılan: %d, hatalı: %d", written, failed)
+    log.info("Yazıcı: %s", writer.stats())
+    log.info("Bağlantı havuzu: %s", fetcher.conn_stats.summary())
+    if cache:
+        log.info("HTTP önbellek: %s", cache.stats.as_dict())
     return 0
 
 
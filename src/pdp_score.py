@@ -4,17 +4,22 @@ import argparse
 import json
 import os
 import time
+from contextlib import closing
 from pathlib import Path
 from typing import Any, Dict, Iterable, Optional
 
 from .analysis.llm_client import call_llm
+from .compress import open_text
+from .writer import NDJSONWriter
 
 
 def build_arg_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(
         description="PDP NDJSON girdisinden ürün başına LLM değerlendirmesi üretir"
     )
-    p.add_argument("--in", dest="inp", required=True, help="PDP NDJSON girdisi")
+    p.add_argument(
+        "--in", dest="inp", required=True, help="PDP NDJSON girdisi (.gz/.zst olabilir)"
+    )
     p.add_argument(
         "--out", dest="out", default="pdp_scored.ndjson", help="Çıktı NDJSON"
     )
@@ -74,9 +79,9 @@ def main(argv: Optional[Iterable[str]] = None) -> int:
     total = 0
     ok = 0
     rate_sleep = max(0, int(args.rate_limit_ms)) / 1000.0
-    with inp.open("r", encoding="utf-8", errors="ignore") as f, out_path.open(
-        "a", encoding="utf-8"
-    ) as w:
+    # .gz/.zst inputs and outputs are (de)compressed transparently
+    w = NDJSONWriter(out_path, append=True)
+    with open_text(inp, errors="ignore") as f, closing(w):
         for line in f:
             line = line.strip()
             if not line:
@@ -95,14 +100,14 @@ def main(argv: Optional[Iterable[str]] = None) -> int:
                     "sourceUrl": prod.get("sourceUrl"),
                     "llm": llm,
                 }
-                w.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                w.write_many([rec])
                 ok += 1
             except Exception as e:
                 err = {
                     "productId": prod.get("productId"),
                     "error": str(e),
                 }
-                w.write(json.dumps(err, ensure_ascii=False) + "\n")
+                w.write_many([err])
             if rate_sleep:
                 time.sleep(rate_sleep)
 
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from pathlib import Path
+from typing import Optional
+
+from .compress import data_suffix
+from .fetch import Fetcher
+from .history import PriceHistory
+from .parse_pool import ParsePool
+from .pdp_cli import IDLE, IDLE_WAIT, scrape_pdps
+from .writer import NDJSONWriter, output_problem
+
+_STOP = object()
+
+
+def pdp_out_problem(path: Path) -> Optional[str]:
+    """Why `path` cannot take the PDP stage's NDJSON rows, or None."""
+    if data_suffix(path) != ".ndjson":
+        return f"--pdp-out NDJSON yazar; .ndjson (.ndjson.gz/.zst) uzantısı kullanın: {path}"
+    return output_problem(path, "ndjson")
+
+
+class PDPPipeline:
+    """
+    Listing -> PDP stage for `cli.py --pdp-out`.
+
+    The listing crawl submits product URLs as pages are written; a consumer
+    thread feeds them through `scrape_pdps` on the same Fetcher (shared pool
+    and rate limiter) and appends PDP rows as they complete. The queue is
+    bounded, so a slow PDP stage throttles the listing crawl instead of
+    buffering URLs without limit.
+    """
+
+    def __init__(
+        self,
+        fetcher: Fetcher,
+        out_path: Path,
+        workers: int = 4,
+        queue_size: int = 200,
+        log: Optional[logging.Logger] = None,
+        parse_pool: Optional[ParsePool] = None,
+        history: Optional[PriceHistory] = None,
+    ) -> None:
+        self.fetcher = fetcher
+        self.history = history
+        self.parse_pool = parse_pool
+        self.out_path = Path(out_path)
+        self.workers = max(1, workers)
+        self.log = log or logging.getLogger("trendyol.pipeline")
+        self.submitted = 0
+        self.written = 0
+        self.failed = 0
+        self._q: "queue.Queue[object]" = queue.Queue(maxsize=max(1, queue_size))
+        self._abort = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name="pdp-pipeline", daemon=True)
+
+    def start(self) -> "PDPPipeline":
+        self.out_path.parent.mkdir(parents=True, exist_ok=True)
+        self._thread.start()
+        return self
+
+    def _urls(self):
+        while True:
+            try:
+                item = self._q.get(timeout=IDLE_WAIT)
+            except queue.Empty:
+                # let scrape_pdps hand back finished pages meanwhile
+                item = IDLE
+            if item is _STOP or self._abort.is_set():
+                return
+            yield item
+
+    def _run(self) -> None:
+        try:
+            # already off the crawl thread, so the plain buffered writer suffices
+            writer = NDJSONWriter(self.out_path, append=True)
+            try:
+                for url, data, err in scrape_pdps(
+                    self.fetcher, self._urls(), self.workers, self.parse_pool
+                ):
+                    if err is not None:
+                        self.failed += 1
+                        self.log.error("PDP hata: %s: %s", url, err)
+                        continue
+                    writer.write_many([data])
+                    if self.history:
+                        self.history.add_rows([data])
+                    self.written += 1
+                    self.log.debug("PDP yazıldı: %s", url)
+                    if self._q.empty():
+                        writer.flush()  # caught up: make the rows visible now
+            finally:
+                writer.close()
+        except BaseException as e:
+            self._error = e
+            self.log.exception("PDP hattı durdu")
+
+    def submit(self, url: str) -> None:
+        """Queue a product URL; blocks while the queue is full (backpressure)."""
+        while True:
+            if self._error is not None:
+                raise RuntimeError("PDP hattı durdu") from self._error
+            try:
+                self._q.put(url, timeout=0.5)
+                self.submitted += 1
+                return
+            except queue.Full:
+                continue
+
+    def close(self, abort: bool = False) -> None:
+        """Finish queued URLs (or drop them when abort=True) and wait for the worker."""
+        if abort:
+            self._abort.set()
+            try:
+                while True:
+                    self._q.get_nowait()
+            except queue.Empty:
+                pass
+        if self._thread.is_alive():
+            self._q.put(_STOP)
+            self._thread.join()
+        if self._error is not None and not abort:
+            raise RuntimeError("PDP hattı durdu") from self._error
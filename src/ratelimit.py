@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+
+# Status codes that mean "slow down" rather than "this URL is broken"
+THROTTLE_STATUSES = {429, 503}
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Return seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        dt = parsedate_to_datetime(value)
+    except Exception:
+        return None
+    if dt is None:
+        return None
+    return max(0.0, dt.timestamp() - (now if now is not None else time.time()))
+
+
+def format_rate(rate: Optional[float]) -> str:
+    """Render a rate for log lines; the job API parses the "rate=<x>/s" form."""
+    return "unlimited" if rate is None else f"{rate:.2f}/s"
+
+
+@dataclass
+class _HostBucket:
+    rate: float
+    tokens: float
+    updated: float
+    cooldown_until: float = 0.0
+    latency_ewma: Optional[float] = None
+    latency_floor: Optional[float] = None
+    throttled: int = 0
+    requests: int = 0
+
+
+@dataclass
+class RateLimiter:
+    """
+    Per-host token bucket with AIMD rate adaptation.
+
+    - Each request takes one token; tokens refill at the host's current rate.
+    - Successful responses add `increase` req/s (additive increase).
+    - 429/503, transport errors and latency spikes multiply the rate by
+      `decrease` (multiplicative decrease). Retry-After pauses the host.
+    Safe to share between threads and between sync and asyncio callers.
+    """
+
+    rate: float = 1.25
+    min_rate: float = 0.1
+    max_rate: float = 10.0
+    burst: float = 1.0
+    increase: float = 0.05
+    decrease: float = 0.5
+    # Latency above latency_factor x the best observed latency counts as congestion
+    latency_factor: float = 3.0
+    _hosts: Dict[str, _HostBucket] = field(default_factory=dict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @classmethod
+    def from_delay_ms(cls, delay_ms: int, **kwargs) -> Optional["RateLimiter"]:
+        """Limiter whose starting rate matches the old fixed delay; None if delay_ms <= 0."""
+        if delay_ms <= 0:
+            return None
+        rate = 1000.0 / delay_ms
+        kwargs.setdefault("max_rate", max(rate * 8, rate))
+        kwargs.setdefault("min_rate", min(rate / 10, rate))
+        return cls(rate=rate, **kwargs)
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return urlparse(url).netloc or url
+
+    def _bucket(self, host: str, now: float) -> _HostBucket:
+        b = self._hosts.get(host)
+        if b is None:
+            b = _HostBucket(rate=self.rate, tokens=self.burst, updated=now)
+            self._hosts[host] = b
+        return b
+
+    def _reserve(self, url: str) -> float:
+        """Take a token for url's host and return how long the caller must wait."""
+        now = time.monotonic()
+        with self._lock:
+            b = self._bucket(self._host(url), now)
+            b.tokens = min(self.burst, b.tokens + (now - b.updated) * b.rate)
+            b.updated = now
+            b.tokens -= 1.0
+            b.requests += 1
+            wait = 0.0 if b.tokens >= 0 else -b.tokens / b.rate
+            return max(wait, b.cooldown_until - now)
+
+    def acquire(self, url: str) -> None:
+        wait = self._reserve(url)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, url: str) -> None:
+        wait = self._reserve(url)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def observe(
+        self,
+        url: str,
+        status: Optional[int],
+        latency: Optional[float] = None,
+        retry_after: Optional[str] = None,
+    ) -> None:
+        """Feed back a response (status None = transport error)."""
+        now = time.monotonic()
+        with self._lock:
+            b = self._bucket(self._host(url), now)
+            slow = False
+            if latency is not None and status is not None:
+                b.latency_floor = (
+                    latency if b.latency_floor is None else min(b.latency_floor, latency)
+                )
+                b.latency_ewma = (
+                    latency
+                    if b.latency_ewma is None
+                    else 0.8 * b.latency_ewma + 0.2 * latency
+                )
+                slow = b.latency_ewma > self.latency_factor * max(b.latency_floor, 0.05)
+
+            if status is None or status in THROTTLE_STATUSES:
+                b.throttled += 1
+                b.rate = max(self.min_rate, b.rate * self.decrease)
+                pause = parse_retry_after(retry_after)
+                if pause is not None:
+                    b.cooldown_until = max(b.cooldown_until, now + pause)
+                # drop any saved-up burst so the slowdown takes effect immediately
+                b.tokens = min(b.tokens, 0.0)
+            elif slow:
+                b.rate = max(self.min_rate, b.rate * (1 - (1 - self.decrease) / 4))
+            elif status < 500:
+                b.rate = min(self.max_rate, b.rate + self.increase)
+
+    def current_rate(self, url_or_host: Optional[str] = None) -> float:
+        """Current rate (req/s) for a host, or the slowest host when omitted."""
+        with self._lock:
+            if url_or_host is None:
+                if not self._hosts:
+                    return self.rate
+                return min(b.rate for b in self._hosts.values())
+            b = self._hosts.get(self._host(url_or_host))
+            return b.rate if b else self.rate
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                host: {
+                    "rate": round(b.rate, 3),
+                    "requests": b.requests,
+                    "throttled": b.throttled,
+                    "latencyMs": round((b.latency_ewma or 0.0) * 1000, 1),
+                }
+                for host, b in self._hosts.items()
+            }
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from .dedupe import make_ids
+from .state import iter_ids_from_output
+
+# Header: magic, output bytes covered by the index, number of sorted ids.
+# The ids follow as native int64: a sorted run, then ids appended since the
+# last compaction in write order.
+_MAGIC = b"TYSEEN1\n"
+_HEADER = struct.Struct("<8sQQ")
+
+
+class RunSeenIds:
+    """
+    SeenIndex stand-in for sinks that upsert (`--format sqlite`): products
+    already in the output are updated, so only repeats within this run are
+    skipped and nothing is persisted.
+    """
+
+    def __init__(self, dedupe: str = "exact", **dedupe_kwargs: Any) -> None:
+        self._ids = make_ids(dedupe, **dedupe_kwargs)
+
+    def __contains__(self, pid: object) -> bool:
+        return pid in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, pid: int) -> None:
+        self._ids.add(pid)
+
+    def memory_report(self) -> Dict[str, Any]:
+        return {
+            "backend": self._ids.kind,
+            "ids": len(self._ids),
+            "tailBytes": self._ids.memory_bytes(),
+        }
+
+    def flush(self, covered: int) -> None:
+        pass
+
+    def sync(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def index_path(out_path: Path) -> Path:
+    """Sidecar index location for an output file (`products.csv.ids`)."""
+    out_path = Path(out_path)
+    return out_path.with_name(out_path.name + ".ids")
+
+
+class SeenIndex:
+    """
+    Persistent set of productIds already in an output file.
+
+    Membership is a binary search over the memory-mapped sorted run plus an
+    in-memory set (`dedupe` backend, see src/dedupe.py) for the appended
+    tail, so opening costs O(index size) with no output parsing. New ids are appended as rows are written together with
+    the output size they cover; on the next start an output that grew past
+    that size is caught up from the tail, and one that shrank (or a missing
+    or corrupt index) is rebuilt from the output.
+    """
+
+    def __init__(self, path: Path, dedupe: str = "exact", **dedupe_kwargs: Any) -> None:
+        self.path = Path(path)
+        self.covered = 0
+        self._sorted_count = 0
+        self._file = self.path.open("r+b")
+        self._mm: Optional[mmap.mmap] = None
+        self._sorted: memoryview = memoryview(b"").cast("q")
+        self._tail = make_ids(dedupe, **dedupe_kwargs)
+        self._tail_count = 0
+        self._pending = array("q")
+        try:
+            self._load()
+        except BaseException:
+            self._file.close()
+            raise
+
+    # Construction
+
+    @staticmethod
+    def _write(path: Path, ids: Iterable[int], covered: int, sorted_count: int) -> None:
+        tmp = path.with_name(path.name + ".tmp")
+        with tmp.open("wb") as f:
+            f.write(_HEADER.pack(_MAGIC, covered, sorted_count))
+            f.write(array("q", ids).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    @classmethod
+    def build(cls, out_path: Path, fmt: str, **kwargs: Any) -> "SeenIndex":
+        """(Re)build the index from the whole output file."""
+        out_path = Path(out_path)
+        covered = out_path.stat().st_size if out_path.exists() else 0
+        ids = sorted(set(iter_ids_from_output(out_path, fmt)))
+        path = index_path(out_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        cls._write(path, ids, covered, len(ids))
+        return cls(path, **kwargs)
+
+    @classmethod
+    def open(
+        cls,
+        out_path: Path,
+        fmt: str,
+        log: Optional[logging.Logger] = None,
+        **kwargs: Any,
+    ) -> "SeenIndex":
+        """
+        Open the sidecar index of out_path, catching up or rebuilding it as needed.
+        kwargs (dedupe, capacity, fp_rate) select the in-memory tail backend.
+        """
+        log = log or logging.getLogger("trendyol.seen")
+        out_path = Path(out_path)
+        size = out_path.stat().st_size if out_path.exists() else 0
+        path = index_path(out_path)
+        idx: Optional[SeenIndex] = None
+        if path.exists():
+            try:
+                idx = cls(path, **kwargs)
+            except ValueError as e:
+                log.warning("Seen index bozuk, yeniden oluşturuluyor: %s (%s)", path, e)
+        if idx is not None and idx.covered > size:
+            log.info("Çıktı index'ten kısa, seen index yeniden oluşturuluyor: %s", path)
+            idx.close()
+            idx = None
+        elif idx is not None and fmt == "parquet" and idx.covered != size:
+            # a rewritten Parquet file cannot be caught up from a byte offset
+            log.info("Parquet çıktısı değişmiş, seen index yeniden oluşturuluyor: %s", path)
+            idx.close()
+            idx = None
+        if idx is None:
+            return cls.build(out_path, fmt, **kwargs)
+        if idx.covered < size:
+            # rows written after the last index update (e.g. crash between the two)
+            for pid in iter_ids_from_output(out_path, fmt, offset=idx.covered):
+                idx.add(pid)
+            idx.flush(size)
+        return idx
+
+    def _load(self) -> None:
+        head = self._file.read(_HEADER.size)
+        if len(head) < _HEADER.size:
+            raise ValueError("kısa başlık")
+        magic, covered, sorted_count = _HEADER.unpack(head)
+        length = os.fstat(self._file.fileno()).st_size - _HEADER.size
+        if magic != _MAGIC or length % 8 or sorted_count * 8 > length:
+            raise ValueError("geçersiz index dosyası")
+        self.covered = covered
+        self._sorted_count = sorted_count
+        if length:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            view = memoryview(self._mm)[_HEADER.size :]
+            self._sorted = view[: sorted_count * 8].cast("q")
+            tail = view[sorted_count * 8 :].cast("q")
+            self._tail.update(tail)
+            self._tail_count = len(tail)
+            tail.release()
+            view.release()
+
+    # Set interface
+
+    def _in_sorted(self, pid: object) -> bool:
+        s = self._sorted
+        i = bisect_left(s, pid)
+        return i < len(s) and s[i] == pid
+
+    def __contains__(self, pid: object) -> bool:
+        return pid in self._tail or self._in_sorted(pid)
+
+    def __len__(self) -> int:
+        return len(self._sorted) + self._tail_count
+
+    def add(self, pid: int) -> None:
+        if self._in_sorted(pid) or not self._tail.add(pid):
+            return
+        self._tail_count += 1
+        self._pending.append(pid)
+
+    def memory_report(self) -> Dict[str, Any]:
+        return {
+            "backend": self._tail.kind,
+            "ids": len(self),
+            "tailIds": self._tail_count,
+            "tailBytes": self._tail.memory_bytes(),
+            # mapped, not heap: paged in on demand and shared with the page cache
+            "mappedBytes": len(self._sorted) * 8,
+        }
+
+    # Persistence
+
+    def flush(self, covered: int) -> None:
+        """Append ids added since the last flush; `covered` = output size they account for."""
+        f = self._file
+        if self._pending:
+            f.seek(0, os.SEEK_END)
+            f.write(self._pending.tobytes())
+            self._pending = array("q")
+        f.seek(0)
+        f.write(_HEADER.pack(_MAGIC, covered, self._sorted_count))
+        f.flush()
+        self.covered = covered
+
+    def sync(self) -> None:
+        os.fsync(self._file.fileno())
+
+    def _release(self) -> None:
+        self._sorted.release()
+        self._sorted = memoryview(b"").cast("q")
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def close(self, compact: bool = True) -> None:
+        """Flush pending ids; merge the appended tail into the sorted run once it is large."""
+        if self._file.closed:
+            return
+        self.flush(self.covered)
+        if compact and self._tail_count > max(4096, self._sorted_count // 8):
+            # the tail backend may not be enumerable (bloom), so merge from the file
+            self._file.seek(_HEADER.size)
+            ids = array("q")
+            ids.frombytes(self._file.read())
+            merged = sorted(ids)
+            self._release()
+            self._write(self.path, merged, self.covered, len(merged))
+            return
+        self._release()
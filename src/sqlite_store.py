@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .columnar import converter, kind_for
+
+# SQLite sink (`--format sqlite`): one `products` row per productId holding
+# its latest scraped state. Columns are added as new row keys appear and typed
+# like the Parquet columns (src/columnar.py); list and nested values are
+# stored as JSON text in columns declared JSON_TEXT (TEXT affinity).
+
+TABLE = "products"
+SUFFIXES = (".sqlite", ".sqlite3", ".db")
+INDEXED_COLUMNS = ("brand", "merchantId", "price")
+JSON_TYPE = "JSON_TEXT"
+
+_SQL_TYPES = {
+    "int64": "INTEGER",
+    "float64": "REAL",
+    "string": "TEXT",
+    "list<string>": JSON_TYPE,
+    "json": JSON_TYPE,
+}
+
+
+def is_sqlite_path(path: Path) -> bool:
+    return Path(path).suffix.lower() in SUFFIXES
+
+
+def _q(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def connect(path: Path, readonly: bool = False) -> sqlite3.Connection:
+    """
+    Open the store. Writers get WAL mode, so readers (dashboard, analysis)
+    are not blocked while a crawl commits; transactions are explicit.
+    """
+    if readonly:
+        conn = sqlite3.connect(f"file:{Path(path)}?mode=ro", uri=True)
+        conn.execute("PRAGMA query_only=ON")
+        return conn
+    # used from the background writer thread after being opened here
+    conn = sqlite3.connect(str(path), isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # commits are durable once sync() fsyncs the WAL (see ProductTable.sync)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {TABLE} "
+        "(productId INTEGER PRIMARY KEY, firstSeenAt TEXT)"
+    )
+    return conn
+
+
+def table_columns(conn: sqlite3.Connection) -> Dict[str, str]:
+    """Column name -> declared type."""
+    return {row[1]: row[2] for row in conn.execute(f"PRAGMA table_info({TABLE})")}
+
+
+class ProductTable:
+    """Upserts rows into the products table of an open connection."""
+
+    def __init__(self, conn: sqlite3.Connection, path: Path) -> None:
+        self.conn = conn
+        self.path = Path(path)
+        self.columns = table_columns(conn)
+        self._sql: Dict[Tuple[str, ...], str] = {}
+        self._ensure_indexes()
+
+    def _ensure_indexes(self) -> None:
+        for col in INDEXED_COLUMNS:
+            if col in self.columns:
+                self.conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_{TABLE}_{col} ON {TABLE}({_q(col)})"
+                )
+
+    def _add_columns(self, rows: Sequence[Dict[str, Any]], keys: Iterable[str]) -> None:
+        added = False
+        for name in keys:
+            if name in self.columns:
+                continue
+            kind = kind_for(name, [r.get(name) for r in rows])
+            sql_type = _SQL_TYPES[kind]
+            self.conn.execute(f"ALTER TABLE {TABLE} ADD COLUMN {_q(name)} {sql_type}")
+            self.columns[name] = sql_type
+            added = True
+        if added:
+            self._ensure_indexes()
+
+    def _upsert_sql(self, keys: Tuple[str, ...]) -> str:
+        sql = self._sql.get(keys)
+        if sql is None:
+            cols = ", ".join(_q(k) for k in keys)
+            marks = ", ".join("?" for _ in keys)
+            # only the keys this row carries are updated; firstSeenAt is kept
+            updates = ", ".join(
+                f"{_q(k)}=excluded.{_q(k)}" for k in keys if k not in ("productId", "firstSeenAt")
+            )
+            action = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+            sql = self._sql[keys] = (
+                f"INSERT INTO {TABLE} ({cols}) VALUES ({marks}) "
+                f"ON CONFLICT(productId) {action}"
+            )
+        return sql
+
+    def _converter(self, name: str):
+        # by declared column type, so text prices become REAL as in Parquet
+        sql_type = self.columns[name]
+        if sql_type == JSON_TYPE:
+            return _json_text
+        return converter({"INTEGER": "int64", "REAL": "float64"}.get(sql_type, "string"))
+
+    def upsert(self, rows: Iterable[Dict[str, Any]]) -> Tuple[int, int]:
+        """
+        Insert or update a batch in one transaction.
+        Returns (rows written, rows skipped for lacking a productId).
+        """
+        groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+        skipped = 0
+        for r in rows:
+            if not isinstance(r.get("productId"), int):
+                skipped += 1
+                continue
+            groups.setdefault(tuple(r), []).append(r)
+        if not groups:
+            return 0, skipped
+        now = datetime.now(timezone.utc).isoformat()
+        written = 0
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            for keys, group in groups.items():
+                self._add_columns(group, keys)
+                convs = [self._converter(k) for k in keys]
+                cols = keys + ("firstSeenAt",)
+                sql = self._upsert_sql(cols)
+                self.conn.executemany(
+                    sql,
+                    (
+                        [c(r[k]) for k, c in zip(keys, convs)]
+                        + [r.get("collectedAt") or now]
+                        for r in group
+                    ),
+                )
+                written += len(group)
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return written, skipped
+
+    def sync(self) -> None:
+        # synchronous=NORMAL leaves the fsync of committed WAL frames to here
+        wal = self.path.with_name(self.path.name + "-wal")
+        try:
+            fd = os.open(wal, os.O_RDONLY)
+        except FileNotFoundError:
+            return
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def _json_text(v: Any) -> Optional[str]:
+    return None if v is None else json.dumps(v, ensure_ascii=False)
+
+
+def file_size(path: Path) -> int:
+    """Database plus WAL size."""
+    path = Path(path)
+    total = 0
+    for p in (path, path.with_name(path.name + "-wal")):
+        try:
+            total += p.stat().st_size
+        except FileNotFoundError:
+            pass
+    return total
+
+
+def count_rows(path: Path) -> int:
+    conn = connect(path, readonly=True)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {TABLE}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def iter_rows(
+    path: Path,
+    columns: Optional[Iterable[str]] = None,
+    limit: Optional[int] = None,
+    where: str = "",
+    params: Sequence[Any] = (),
+    batch_size: int = 10_000,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Rows of the products table with only `columns` selected (unknown names
+    are ignored), fetched in batches; JSON_TEXT columns are decoded back to
+    lists.
+    """
+    conn = connect(path, readonly=True)
+    try:
+        have = table_columns(conn)
+        cols = list(have) if columns is None else [c for c in columns if c in have]
+        if not cols:
+            return
+        sql = f"SELECT {', '.join(_q(c) for c in cols)} FROM {TABLE}"
+        if where:
+            sql += f" WHERE {where}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        json_cols = [i for i, c in enumerate(cols) if have[c] == JSON_TYPE]
+        cur = conn.execute(sql, params)
+        while True:
+            batch = cur.fetchmany(batch_size)
+            if not batch:
+                return
+            for values in batch:
+                if json_cols:
+                    values = list(values)
+                    for i in json_cols:
+                        if values[i] is not None:
+                            values[i] = json.loads(values[i])
+                yield dict(zip(cols, values))
+    finally:
+        conn.close()
+
+
+def read_rows(
+    path: Path,
+    columns: Optional[Iterable[str]] = None,
+    limit: Optional[int] = None,
+    where: str = "",
+    params: Sequence[Any] = (),
+) -> List[Dict[str, Any]]:
+    return list(iter_rows(path, columns, limit, where, params))
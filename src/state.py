@@ -2,11 +2,22 @@ from __future__ import annotations
 
 import csv
 import json
+import os
+import time
 from pathlib import Path
-from typing import Dict, Optional, Set
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set
 
+from .columnar import iter_column
+from .compress import open_read, open_text
 
-def load_checkpoint(path: Path) -> Optional[Dict]:
+
+def journal_path(path: Path) -> Path:
+    """Append-only page log next to a checkpoint snapshot (`scrape.json.journal`)."""
+    path = Path(path)
+    return path.with_name(path.name + ".journal")
+
+
+def _read_snapshot(path: Path) -> Optional[Dict]:
     try:
         if not path.exists():
             return None
@@ -15,36 +26,212 @@ def load_checkpoint(path: Path) -> Optional[Dict]:
         return None
 
 
+def load_checkpoint(path: Path) -> Optional[Dict]:
+    """
+    Snapshot plus any journaled page completions after it.
+
+    Returns the snapshot keys (url, out, format, ...) with nextPage/written
+    brought up to date, `done` = pages finished beyond nextPage and `inFlight`
+    = pages that were being processed when the journal was last flushed.
+    """
+    cp = _read_snapshot(path)
+    if cp is None:
+        return None
+    next_page = int(cp.get("nextPage", 1))
+    written = int(cp.get("written", 0))
+    done = set(cp.get("done") or [])
+    in_flight = set(cp.get("inFlight") or [])
+    jpath = journal_path(path)
+    if jpath.exists():
+        with jpath.open("rb") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    break  # torn last record
+                if "page" in rec:
+                    done.add(int(rec["page"]))
+                    in_flight.discard(int(rec["page"]))
+                    written = int(rec.get("written", written))
+                elif "inFlight" in rec:
+                    in_flight = set(rec["inFlight"])
+    while next_page in done:
+        next_page += 1
+    cp["nextPage"] = next_page
+    cp["written"] = written
+    cp["done"] = sorted(p for p in done if p > next_page)
+    cp["inFlight"] = sorted(p for p in in_flight if p not in done)
+    return cp
+
+
 def save_checkpoint(path: Path, data: Dict) -> None:
+    """Write a checkpoint snapshot atomically (temp file + fsync + rename)."""
+    path = Path(path)
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        f.write(json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class CheckpointJournal:
+    """
+    Batched, crash-safe progress tracking for the listing crawl.
+
+    Page completions are appended to `journal_path(path)` and fsynced every
+    `every_pages` pages or `every_seconds` seconds, whichever comes first;
+    `before_flush` runs first so output rows are durable before the journal
+    vouches for them. Every `compact_every` records (and on close) the state
+    is folded into the snapshot, written atomically, and the journal is
+    truncated. Pages handed out but not finished are recorded as in-flight.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        meta: Dict,
+        next_page: int = 1,
+        written: int = 0,
+        done: Iterable[int] = (),
+        every_pages: int = 1,
+        every_seconds: float = 0.0,
+        compact_every: int = 200,
+        before_flush: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self.path = Path(path)
+        self.meta = dict(meta)
+        self.next_page = next_page
+        self.written = written
+        self.done: Set[int] = {p for p in done if p > next_page}
+        self.in_flight: Set[int] = set()
+        self.every_pages = max(1, every_pages)
+        self.every_seconds = every_seconds
+        self.compact_every = max(1, compact_every)
+        self.before_flush = before_flush
+        self.flushes = 0
+        self._pending: List[Dict] = []
+        self._in_flight_logged: Set[int] = set()
+        self._journaled = 0
+        self._last_flush = time.monotonic()
+        self._journal = None
+        self.compact()
+
+    def snapshot(self) -> Dict:
+        return {
+            **self.meta,
+            "nextPage": self.next_page,
+            "written": self.written,
+            "done": sorted(self.done),
+            "inFlight": sorted(self.in_flight),
+        }
+
+    def start(self, page: int) -> None:
+        self.in_flight.add(page)
+
+    def page_done(self, page: int, written: int) -> None:
+        self.in_flight.discard(page)
+        self.written = written
+        if page >= self.next_page:
+            self.done.add(page)
+            while self.next_page in self.done:
+                self.done.discard(self.next_page)
+                self.next_page += 1
+        self._pending.append({"page": page, "written": written})
+        if len(self._pending) >= self.every_pages or (
+            self.every_seconds > 0
+            and time.monotonic() - self._last_flush >= self.every_seconds
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending and self.in_flight == self._in_flight_logged:
+            return
+        if self.before_flush:
+            self.before_flush()
+        records = self._pending
+        if self.in_flight != self._in_flight_logged:
+            records = records + [{"inFlight": sorted(self.in_flight)}]
+            self._in_flight_logged = set(self.in_flight)
+        if self._journal is None:
+            self._journal = journal_path(self.path).open("ab")
+        self._journal.write(
+            b"".join(json.dumps(r, separators=(",", ":")).encode() + b"\n" for r in records)
+        )
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._journaled += len(records)
+        self._pending = []
+        self._last_flush = time.monotonic()
+        self.flushes += 1
+        if self._journaled >= self.compact_every:
+            self.compact()
+
+    def compact(self) -> None:
+        """Fold everything into the snapshot and start an empty journal."""
+        save_checkpoint(self.path, self.snapshot())
+        if self._journal is not None:
+            self._journal.close()
+        self._journal = journal_path(self.path).open("wb")
+        self._journaled = 0
+
+    def close(self) -> None:
+        if self._journal is None:
+            return
+        self.flush()
+        self.compact()
+        self._journal.close()
+        self._journal = None
+
+
+def iter_ids_from_output(path: Path, fmt: str, offset: int = 0) -> Iterator[int]:
+    """
+    productIds in an output file, starting at byte `offset` (a row boundary).
+    For CSV the header is always taken from the start of the file. Parquet
+    has no row boundaries in bytes: only the productId column is read, and
+    always from the start.
+    """
+    if not path.exists():
+        return
+    # .gz/.zst outputs are decompressed on the fly; offsets are flush boundaries
+    if fmt == "parquet":
+        if offset:
+            raise ValueError("parquet çıktısı bayt konumundan okunamaz")
+        for pid in iter_column(path, "productId"):
+            if isinstance(pid, int):
+                yield pid
+    elif fmt == "ndjson":
+        with open_read(path, offset) as raw:
+            for line in raw:
+                try:
+                    obj = json.loads(line)
+                    pid = obj.get("productId")
+                    if isinstance(pid, int):
+                        yield pid
+                except Exception:
+                    continue
+    else:  # csv
+        with open_text(path, newline="") as f:
+            header = next(csv.reader(f), None)
+        if not header:
+            return
+        with open_text(path, offset, newline="") as f:
+            if not offset:
+                f.readline()
+            for row in csv.DictReader(f, fieldnames=header):
+                pid = row.get("productId")
+                try:
+                    if pid is not None and str(pid).strip() != "":
+                        yield int(str(pid))
+                except Exception:
+                    continue
 
 
 def read_seen_ids_from_output(path: Path, fmt: str) -> Set[int]:
     seen: Set[int] = set()
-    if not path.exists():
-        return seen
     try:
-        if fmt == "ndjson":
-            with path.open("r", encoding="utf-8") as f:
-                for line in f:
-                    try:
-                        obj = json.loads(line)
-                        pid = obj.get("productId")
-                        if isinstance(pid, int):
-                            seen.add(pid)
-                    except Exception:
-                        continue
-        else:  # csv
-            with path.open("r", encoding="utf-8", newline="") as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    pid = row.get("productId")
-                    try:
-                        if pid is not None and str(pid).strip() != "":
-                            seen.add(int(str(pid)))
-                    except Exception:
-                        continue
+        seen.update(iter_ids_from_output(path, fmt))
     except Exception:
         # Best-effort
         pass
@@ -171,6 +171,8 @@ async function startAnalysis(e) {
     }
     return;
   }
+  const data = await res.json();
+  if (data.cached) toast("Aynı analiz önbellekte bulundu");
   refreshRecentAnalysis();
   if (btn) {
     btn.disabled = false;
@@ -591,13 +593,17 @@ async function previewPDP() {
   }
 }
 
+// x.ndjson -> x-scored.ndjson, keeping a .gz/.zst suffix
+function scoredPath(base) {
+  if (/-scored\.ndjson(\.gz|\.zst)?$/i.test(base)) return base;
+  return base.replace(/\.ndjson(\.gz|\.zst)?$/i, "-scored.ndjson$1");
+}
+
 async function startPDPScore() {
   const sel = document.getElementById("pdp-select");
   if (!sel || !sel.value) return toast("PDP dosyası seçin", "danger");
   const base = sel.value;
-  const out = base.endsWith("-scored.ndjson")
-    ? base
-    : base.replace(/\.ndjson$/i, "-scored.ndjson");
+  const out = scoredPath(base);
   const body = { inp: base, out };
   const res = await fetch("/api/pdp/score", {
     method: "POST",
@@ -612,9 +618,10 @@ function renderPDPTable(tbody, items) {
   tbody.innerHTML = "";
   for (const it of items) {
     const tr = document.createElement("tr");
+    const amount = it.priceKurus != null ? it.priceKurus / 100 : it.price;
     const price =
-      it.price != null
-        ? Number(it.price).toLocaleString("tr-TR", {
+      amount != null
+        ? Number(amount).toLocaleString("tr-TR", {
             style: "currency",
             currency: "TRY",
           })
@@ -667,9 +674,7 @@ async function previewPDPScored() {
   if (!sel || (!out && !tbody)) return;
   const base = sel.value;
   if (!base) return toast("Önce bir PDP dosyası seçin", "danger");
-  const scored = base.endsWith("-scored.ndjson")
-    ? base
-    : base.replace(/\.ndjson$/i, "-scored.ndjson");
+  const scored = scoredPath(base);
   if (out) out.textContent = "Yükleniyor...";
   try {
     const res = await fetch(
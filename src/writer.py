@@ -1,37 +1,188 @@
 from __future__ import annotations
 
 import csv
+import io
+import itertools
 import json
+import logging
+import os
+import queue
+import threading
+import time
 from dataclasses import asdict
 from pathlib import Path
-from typing import Dict, Iterable, List, Any
+from typing import Callable, Dict, Iterable, List, Any, Optional
+
+from . import columnar, sqlite_store
+from .compress import codec_of, open_text, open_write, repair_frames, require_codec
+
+try:  # optional: several times faster than json.dumps per row
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+# Output files are opened with a large buffer so rows reach the OS in a few
+# big writes instead of one per row.
+BUFFER_SIZE = 1 << 20
+
+
+def _dumps_json(row: Dict[str, Any]) -> bytes:
+    return json.dumps(row, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def _dumps_orjson(row: Dict[str, Any]) -> bytes:
+    try:
+        return orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE)
+    except TypeError:
+        # e.g. ints beyond 64 bits or non-str keys; the stdlib encoder copes
+        return _dumps_json(row)
+
+
+dumps_row: Callable[[Dict[str, Any]], bytes] = (
+    _dumps_orjson if orjson is not None else _dumps_json
+)
+
+
+def repair_torn_tail(path: Path, block: int = 64 * 1024) -> int:
+    """
+    Truncate a partial last line (a crash mid-write) so appends start on a row
+    boundary. Returns the number of bytes dropped. Compressed outputs are cut
+    after their last complete member/frame instead.
+    """
+    path = Path(path)
+    if not path.exists():
+        return 0
+    if codec_of(path):
+        return repair_frames(path)
+    with path.open("r+b") as f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return 0
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return 0
+        keep = 0
+        pos = size
+        while pos > 0:
+            start = max(0, pos - block)
+            f.seek(start)
+            i = f.read(pos - start).rfind(b"\n")
+            if i != -1:
+                keep = start + i + 1
+                break
+            pos = start
+        f.truncate(keep)
+        return size - keep
+
+
+_COMPRESSED_PARQUET = "parquet çıktısı zaten sıkıştırılır; .gz/.zst uzantısı kullanmayın"
+
+
+def output_problem(path: Path, fmt: str) -> Optional[str]:
+    """Why `path` cannot be written as `fmt` in this environment, or None."""
+    if codec_of(path) and fmt in ("parquet", "sqlite"):
+        return _COMPRESSED_PARQUET if fmt == "parquet" else "sqlite çıktısı sıkıştırılamaz"
+    try:
+        if fmt == "parquet":
+            columnar.require_pyarrow()
+        require_codec(path)
+    except RuntimeError as e:
+        return str(e)
+    return None
 
 
 class BaseWriter:
+    # bytes dropped from a torn last line when opened with append=True
+    repaired_bytes = 0
+    # rows reach the output file as they are written (False: only on close)
+    incremental = True
+    # rows update earlier rows with the same productId instead of adding to them
+    upserts = False
+
+    def __init__(self) -> None:
+        self.rows = 0
+        self.bytes = 0
+        self._started = time.monotonic()
+
     def write_many(self, rows: Iterable[Dict[str, Any]]) -> None:
         raise NotImplementedError
 
+    def flush(self) -> None:
+        pass
+
+    def sync(self) -> None:
+        """Flush and fsync, so rows covered by a checkpoint survive a crash."""
+        self.flush()
+        file = getattr(self, "file", None)
+        if file is not None:
+            os.fsync(file.fileno())
+
+    def stats(self) -> Dict[str, float]:
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        return {
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "rowsPerSec": round(self.rows / elapsed, 1),
+            "bytesPerSec": round(self.bytes / elapsed, 1),
+        }
+
     def close(self) -> None:
         pass
 
 
 class CSVWriter(BaseWriter):
-    def __init__(self, path: Path) -> None:
+    def __init__(self, path: Path, append: bool = False) -> None:
+        super().__init__()
         self.path = Path(path)
-        self.file = self.path.open("w", newline="", encoding="utf-8")
-        self.writer = None
         self.fieldnames: List[str] = []
+        # keys of written rows missing from an appended file's header
+        self.dropped: set = set()
+        self._buf = io.StringIO()
+        self._csv = csv.writer(self._buf)
+        if append:
+            self.repaired_bytes = repair_torn_tail(self.path)
+            if self.path.exists():
+                with open_text(self.path, newline="") as f:
+                    # keep the existing column order; new keys cannot be added mid-file
+                    self.fieldnames = next(csv.reader(f), None) or []
+        # .gz/.zst paths compress transparently (src/compress.py)
+        self.file = open_write(self.path, append, buffering=BUFFER_SIZE)
 
     def write_many(self, rows: Iterable[Dict[str, Any]]) -> None:
-        rows = list(rows)
-        if not rows:
-            return
-        if not self.writer:
-            self.fieldnames = list(rows[0].keys())
-            self.writer = csv.DictWriter(self.file, fieldnames=self.fieldnames)
-            self.writer.writeheader()
-        for r in rows:
-            self.writer.writerow({k: ("" if v is None else v) for k, v in r.items()})
+        it = iter(rows)
+        if not self.fieldnames:
+            first = next(it, None)
+            if first is None:
+                return
+            self.fieldnames = list(first.keys())
+            self._csv.writerow(self.fieldnames)
+            it = itertools.chain((first,), it)
+        keys = self.fieldnames
+        known = set(keys)
+        n = 0
+        for r in it:
+            missing = r.keys() - known
+            if missing and not missing <= self.dropped:
+                self.dropped |= missing
+                logging.getLogger("trendyol.writer").warning(
+                    "CSV başlığında olmayan sütunlar yazılmıyor: %s (%s); "
+                    "eski dosyalar `python -m src.migrate` ile güncellenebilir",
+                    ", ".join(sorted(missing)),
+                    self.path,
+                )
+            # a list in header order instead of a cleaned-up dict per row
+            self._csv.writerow(["" if (v := r.get(k)) is None else v for k in keys])
+            n += 1
+        data = self._buf.getvalue().encode("utf-8")
+        self._buf.seek(0)
+        self._buf.truncate()
+        if data:
+            self.file.write(data)
+        self.rows += n
+        self.bytes += len(data)
+
+    def flush(self) -> None:
+        self.file.flush()
 
     def close(self) -> None:
         try:
@@ -42,13 +193,24 @@ class CSVWriter(BaseWriter):
 
 
 class NDJSONWriter(BaseWriter):
-    def __init__(self, path: Path) -> None:
+    def __init__(self, path: Path, append: bool = False) -> None:
+        super().__init__()
         self.path = Path(path)
-        self.file = self.path.open("w", encoding="utf-8")
+        if append:
+            self.repaired_bytes = repair_torn_tail(self.path)
+        self.file = open_write(self.path, append, buffering=BUFFER_SIZE)
 
     def write_many(self, rows: Iterable[Dict[str, Any]]) -> None:
-        for r in rows:
-            self.file.write(json.dumps(r, ensure_ascii=False) + "\n")
+        chunk = [dumps_row(r) for r in rows]
+        if not chunk:
+            return
+        data = b"".join(chunk)
+        self.file.write(data)
+        self.rows += len(chunk)
+        self.bytes += len(data)
+
+    def flush(self) -> None:
+        self.file.flush()
 
     def close(self) -> None:
         try:
@@ -56,3 +218,221 @@ class NDJSONWriter(BaseWriter):
                 self.file.close()
         except Exception:
             pass
+
+
+class ParquetWriter(BaseWriter):
+    """
+    Parquet output with typed columns (src/columnar.py).
+
+    Rows are buffered and written as one row group per `row_group_rows` rows.
+    The file is assembled in `<out>.partial` and renamed over the output on
+    close, so a crash leaves the previous output intact. Parquet files cannot
+    be appended to in place: with append=True the existing row groups are
+    copied into the new file first.
+    """
+
+    incremental = False
+
+    def __init__(
+        self,
+        path: Path,
+        append: bool = False,
+        row_group_rows: int = columnar.ROW_GROUP_ROWS,
+    ) -> None:
+        super().__init__()
+        self._pq = columnar.require_pyarrow()
+        self.path = Path(path)
+        if codec_of(self.path):
+            raise ValueError(_COMPRESSED_PARQUET)
+        self.partial = self.path.with_name(self.path.name + ".partial")
+        self.row_group_rows = max(1, row_group_rows)
+        self._buf: List[Dict[str, Any]] = []
+        self._schema = None
+        self._writer = None
+        self._existing = None
+        self._closed = False
+        if append and self.path.exists() and self.path.stat().st_size:
+            self._existing = self._pq.ParquetFile(str(self.path))
+            self._schema = self._existing.schema_arrow
+
+    def _open(self) -> None:
+        self._writer = self._pq.ParquetWriter(
+            str(self.partial),
+            self._schema,
+            compression="zstd",
+            use_dictionary=[
+                c for c in columnar.DICTIONARY_COLUMNS if c in self._schema.names
+            ],
+        )
+        if self._existing is not None:
+            for i in range(self._existing.num_row_groups):
+                self._writer.write_table(self._existing.read_row_group(i))
+            self._existing.close()
+            self._existing = None
+
+    def _write_group(self, rows: List[Dict[str, Any]]) -> None:
+        if self._schema is None:
+            self._schema = columnar.schema_for(rows)
+        if self._writer is None:
+            self._open()
+        self._writer.write_table(columnar.rows_to_table(rows, self._schema))
+        self.bytes = os.path.getsize(self.partial)
+
+    def write_many(self, rows: Iterable[Dict[str, Any]]) -> None:
+        n = len(self._buf)
+        self._buf.extend(rows)
+        self.rows += len(self._buf) - n
+        size = self.row_group_rows
+        if len(self._buf) >= size:
+            full = len(self._buf) - len(self._buf) % size
+            for i in range(0, full, size):
+                self._write_group(self._buf[i : i + size])
+            del self._buf[:full]
+
+    def sync(self) -> None:
+        # nothing is durable before close() writes the footer and renames
+        pass
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self._buf:
+            self._write_group(self._buf)
+            self._buf = []
+        if self._writer is None:
+            if self._existing is not None:
+                self._existing.close()
+                return  # nothing new; the existing file stays as it is
+            import pyarrow as pa
+
+            self._writer = self._pq.ParquetWriter(str(self.partial), pa.schema([]))
+        self._writer.close()
+        with self.partial.open("rb") as f:
+            os.fsync(f.fileno())
+        os.replace(self.partial, self.path)
+        self.bytes = self.path.stat().st_size
+
+
+class SQLiteWriter(BaseWriter):
+    """
+    SQLite output holding the latest row per productId (src/sqlite_store.py).
+
+    Each write_many (one listing page) is a single transaction that upserts
+    the batch, so products seen again are updated in place rather than
+    duplicated or skipped. The database is always opened as is, without
+    truncation; rows without a productId are counted in `skipped`.
+    """
+
+    upserts = True
+
+    def __init__(self, path: Path, append: bool = False) -> None:
+        super().__init__()
+        self.path = Path(path)
+        self.skipped = 0
+        self.conn = sqlite_store.connect(self.path)
+        self.table = sqlite_store.ProductTable(self.conn, self.path)
+
+    def write_many(self, rows: Iterable[Dict[str, Any]]) -> None:
+        written, skipped = self.table.upsert(rows)
+        self.rows += written
+        self.skipped += skipped
+        self.bytes = sqlite_store.file_size(self.path)
+
+    def sync(self) -> None:
+        self.table.sync()
+
+    def stats(self) -> Dict[str, float]:
+        return {**super().stats(), "skipped": self.skipped}
+
+    def close(self) -> None:
+        try:
+            # the last connection to close folds the WAL back into the database
+            self.conn.close()
+        except Exception:
+            pass
+
+
+WRITERS = {
+    "csv": CSVWriter,
+    "ndjson": NDJSONWriter,
+    "parquet": ParquetWriter,
+    "sqlite": SQLiteWriter,
+}
+
+
+_STOP = object()
+
+
+class BackgroundWriter(BaseWriter):
+    """
+    Runs another writer's write_many on a background thread.
+
+    write_many only hands the batch to a bounded queue (blocking when
+    `max_pending` batches are waiting, so a slow disk throttles the crawl
+    instead of buffering without limit); serialization and file writes happen
+    on the writer thread. flush()/sync() first wait for the queue to drain, so
+    afterwards the file size covers every row handed in. An error on the
+    writer thread is re-raised by the next call.
+    """
+
+    def __init__(self, inner: BaseWriter, max_pending: int = 64) -> None:
+        self.inner = inner
+        self._q: "queue.Queue[object]" = queue.Queue(maxsize=max(1, max_pending))
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name="writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def repaired_bytes(self) -> int:  # type: ignore[override]
+        return self.inner.repaired_bytes
+
+    @property
+    def incremental(self) -> bool:  # type: ignore[override]
+        return self.inner.incremental
+
+    @property
+    def upserts(self) -> bool:  # type: ignore[override]
+        return self.inner.upserts
+
+    def _run(self) -> None:
+        while True:
+            item = self._q.get()
+            try:
+                if item is _STOP:
+                    return
+                if self._error is None:
+                    self.inner.write_many(item)  # type: ignore[arg-type]
+            except BaseException as e:
+                self._error = e
+            finally:
+                self._q.task_done()
+
+    def _check(self) -> None:
+        if self._error is not None:
+            raise RuntimeError("Yazıcı iş parçacığı durdu") from self._error
+
+    def write_many(self, rows: Iterable[Dict[str, Any]]) -> None:
+        self._check()
+        # a private list: the caller may reuse its own after this returns
+        self._q.put(list(rows))
+
+    def flush(self) -> None:
+        self._q.join()
+        self._check()
+        self.inner.flush()
+
+    def sync(self) -> None:
+        self._q.join()
+        self._check()
+        self.inner.sync()
+
+    def stats(self) -> Dict[str, float]:
+        return self.inner.stats()
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._q.put(_STOP)
+            self._thread.join()
+        self.inner.close()
+        self._check()
@@ -5,3 +5,66 @@ import sys
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+
+def listing_html(page: int, per_page: int = 2) -> str:
+    cards = "".join(
+        f'<div class="p-card-wrppr" data-id="{page * 100 + i}">'
+        f'<a class="p-card-chldrn-cntnr" href="/x/y-p-{page * 100 + i}?merchantId=7"></a>'
+        f'<span class="prdct-desc-cntnr-name">Ürün {page}-{i}</span>'
+        f'<div class="price-item">{page * 10 + i},90 TL</div></div>'
+        for i in range(per_page)
+    )
+    return f"<html><body>{cards}</body></html>"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real site
+
+    def do_GET(self):  # noqa: N802
+        srv = self.server
+        u = urlparse(self.path)
+        page = int((parse_qs(u.query).get("pi") or ["1"])[0])
+        with srv.lock:
+            srv.hits.append(page)
+        status, headers, body = srv.respond(page, self)
+        data = body.encode("utf-8")
+        self.send_response(status)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_site():
+    """Local stand-in for the listing site. Tests may override `respond`."""
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    srv.daemon_threads = True
+    srv.lock = threading.Lock()
+    srv.hits = []
+    srv.respond = lambda page, req: (
+        200,
+        {},
+        listing_html(page) if page <= srv.last_page else "<html></html>",
+    )
+    srv.last_page = 5
+    srv.base_url = f"http://127.0.0.1:{srv.server_address[1]}/sr?wc=1"
+    t = threading.Thread(target=srv.serve_forever, daemon=True)
+    t.start()
+    try:
+        yield srv
+    finally:
+        srv.shutdown()
+        srv.server_close()
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import json
+import math
+import random
+
+import numpy as np
+import pytest
+
+# src/analysis/pricing.py is required by the engine and by analyze.py
+pytest.importorskip("src.analysis.pricing")
+
+from src import analyze  # noqa: E402
+from src.analysis import engine  # noqa: E402
+from src.analysis.pricing import commission_amount, normalize_tiers, profit, shipping_fee  # noqa: E402
+
+
+def test_columns_match_scalar_functions():
+    rng = random.Random(0)
+    prices = [149.99, 150.0, 299.99, 300.0, 0.0] + [rng.uniform(0, 600) for _ in range(500)]
+    arr = np.array(prices + [float("nan")])
+    for tiers in (
+        normalize_tiers([(150.0, 42.70), (300.0, 72.20)]),
+        normalize_tiers([(150.0, 42.70), (300.0, 72.20), (None, 90.0)]),
+    ):
+        cols = engine.evaluate(arr, 80.0, 12.0, tiers)
+        for i, p in enumerate(prices):
+            assert cols["shippingFee"][i] == shipping_fee(p, tiers)
+            assert math.isclose(cols["commissionFee"][i], commission_amount(p, 12.0))
+            assert math.isclose(cols["profit"][i], profit(p, 80.0, 12.0, tiers), abs_tol=1e-9)
+            assert cols["profitable"][i] == (profit(p, 80.0, 12.0, tiers) > 0)
+        assert math.isnan(cols["profit"][-1]) and not cols["profitable"][-1]
+
+
+def test_analyze_report(tmp_path):
+    inp = tmp_path / "in.ndjson"
+    rows = [
+        {"productId": 1, "price": "200 TL", "priceKurus": 20000},
+        {"productId": 2, "price": "1.150,90 TL"},  # file from older parsers
+        {"productId": 3, "price": None},
+    ]
+    inp.write_text("".join(json.dumps(r) + "\n" for r in rows), encoding="utf-8")
+    out = tmp_path / "out"
+    assert analyze.main(
+        ["--in", str(inp), "--commission", "10", "--default-cost", "100", "--out-dir", str(out)]
+    ) == 0
+    report = json.loads(next(out.glob("analysis-*.json")).read_text(encoding="utf-8"))
+    assert report["count"] == 3
+    assert report["priceStats"]["50.0"] == (200 + 1150.9) / 2
+    items = report["itemsEvaluated"]
+    assert [it["productId"] for it in items] == [1, 2]
+    assert items[0]["profit"] == round(200 - 72.20 - 20 - 100, 2)
+    assert items[0]["profitable"] is True
+
+
+def test_stream_mode_matches_batch_totals(tmp_path):
+    import gzip
+
+    rng = random.Random(3)
+    rows = [{"productId": i, "priceKurus": rng.randint(5_000, 60_000)} for i in range(2_000)]
+    rows[5] = {"productId": 5, "price": "x"}
+    inp = tmp_path / "in.ndjson.gz"
+    with gzip.open(inp, "wt", encoding="utf-8") as f:
+        f.writelines(json.dumps(r) + "\n" for r in rows)
+    reports = {}
+    for mode in ("batch", "stream"):
+        out = tmp_path / mode
+        args = ["--in", str(inp), "--commission", "12", "--default-cost", "150", "--out-dir", str(out)]
+        if mode == "stream":
+            args += ["--stream", "--chunk-rows", "300"]
+        assert analyze.main(args) == 0
+        reports[mode] = json.loads(next(out.glob("analysis-*.json")).read_text(encoding="utf-8"))
+    batch, stream = reports["batch"], reports["stream"]
+    assert stream["count"] == batch["count"] == 2_000
+    assert stream["profitTotals"] == batch["profitTotals"]
+    assert stream["profitTotals"]["pricedCount"] == 1_999
+    assert stream["itemsEvaluated"] == batch["itemsEvaluated"]
+    err = stream["priceStatsError"]
+    assert err["method"] == "kll" and err["rankError"] > 0
+    for p, (lo, hi) in err["bounds"].items():
+        assert lo <= batch["priceStats"][p] <= hi
+
+
+def test_parse_grid():
+    from src.analysis.scenarios import parse_grid
+
+    assert parse_grid("12") == [12.0]
+    assert parse_grid("5, 10:20:5,10") == [5.0, 10.0, 15.0, 20.0]
+    assert parse_grid("0.1:0.3:0.1") == [0.1, 0.2, 0.3]
+
+
+def test_scenario_grid_matches_single_runs(tmp_path):
+    rng = random.Random(4)
+    rows = [{"productId": i, "priceKurus": rng.randint(5_000, 60_000)} for i in range(3_000)]
+    inp = tmp_path / "in.ndjson"
+    inp.write_text("".join(json.dumps(r) + "\n" for r in rows), encoding="utf-8")
+    tables = ['[{"up_to":150,"fee":42.7},{"up_to":300,"fee":72.2}]', '[{"up_to":200,"fee":30}]']
+
+    def run(out, commission, cost, tiers, *extra):
+        args = ["--in", str(inp), "--commission", commission, "--default-cost", cost]
+        args += [a for t in tiers for a in ("--tiers", t)] + ["--out-dir", str(out), *extra]
+        assert analyze.main(args) == 0
+        return json.loads(next(out.glob("analysis-*.json")).read_text(encoding="utf-8"))
+
+    for extra in ([], ["--stream", "--chunk-rows", "700"]):
+        out = tmp_path / f"grid{len(extra)}"
+        report = run(out, "10:14:2", "80,150", tables, *extra)
+        sc = report["scenarios"]
+        assert len(sc["rows"]) == 2 * 3 * 2 and sc["pricedCount"] == 3_000
+        for row in sc["rows"]:
+            r = dict(zip(sc["columns"], row))
+            single = run(
+                tmp_path / f"single{len(extra)}-{r['tiers']}-{r['commissionPercent']}-{r['defaultCost']}",
+                str(r["commissionPercent"]),
+                str(r["defaultCost"]),
+                [tables[r["tiers"]]],
+            )
+            assert "scenarios" not in single
+            totals = single["profitTotals"]
+            assert r["profitableCount"] == totals["profitableCount"]
+            assert math.isclose(r["profitSum"], totals["profitSum"], abs_tol=0.05)
+            assert r["breakEven"] == single["breakEven"] and r["ladder"] == single["ladder"]
+
+
+def test_group_by_and_top_k(tmp_path):
+    import csv
+    from collections import defaultdict
+
+    rng = random.Random(5)
+    rows = [
+        {
+            "productId": i,
+            "name": f"Ürün {i}",
+            "brand": rng.choice(["A", "B", "C", None]),
+            "merchantId": rng.randint(1, 40),
+            "badges": rng.sample(["Kargo Bedava", "Hızlı Teslimat", "Çok Satan"], rng.randint(0, 2)),
+            "priceKurus": rng.randint(5_000, 60_000),
+            "soldLast3Days": rng.randint(0, 500),
+            "favoritedCount": rng.randint(0, 10_000),
+        }
+        for i in range(1_500)
+    ]
+    (tmp_path / "in.ndjson").write_text(
+        "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in rows), encoding="utf-8"
+    )
+    with open(tmp_path / "in.csv", "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=list(rows[0]))
+        w.writeheader()
+        w.writerows(rows)  # badges as their Python repr, like CSVWriter
+
+    reports = []
+    for fmt, extra in (("ndjson", []), ("ndjson", ["--stream", "--chunk-rows", "200"]), ("csv", [])):
+        out = tmp_path / f"out{len(reports)}"
+        args = ["--in", str(tmp_path / f"in.{fmt}"), "--format", fmt, "--commission", "12"]
+        args += ["--default-cost", "120", "--group-limit", "100", "--top-k", "5", "--out-dir", str(out)]
+        assert analyze.main(args + extra) == 0
+        reports.append(json.loads(next(out.glob("analysis-*.json")).read_text(encoding="utf-8")))
+    batch = reports[0]
+    for other in reports[1:]:
+        for key, g in other["groups"].items():
+            # counts and sums are exact; quantiles are checked below
+            assert [row[:5] for row in g["rows"]] == [row[:5] for row in batch["groups"][key]["rows"]]
+        for metric in ("profit", "soldLast3Days", "favoritedCount"):
+            assert [it["value"] for it in other["topProducts"][metric]] == [
+                it["value"] for it in batch["topProducts"][metric]
+            ]
+
+    tiers = normalize_tiers([(150.0, 42.70), (300.0, 72.20)])
+    expected = defaultdict(lambda: defaultdict(lambda: [0, 0, 0, []]))
+    for r in rows:
+        price = r["priceKurus"] / 100
+        for key, values in (("brand", [r["brand"]]), ("merchantId", [r["merchantId"]]), ("badges", r["badges"])):
+            for v in values:
+                if v is None:
+                    continue
+                g = expected[key][v]
+                g[0] += 1
+                g[1] += profit(price, 120.0, 12.0, tiers) > 0
+                g[2] += r["soldLast3Days"]
+                g[3].append(price)
+    for key, groups in expected.items():
+        report = batch["groups"][key]
+        assert report["groupCount"] == len(groups)
+        counts = [row[1] for row in report["rows"]]
+        assert counts == sorted(counts, reverse=True)
+        for row in report["rows"]:
+            r = dict(zip(report["columns"], row))
+            count, profitable, sold, prices = groups[r["key"]]
+            assert (r["count"], r["soldLast3DaysSum"]) == (count, sold)
+            assert r["profitableShare"] == round(profitable / count, 4)
+            # per-group sketches are exact until a group outgrows them
+            ordered = sorted(prices)
+            assert abs(np.searchsorted(ordered, r["priceP50"]) / count - 0.5) <= batch["groupPriceRankError"] + 1 / count
+    assert batch["groups"]["boutiqueId"] == {"groupCount": 0, "columns": report["columns"], "rows": []}
+
+    top = batch["topProducts"]["favoritedCount"]
+    best = sorted(rows, key=lambda r: (-r["favoritedCount"], r["productId"]))[:5]
+    assert [it["productId"] for it in top] == [r["productId"] for r in best]
+    assert [it["value"] for it in top] == [r["favoritedCount"] for r in best]
+
+
+def test_identical_runs_reuse_the_stored_result(tmp_path, capsys):
+    inp = tmp_path / "in.ndjson"
+    inp.write_text("".join(json.dumps({"productId": i, "priceKurus": 10_000 + i}) + "\n" for i in range(50)))
+    out = tmp_path / "out"
+
+    def run(*extra, commission="12"):
+        args = ["--in", str(inp), "--commission", commission, "--default-cost", "80", "--out-dir", str(out)]
+        assert analyze.main(args + list(extra)) == 0
+        return capsys.readouterr().out
+
+    assert "önbellekten" not in run()
+    # "12.0" and "12" are the same parameters
+    assert "önbellekten" in run(commission="12.0")
+    assert analyze.find_cached(["--in", str(inp), "--commission", "12", "--default-cost", "80", "--out-dir", str(out)])
+    assert len(list(out.glob("analysis-*.json"))) == 1
+
+    assert "önbellekten" not in run(commission="14")
+    assert "önbellekten" not in run("--no-cache")  # replaces the stored result
+    assert len(list(out.glob("analysis-*.json"))) == 2
+
+    with inp.open("a") as f:
+        f.write(json.dumps({"productId": 99, "priceKurus": 5_000}) + "\n")
+    assert "önbellekten" not in run()
+    assert len(list(out.glob("analysis-*.json"))) == 3
+
+
+def test_streaming_merge_matches_one_pass():
+    from src.analysis.groupby import GroupBy
+    from src.analysis.scenarios import ScenarioGrid
+    from src.analysis.stream import StreamingAnalysis
+
+    rng = random.Random(6)
+    rows = [
+        {"productId": i, "brand": rng.choice("ABC"), "priceKurus": rng.randint(5_000, 60_000), "soldLast3Days": i}
+        for i in range(2_000)
+    ]
+    tables = [normalize_tiers([(150.0, 42.70), (300.0, 72.20)]), normalize_tiers([(200.0, 30.0)])]
+
+    def analysis():
+        grid = ScenarioGrid([10.0, 14.0], [80.0, 150.0], tables, [5.0])
+        return StreamingAnalysis(80.0, 10.0, tables[0], grid=grid, groups=GroupBy(["brand"], top_k=3))
+
+    whole, left, right = analysis(), analysis(), analysis()
+    whole.add(rows)
+    left.add(rows[:700])
+    right.add(rows[700:])
+    left.merge(right)
+    assert left.count == whole.count and left.sums["profitableCount"] == whole.sums["profitableCount"]
+    assert math.isclose(left.sums["profitSum"], whole.sums["profitSum"])
+    a, b = left.grid.report(), whole.grid.report()
+    assert a["pricedCount"] == b["pricedCount"] == 2_000
+    for ra, rb in zip(a["rows"], b["rows"]):
+        assert ra[:7] == rb[:7] and math.isclose(ra[7], rb[7], abs_tol=0.05)
+    ga, gb = left.groups.report(), whole.groups.report()
+    assert [r[:5] for r in ga["groups"]["brand"]["rows"]] == [r[:5] for r in gb["groups"]["brand"]["rows"]]
+    assert ga["topProducts"] == gb["topProducts"]
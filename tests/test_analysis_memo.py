@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import time
+
+from src.analysis import memo
+from src.analysis.memo import ResultCache, cache_key, fingerprint
+
+
+def _artifact(directory, name, size):
+    json_path = directory / f"{name}.json"
+    md_path = directory / f"{name}.md"
+    json_path.write_bytes(b"{" + b" " * (size - 2) + b"}")
+    md_path.write_bytes(b"")
+    return json_path, md_path
+
+
+def test_fingerprint_follows_content(tmp_path, monkeypatch):
+    monkeypatch.setattr(memo, "BLOCK_SIZE", 16)
+    f = tmp_path / "in.ndjson"
+    f.write_bytes(bytes(range(256)) * 40)  # larger than the sampled blocks
+    first = fingerprint(f)
+    st = f.stat()
+    assert fingerprint(f) == first
+    assert cache_key(f, {"a": [1.0]}) != cache_key(f, {"a": [2.0]})
+
+    # same size, rewritten with different sampled bytes and the old mtime
+    f.write_bytes(b"x" * len(bytes(range(256)) * 40))
+    os.utime(f, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert fingerprint(f) != first
+
+    f.write_bytes(bytes(range(256)) * 40)
+    os.utime(f, ns=(st.st_atime_ns, st.st_mtime_ns + 1))
+    assert fingerprint(f) != first
+
+
+
+def test_fingerprint_ignores_an_empty_wal(tmp_path):
+    db = tmp_path / "in.sqlite"
+    con = sqlite3.connect(db)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("CREATE TABLE t (x)")
+    con.close()
+    first = fingerprint(db)
+    # the first read of the input leaves an empty -wal behind
+    reader = sqlite3.connect(db)
+    reader.execute("SELECT * FROM t").fetchall()
+    assert (tmp_path / "in.sqlite-wal").stat().st_size == 0
+    assert fingerprint(db) == first
+    reader.execute("INSERT INTO t VALUES (1)")
+    reader.commit()
+    assert fingerprint(db) != first
+    reader.close()
+
+def test_result_cache_get_put_and_eviction(tmp_path):
+    cache = ResultCache(tmp_path, max_age=3600, max_bytes=2_500)
+    paths = {}
+    for name in ("a", "b", "c"):
+        paths[name] = _artifact(tmp_path, name, 1_000)
+        cache.put(name, {}, *paths[name])
+        if name == "a":
+            assert cache.get("a") == {"json": str(paths["a"][0]), "md": str(paths["a"][1])}
+    # over the cap: the least recently used entry and its files are gone
+    assert cache.get("a") is None and not paths["a"][0].exists()
+    assert cache.get("b") and cache.get("c")
+    assert cache.total_bytes() == 2_000
+
+    # a deleted artifact is a miss
+    paths["b"][0].unlink()
+    assert cache.get("b") is None
+    cache.close()
+
+    old = ResultCache(tmp_path, max_age=0.5, max_bytes=10_000)
+    time.sleep(0.6)
+    assert old.get("c") is None and not paths["c"][0].exists()
+    old.close()
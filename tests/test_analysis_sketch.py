@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import numpy as np
+
+from src.analysis.groupby import GroupBy, TopK
+from src.analysis.sketch import KLLSketch
+
+
+def test_kll_sketch_rank_error_and_merge():
+    rng = np.random.default_rng(0)
+    data = rng.lognormal(5, 1, 400_000)
+    parts = [KLLSketch(seed=i) for i in range(4)]
+    for i, part in enumerate(parts):
+        for chunk in np.array_split(data[i::4], 7):
+            part.update(chunk)
+    sketch = parts[0]
+    for part in parts[1:]:
+        sketch.merge(part)
+    assert sketch.n == len(data) and sketch.retained < 1000
+    ordered = np.sort(data)
+    qs = [0.1, 0.25, 0.5, 0.75, 0.9]
+    for q, v in zip(qs, sketch.quantiles(qs)):
+        assert abs(np.searchsorted(ordered, v) / len(data) - q) <= sketch.rank_error()
+    for p, (lo, hi) in sketch.percentile_bounds([50]).items():
+        assert lo <= np.percentile(data, p) <= hi
+
+
+def test_top_k_keeps_the_largest_and_earliest_on_ties():
+    top = TopK(3)
+    values = np.array([5.0, np.nan, 9.0, 5.0, 1.0, 9.0, 7.0])
+    for start in range(0, len(values), 3):
+        chunk = values[start : start + 3]
+        top.add(chunk, lambda i, start=start: {"row": start + i})
+    assert [(it["row"], it["value"]) for it in top.items()] == [(2, 9.0), (5, 9.0), (6, 7.0)]
+
+
+def test_group_by_counts_and_merge():
+    items = [
+        {"productId": 1, "brand": "A", "merchantId": "7", "badges": "['x', 'y']", "soldLast3Days": "4"},
+        {"productId": 2, "brand": "A", "merchantId": 7, "badges": '["x"]', "soldLast3Days": 1},
+        {"productId": 3, "brand": None, "merchantId": 8, "badges": [], "soldLast3Days": None},
+    ]
+    prices = np.array([100.0, np.nan, 50.0])
+    columns = {"profit": np.array([10.0, np.nan, -5.0]), "profitable": np.array([True, False, False])}
+    whole = GroupBy(top_k=2)
+    whole.add(items, prices, columns)
+    report = whole.report()
+    rows = {k: [r[:5] for r in g["rows"]] for k, g in report["groups"].items()}
+    assert rows["brand"] == [["A", 2, 1, 1.0, 5.0]]
+    assert rows["merchantId"] == [[7, 2, 1, 1.0, 5.0], [8, 1, 1, 0.0, 0.0]]
+    assert rows["badges"] == [["x", 2, 1, 1.0, 5.0], ["y", 1, 1, 1.0, 4.0]]
+    assert rows["boutiqueId"] == []
+    assert [it["productId"] for it in report["topProducts"]["profit"]] == [1, 3]
+
+    left, right = GroupBy(top_k=2), GroupBy(top_k=2)
+    left.add(items[:1], prices[:1], {k: v[:1] for k, v in columns.items()})
+    right.add(items[1:], prices[1:], {k: v[1:] for k, v in columns.items()})
+    left.merge(right)
+    assert left.report() == report
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import asyncio
+
+from src.cache import HTTPCache, normalize_url
+from src.fetch import Fetcher
+
+
+def test_fresh_hit_skips_network(local_site, tmp_path):
+    cache = HTTPCache(tmp_path / "c", ttl=60)
+    f = Fetcher(delay_ms=0, cache=cache)
+    first = [html for _, html in f.iter_pages(local_site.base_url, max_pages=2)]
+    second = [html for _, html in f.iter_pages(local_site.base_url, max_pages=2)]
+    assert first == second
+    assert local_site.hits == [1, 2]
+    assert cache.stats.hits == 2 and cache.stats.misses == 2
+    assert cache.stats.bytes_saved == sum(len(h.encode()) for h in first)
+
+
+def test_stale_entry_revalidates_with_etag(local_site, tmp_path):
+    seen_headers = []
+
+    def respond(page, req):
+        seen_headers.append(req.headers.get("If-None-Match"))
+        if req.headers.get("If-None-Match") == '"v1"':
+            return 304, {"ETag": '"v1"'}, ""
+        return 200, {"ETag": '"v1"'}, "<p>body</p>"
+
+    local_site.respond = respond
+    cache = HTTPCache(tmp_path / "c", ttl=0)
+    f = Fetcher(delay_ms=0, cache=cache)
+    assert f.get_page(local_site.base_url) == "<p>body</p>"
+    assert f.get_page(local_site.base_url) == "<p>body</p>"
+    assert seen_headers == [None, '"v1"']
+    assert cache.stats.revalidated == 1
+
+
+def test_lru_eviction_and_shared_blobs(tmp_path):
+    cache = HTTPCache(tmp_path / "c", max_bytes=2500)
+    import os
+
+    bodies = [os.urandom(1000) for _ in range(3)]
+    cache.put("u0", bodies[0])
+    cache.put("u0-copy", bodies[0])  # same content, one blob
+    cache.put("u1", bodies[1])
+    assert cache.total_bytes() < 2500
+    cache.get("u0")  # u1 is now least recently used
+    cache.put("u2", bodies[2])
+    assert cache.get("u1") is None
+    assert cache.get("u0").body == bodies[0]
+    assert cache.get("u2").body == bodies[2]
+    assert cache.stats.evictions >= 1
+    assert cache.total_bytes() <= 2500 * 0.9
+
+
+def test_tracking_parameters_share_an_entry(tmp_path):
+    url = "https://www.trendyol.com/a/b-p-1?boutiqueId=61&merchantId=7"
+    variant = "https://WWW.trendyol.com/a/b-p-1?utm_source=x&merchantId=7&gclid=y&boutiqueId=61#reviews"
+    assert normalize_url(variant) == normalize_url(url)
+    assert normalize_url(url + "&merchantId=8") != normalize_url(url)
+    cache = HTTPCache(tmp_path / "c")
+    cache.put(url, b"page")
+    assert cache.get(variant).body == b"page"
+
+
+def test_async_crawl_keeps_cache_io_off_the_loop(local_site, tmp_path):
+    cache = HTTPCache(tmp_path / "c", ttl=60)
+    on_loop = []
+    for name in ("lookup", "put"):
+        method = getattr(cache, name)
+
+        def wrapped(*a, _method=method, **kw):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(_method.__name__)
+            except RuntimeError:
+                pass
+            return _method(*a, **kw)
+
+        setattr(cache, name, wrapped)
+    f = Fetcher(delay_ms=0, cache=cache)
+    for _ in range(2):  # misses and stores, then fresh hits
+        assert len(list(f.iter_pages(local_site.base_url, max_pages=3, concurrency=3))) == 3
+    assert cache.stats.stores == 3 and cache.stats.hits == 3
+    assert on_loop == []
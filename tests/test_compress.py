@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from src import cli
+from src.compress import open_read, open_text
+from src.state import iter_ids_from_output
+from src.writer import CSVWriter, NDJSONWriter
+
+
+@pytest.fixture(params=["gz", "zst"])
+def ext(request):
+    if request.param == "zst":
+        pytest.importorskip("zstandard")
+    return request.param
+
+
+def test_ndjson_compressed_flush_boundaries(tmp_path, ext):
+    out = tmp_path / f"out.ndjson.{ext}"
+    w = NDJSONWriter(out)
+    w.write_many({"productId": i, "brand": "Marka"} for i in range(100))
+    w.sync()
+    covered = out.stat().st_size
+    w.write_many([{"productId": 100}])
+    w.close()
+    assert out.read_bytes()[:2] != b'{"'
+    assert list(iter_ids_from_output(out, "ndjson")) == list(range(101))
+    # every flush ends a member/frame, so reading can resume from there
+    assert list(iter_ids_from_output(out, "ndjson", offset=covered)) == [100]
+
+
+def test_csv_compressed_append_drops_torn_frame(tmp_path, ext):
+    out = tmp_path / f"out.csv.{ext}"
+    w = CSVWriter(out)
+    w.write_many([{"productId": 1, "name": "a"}])
+    w.close()
+    good = out.stat().st_size
+    with out.open("ab") as f:
+        f.write(open_read(out).read()[:3])  # not a valid frame
+    w = CSVWriter(out, append=True)
+    assert w.repaired_bytes == 3 and out.stat().st_size == good
+    w.write_many([{"name": "b", "productId": 2}])
+    w.close()
+    with open_text(out, newline="") as f:
+        assert f.read().splitlines() == ["productId,name", "1,a", "2,b"]
+
+
+def test_resume_compressed_output(local_site, tmp_path, ext):
+    out = tmp_path / f"out.ndjson.{ext}"
+    base = [
+        "--url", local_site.base_url,
+        "--max-pages", "10",
+        "--delay-ms", "0",
+        "--format", "ndjson",
+        "--out", str(out),
+        "--checkpoint", str(tmp_path / "cp.json"),
+    ]
+    assert cli.main(base + ["--max-items", "4"]) == 0
+    assert cli.main(base + ["--resume"]) == 0
+    with open_text(out) as f:
+        ids = [json.loads(line)["productId"] for line in f]
+    assert ids == [100, 101, 200, 201, 300, 301, 400, 401, 500, 501]
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import json
+import time
+
+from src import cli
+from src.fetch import Fetcher
+
+
+def test_concurrent_pages_arrive_in_order(local_site):
+    def respond(page, req):
+        # later pages answer first
+        time.sleep(0.05 * (6 - page))
+        return 200, {}, f"<p>{page}</p>"
+
+    local_site.respond = respond
+    f = Fetcher(delay_ms=0)
+    pages = list(f.iter_pages(local_site.base_url, max_pages=5, concurrency=4))
+    assert [pi for pi, _ in pages] == [1, 2, 3, 4, 5]
+    assert all(html == f"<p>{pi}</p>" for pi, html in pages)
+
+
+def test_cli_concurrent_matches_sequential(local_site, tmp_path):
+    outs = []
+    for conc in (1, 3):
+        out = tmp_path / f"out-{conc}.ndjson"
+        rc = cli.main(
+            [
+                "--url", local_site.base_url,
+                "--max-pages", "10",
+                "--delay-ms", "0",
+                "--format", "ndjson",
+                "--out", str(out),
+                "--checkpoint", str(tmp_path / f"cp-{conc}.json"),
+                "--max-items", "7",
+                "--concurrency", str(conc),
+            ]
+        )
+        assert rc == 0
+        rows = [json.loads(x) for x in out.read_text(encoding="utf-8").splitlines()]
+        outs.append([r["productId"] for r in rows])
+        cp = json.loads((tmp_path / f"cp-{conc}.json").read_text(encoding="utf-8"))
+        assert cp["nextPage"] == 5
+    assert outs[0] == outs[1]
+    assert len(outs[0]) == 7
+
+
+def test_pool_reuses_connections(local_site):
+    with Fetcher(delay_ms=0) as f:
+        for _ in range(3):
+            f.get_page(local_site.base_url)
+        list(f.iter_pages(local_site.base_url, max_pages=3))
+        stats = f.conn_stats.summary()
+    assert stats["requests"] == 6
+    assert stats["connections"] == 1
+    assert stats["reusedRequests"] == 5
+    assert f._client is None
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from src import cli, history  # noqa: E402
+from src.history import PriceHistory  # noqa: E402
+
+T0 = "2024-05-01T10:00:00+00:00"
+T1 = "2024-05-02T10:00:00+00:00"
+T2 = "2024-05-03T10:00:00+00:00"
+
+
+def _row(pid, price, at, **kw):
+    return {"productId": pid, "price": price, "collectedAt": at, **kw}
+
+
+def test_history_and_changes(tmp_path):
+    store = PriceHistory(tmp_path / "h", flush_points=2)
+    store.add_rows(
+        [
+            _row(1, "100,00 TL", T0, soldLast3Days=5),
+            _row(2, "50 TL", T0),
+            _row(3, "10 TL", T0),
+            {"productId": None, "price": "1 TL"},
+        ]
+    )
+    store.add_rows([_row(1, "80,00 TL", T2), _row(2, "51 TL", T2), _row(4, "5 TL", T2)])
+    # PDP rows carry a numeric price and favoriteCount
+    store.add_rows([{"productId": 3, "price": 15.0, "favoriteCount": 7, "collectedAt": T2}])
+    store.close()
+    assert len(list((tmp_path / "h").glob("seg-*.npz"))) == 3
+
+    points = store.history(1)
+    assert [p["price"] for p in points] == [100.0, 80.0]
+    assert points[0]["soldLast3Days"] == 5 and points[0]["favoritedCount"] is None
+    assert store.history(3)[-1]["favoritedCount"] == 7
+    assert [p["price"] for p in store.history(1, since=T1)] == [80.0]
+    assert store.history(99) == []
+
+    changes = store.changed_since(T1, 10)
+    # product 2 moved 2%, product 4 was first seen after T1
+    assert [(c["productId"], c["changePct"]) for c in changes] == [(3, 50.0), (1, -20.0)]
+    assert store.changed_since(T1, 10, limit=1)[0]["productId"] == 3
+
+
+def test_large_product_ids(tmp_path):
+    # ids past 2**31 must neither collide nor reorder
+    big, bigger = 2**31 + 5, 2**40 + 1
+    store = PriceHistory(tmp_path / "h")
+    store.add_rows([_row(big, "10 TL", T0), _row(bigger, "20 TL", T0), _row(5, "30 TL", T0)])
+    store.add_rows([_row(big, "15 TL", T2), _row(bigger, "20 TL", T2)])
+    store.close()
+    assert [p["price"] for p in store.history(big)] == [10.0, 15.0]
+    assert [p["price"] for p in store.history(bigger, since=T1)] == [20.0]
+    assert store.history(5, until=T1)[0]["price"] == 30.0
+    assert [(c["productId"], c["changePct"]) for c in store.changed_since(T1, 10)] == [(big, 50.0)]
+
+def test_compaction_keeps_latest_duplicate(tmp_path, monkeypatch):
+    monkeypatch.setattr(history, "MAX_SEGMENTS", 1)
+    store = PriceHistory(tmp_path / "h", flush_points=1)
+    store.add_rows([_row(1, "10 TL", T0)])
+    store.add_rows([_row(1, "12 TL", T0)])
+    store.add_rows([_row(1, "14 TL", T1)])
+    store.close()
+    assert len(list((tmp_path / "h").glob("seg-*.npz"))) == 1
+    assert [p["price"] for p in store.history(1)] == [12.0, 14.0]
+
+
+
+def test_same_second_rows_merge_per_metric(tmp_path):
+    store = PriceHistory(tmp_path / "h")
+    store.add_rows([_row(1, "100 TL", T0, priceOriginal="120 TL", soldLast3Days=5)])
+    store.flush()
+    # a PDP row of the same product in the same second
+    store.add_rows([{"productId": 1, "price": 95.0, "favoriteCount": 7, "collectedAt": T0}])
+    store.close()
+    (point,) = store.history(1)
+    assert point["price"] == 95.0 and point["priceOriginal"] == 120.0
+    assert point["soldLast3Days"] == 5 and point["favoritedCount"] == 7
+
+
+def test_stores_sharing_a_directory(tmp_path, monkeypatch):
+    # two writers (say a listing job and a PDP job) pick the same segment number
+    monkeypatch.setattr(PriceHistory, "_next_seq", lambda self: 1)
+    a, b = PriceHistory(tmp_path / "h"), PriceHistory(tmp_path / "h")
+    a.add_rows([_row(1, "10 TL", T0)])
+    b.add_rows([_row(2, "20 TL", T0)])
+    a.flush()
+    b.flush()
+    a.add_rows([_row(1, "11 TL", T1)])
+    a.flush()
+    assert PriceHistory(tmp_path / "h").stats()["points"] == 3
+    monkeypatch.undo()
+
+    # a reader whose listing predates another process's compaction
+    reader = PriceHistory(tmp_path / "h")
+    stale = reader._segments()
+    b.compact()
+    listings = iter([stale])
+    reader._segments = lambda: next(listings, None) or PriceHistory._segments(reader)
+    assert [p["price"] for p in reader.history(1)] == [10.0, 11.0]
+    assert reader.stats()["segments"] == 1
+
+def test_crawl_records_history(local_site, tmp_path, capsys):
+    hist = tmp_path / "hist"
+    args = [
+        "--url", local_site.base_url,
+        "--max-pages", "10",
+        "--delay-ms", "0",
+        "--out", str(tmp_path / "out.ndjson"),
+        "--checkpoint", "",
+        "--history", str(hist),
+    ]
+    assert cli.main(args) == 0
+    store = PriceHistory(hist)
+    assert store.stats()["products"] == 10
+    assert [p["price"] for p in store.history(201)] == [21.9]
+
+    assert history.main(["--store", str(hist), "product", "201"]) == 0
+    assert json.loads(capsys.readouterr().out)[0]["productId"] == 201
+
+
+def test_history_is_kept_when_the_writer_fails(local_site, tmp_path, monkeypatch):
+    from src import writer
+
+    def fail(self, rows):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(writer.NDJSONWriter, "write_many", fail)
+    hist = tmp_path / "hist"
+    args = [
+        "--url", local_site.base_url,
+        "--max-pages", "10",
+        "--delay-ms", "0",
+        "--format", "ndjson",
+        "--out", str(tmp_path / "out.ndjson"),
+        "--checkpoint", "",
+        "--history", str(hist),
+    ]
+    with pytest.raises(RuntimeError, match="Yazıcı"):
+        cli.main(args)
+    # observations buffered before the failure still reach the store
+    assert PriceHistory(hist).stats()["products"] > 0
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import gzip
+import json
+
+import pytest
+
+from src import migrate, sqlite_store
+from src.normalize import add_price_fields, price_kurus, row_price
+from src.writer import SQLiteWriter
+
+
+@pytest.mark.parametrize(
+    "value,kurus",
+    [
+        ("1.299,90 TL", 129990),
+        ("1.150 TL", 115000),
+        ("12,5 TL", 1250),
+        ("1.000.000,00 TL", 100000000),
+        ("349.99", 34999),
+        (349.99, 34999),
+        (10, 1000),
+        ("TL", None),
+        (None, None),
+    ],
+)
+def test_price_kurus(value, kurus):
+    assert price_kurus(value) == kurus
+
+
+def test_row_price_prefers_kurus_field():
+    assert row_price({"price": "1 TL", "priceKurus": 129990}) == 1299.9
+    assert row_price({"price": "1.299,90 TL"}) == 1299.9
+    assert row_price({"price": "x", "priceKurus": "250"}) == 2.5  # CSV
+    assert add_price_fields({"price": "99 TL", "priceOriginal": None}) == {
+        "price": "99 TL",
+        "priceOriginal": None,
+        "priceKurus": 9900,
+        "priceOriginalKurus": None,
+    }
+
+
+def test_migrate_compressed_ndjson(tmp_path):
+    old = tmp_path / "old.ndjson.gz"
+    with gzip.open(old, "wt", encoding="utf-8") as f:
+        f.write(json.dumps({"productId": 1, "price": "1.150,90 TL"}) + "\n")
+        f.write("{torn\n")
+    new = tmp_path / "new.ndjson.gz"
+    assert migrate.main(["--in", str(old), "--out", str(new)]) == 0
+    with gzip.open(new, "rt", encoding="utf-8") as f:
+        assert [json.loads(line) for line in f] == [
+            {"productId": 1, "price": "1.150,90 TL", "priceKurus": 115090}
+        ]
+
+
+def test_migrate_sqlite_in_place(tmp_path):
+    db = tmp_path / "out.sqlite"
+    w = SQLiteWriter(db)
+    w.write_many([{"productId": 1, "brand": "A", "price": "1.150,90 TL"}])
+    w.close()
+    assert migrate.main(["--in", str(db), "--format", "sqlite"]) == 0
+    assert sqlite_store.read_rows(db, ["productId", "brand", "price", "priceKurus"]) == [
+        {"productId": 1, "brand": "A", "price": 1150.9, "priceKurus": 115090}
+    ]
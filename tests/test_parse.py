@@ -5,3 +5,100 @@ from src.parse import parse_products
 
 def test_parse_empty():
     assert parse_products("<html></html>", page_index=1) == []
+
+
+def test_single_pass_matches_per_selector_extractor():
+    from selectolax.parser import HTMLParser
+
+    from benchmarks.card_css import extract_card_css
+    from benchmarks.fixtures import listing_html
+    from src.parse import _extract_card
+
+    edge = (
+        '<div class="p-card-wrppr" data-id="7">'
+        '<a class="p-card-chldrn-cntnr" href="/a/../b-p-7?merchantId=3#x"></a>'
+        '<div class="price-item">1.000 TL</div>'
+        '<div class="price-item discounted">900 TL</div>'
+        '<div class="name">not a badge</div>'
+        '<div class="badges-wrapper"><div class="product-badge"><span class="name"> Kargo </span></div></div>'
+        '<div class="social-proof"><p class="social-proof-text"><b>Son 3 günde</b> 1,2B+ ürün satıldı'
+        '<span class="focused-text">1,2B+</span></p></div>'
+        '<span class="variant-value">outside overlay</span>'
+        "</div>"
+    )
+    for html in (listing_html(60, seed=3), f"<html><body>{edge}</body></html>"):
+        cards = HTMLParser(html).css("div.p-card-wrppr")
+        assert cards
+        for card in cards:
+            assert _extract_card(card, 2, "t") == extract_card_css(card, 2, "t")
+
+
+def test_embedded_state_fast_path_matches_dom():
+    from benchmarks.fixtures import listing_html
+    from src.parse import PARSE_STATS
+
+    html = listing_html(20, seed=5, with_state=True)
+    before = PARSE_STATS.copy()
+    fast = parse_products(html, page_index=3)
+    dom = parse_products(html, page_index=3, use_state=False)
+    assert PARSE_STATS["state"] == before["state"] + 1
+    assert PARSE_STATS["dom"] == before["dom"] + 1
+    assert len(fast) == len(dom) == 20
+    for a, b in zip(fast, dom):
+        assert a.keys() == b.keys()
+        for key in ("productId", "brand", "name", "price", "priceOriginal",
+                    "priceDiscounted", "rating", "ratingCount", "productUrl",
+                    "imageUrl", "merchantId", "boutiqueId", "badges", "topBadges",
+                    "favoritedCount", "pageIndex"):
+            assert a[key] == b[key], key
+
+
+def test_state_without_products_falls_back_to_dom():
+    from src.parse import PARSE_STATS
+
+    html = (
+        '<script>window.__SEARCH_APP_INITIAL_STATE__ = {"filters": {"a": "}"}};</script>'
+        '<div class="p-card-wrppr" data-id="5"><span class="prdct-desc-cntnr-name">X</span></div>'
+    )
+    before = PARSE_STATS["dom"]
+    rows = parse_products(html, page_index=1)
+    assert [r["productId"] for r in rows] == [5]
+    assert PARSE_STATS["dom"] == before + 1
+
+
+def test_state_price_shapes_and_unreadable_state():
+    import json
+
+    from src.parse import PARSE_STATS
+
+    def page(products):
+        state = json.dumps({"products": products})
+        return (
+            f"<script>window.__SEARCH_APP_INITIAL_STATE__ = {state};</script>"
+            '<div class="p-card-wrppr" data-id="5"><span class="prdct-desc-cntnr-name">X</span></div>'
+        )
+
+    price = {"sellingPrice": {"value": 120}, "originalPrice": "149,90", "discountedPrice": "n/a"}
+    row = parse_products(page([{"id": 1, "price": price}]), page_index=1)[0]
+    assert row["priceKurus"] == 12000 and row["priceOriginalKurus"] == 14990
+
+    # a state shape the fast path cannot read falls back to the cards
+    before = PARSE_STATS.copy()
+    rows = parse_products(page([{"id": 1, "socialProof": 3}]), page_index=1)
+    assert [r["productId"] for r in rows] == [5]
+    assert PARSE_STATS["state_error"] == before["state_error"] + 1
+    assert PARSE_STATS["dom"] == before["dom"] + 1
+
+
+def test_prices_carry_kurus_fields():
+    html = (
+        '<div class="p-card-wrppr" data-id="9">'
+        '<div class="price-item lowest-price-original">1.299,90 TL</div>'
+        '<div class="price-item lowest-price-discounted">1.150 TL</div>'
+        "</div>"
+    )
+    row = parse_products(html, page_index=1)[0]
+    assert row["priceOriginal"] == "1.299,90 TL"
+    assert row["priceOriginalKurus"] == 129990
+    assert row["price"] == row["priceDiscounted"] == "1.150 TL"
+    assert row["priceKurus"] == row["priceDiscountedKurus"] == 115000
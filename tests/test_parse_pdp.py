@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from benchmarks.fixtures import pdp_html, pdp_state
+from src import jsonscan, parse_pdp as pdp
+
+
+def test_scanner_ignores_brackets_and_keys_inside_strings():
+    text = (
+        'var a = "\\"images\\": [1]"; var s = {"note": "} ] {\\" [", '
+        '"images": ["x.jpg"], "product": {"id": 7, "variants": [{"v": "]"}]}};'
+    )
+    found = jsonscan.find_json_values(
+        text, {"images": jsonscan.ARRAY, "product": jsonscan.OBJECT, "variants": jsonscan.ARRAY}
+    )
+    assert found == {
+        "images": ["x.jpg"],
+        "product": {"id": 7, "variants": [{"v": "]"}]},
+        "variants": [{"v": "]"}],
+    }
+
+
+def test_scanner_skips_values_of_the_wrong_kind_or_not_json():
+    text = '{"favoriteCount": null, "product": {id: 1}, "x": {"favoriteCount": 12, "product": {"id": 2}}}'
+    found = jsonscan.find_json_values(
+        text, {"favoriteCount": jsonscan.NUMBER, "product": jsonscan.OBJECT}
+    )
+    assert found == {"favoriteCount": 12, "product": {"id": 2}}
+
+
+def test_parse_pdp_reads_script_data():
+    state = pdp_state(n_variants=3, n_reviews=2)
+    row = pdp.parse_pdp(pdp_html(n_variants=3, n_reviews=2, bundle_kb=4))
+    assert row["productId"] == state["product"]["id"]
+    assert row["name"] == state["product"]["name"]
+    assert row["brand"] == "Marka 37"
+    assert row["price"] == 349.99
+    assert (row["rating"], row["ratingCount"], row["favoriteCount"]) == (4.4, 1234, 5678)
+    assert row["categoryPath"] == ["Giyim", "Üst Giyim", "T-Shirt"]
+    assert (row["seller"], row["sellerId"]) == ("Satıcı A.Ş.", 968)
+    assert len(row["variants"]) == 3 and len(row["images"]) == 12
+    assert row["badges"] == ["En Çok Satan 3. Ürün"]
+
+
+def test_parse_pdp_ignores_analytics_product_objects():
+    state = pdp_state(n_variants=1, n_reviews=1)
+    analytics = '<script>dataLayer.push({"event": "view", "product": {"category": "Giyim", "price": 1}});</script>'
+    html = pdp_html(n_variants=1, n_reviews=1).replace("<head>", "<head>" + analytics, 1)
+    assert analytics in html
+    row = pdp.parse_pdp(html)
+    assert row["productId"] == state["product"]["id"]
+    assert row["name"] == state["product"]["name"]
+
+
+
+def test_parse_pdp_reads_json_numbers_as_numbers():
+    row = pdp.parse_pdp('<script>{"favoriteCount":12.0,"product":{"id":5.0,"name":"a"}}</script>')
+    assert (row["favoriteCount"], row["productId"]) == (12, 5)
+    row = pdp.parse_pdp('<script>{"product":{"id":"5","name":"a","favoriteCount":"1.234"}}</script>')
+    assert (row["favoriteCount"], row["productId"]) == (1234, 5)
+
+def test_parse_pdp_skips_dom_when_scripts_cover_fields(monkeypatch):
+    html = pdp_html(n_variants=2, n_reviews=1).replace("category-top-ranking-wrap-text", "x")
+
+    def no_dom(_html):
+        raise AssertionError("DOM should not be parsed")
+
+    monkeypatch.setattr(pdp, "HTMLParser", no_dom)
+    row = pdp.parse_pdp(html)
+    assert row["price"] == 349.99 and row["badges"] == []
+
+
+def test_parse_pdp_falls_back_to_dom():
+    html = (
+        '<h1 class="product-title"><strong>Marka</strong> Ürün Adı</h1>'
+        '<div class="reviews-summary-average-rating">4,5</div>'
+        '<span class="prc-dsc">199,90 TL</span>'
+    )
+    row = pdp.parse_pdp(html)
+    assert (row["name"], row["brand"], row["rating"]) == ("Ürün Adı", "Marka", 4.5)
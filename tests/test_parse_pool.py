@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import json
+
+from benchmarks.fixtures import listing_html, pdp_html
+from src import cli
+from src.fetch import RawPage
+from src.parse import PARSE_STATS, parse_products
+from src.parse_pdp import parse_pdp
+from src.parse_pool import ParsePool
+
+
+def _strip_time(rows):
+    return [{k: v for k, v in r.items() if k != "collectedAt"} for r in rows]
+
+
+def test_pool_parses_pages_in_order_and_merges_stats():
+    pages = [(i, listing_html(6, seed=i, with_state=i % 2 == 0)) for i in range(1, 7)]
+    before = PARSE_STATS.copy()
+    with ParsePool(2, lookahead=3) as pool:
+        got = list(pool.parse_pages((i, RawPage(h.encode("utf-8"), "utf-8")) for i, h in pages))
+        pdp = pool.parse_pdp(RawPage(pdp_html(n_reviews=3).encode("utf-8"), "utf-8"))
+    assert [i for i, _ in got] == [1, 2, 3, 4, 5, 6]
+    for (i, html), (_, rows) in zip(pages, got):
+        assert _strip_time(rows) == _strip_time(parse_products(html, i))
+    delta = PARSE_STATS - before
+    assert delta["state"] >= 3 and delta["dom"] >= 3
+    assert pdp == parse_pdp(pdp_html(n_reviews=3))
+
+
+def test_cli_parse_workers_matches_inline(local_site, tmp_path):
+    outs = []
+    for workers in (0, 2):
+        out = tmp_path / f"out-{workers}.ndjson"
+        rc = cli.main(
+            [
+                "--url", local_site.base_url,
+                "--max-pages", "10",
+                "--delay-ms", "0",
+                "--format", "ndjson",
+                "--out", str(out),
+                "--checkpoint", str(tmp_path / f"cp-{workers}.json"),
+                "--parse-workers", str(workers),
+            ]
+        )
+        assert rc == 0
+        outs.append([json.loads(x)["productId"] for x in out.read_text(encoding="utf-8").splitlines()])
+    assert outs[0] == outs[1]
+    assert len(outs[0]) == 10
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import io
+import json
+
+import pytest
+
+from src import pdp_cli
+
+
+def test_urls_from_file_and_stdin(local_site, tmp_path, monkeypatch):
+    base = local_site.base_url.split("?")[0]
+    urls = [f"{base}?pi={i}" for i in range(1, 9)]
+    url_file = tmp_path / "urls.txt"
+    url_file.write_text("# comment\n" + "\n".join(urls[:5]) + "\n\n", encoding="utf-8")
+    monkeypatch.setattr("sys.stdin", io.StringIO("\n".join(urls[5:]) + "\n"))
+    out = tmp_path / "pdp.ndjson"
+
+    assert pdp_cli.main(["--urls-file", str(url_file), "--out", str(out), "--delay-ms", "0", "--workers", "3"]) == 0
+    assert pdp_cli.main(["--urls-file", "-", "--out", str(out), "--delay-ms", "0"]) == 0
+
+    rows = [json.loads(x) for x in out.read_text(encoding="utf-8").splitlines()]
+    assert sorted(r["sourceUrl"] for r in rows) == sorted(urls)
+    assert sorted(local_site.hits) == list(range(1, 9))
+
+
+def test_scrape_pdps_reports_errors_per_url():
+    class Boom:
+        def get_page(self, url):
+            if url.endswith("bad"):
+                raise ValueError("bad url")
+            return "<html></html>"
+
+    results = list(pdp_cli.scrape_pdps(Boom(), ["a", "bad", "c"], workers=2))
+    assert {u for u, _, _ in results} == {"a", "bad", "c"}
+    errors = {u: e for u, _, e in results if e is not None}
+    assert list(errors) == ["bad"]
+
+
+def test_cleanup_runs_when_the_writer_fails(local_site, tmp_path, monkeypatch):
+    pytest.importorskip("numpy")
+    from src import writer
+    from src.cache import HTTPCache
+    from src.history import PriceHistory
+
+    def fail(self, rows):
+        raise OSError("disk full")
+
+    from benchmarks.fixtures import pdp_html
+
+    page = pdp_html(n_variants=1, n_reviews=1)
+    local_site.respond = lambda n, req: (200, {}, page)
+    closed = []
+    close_cache = HTTPCache.close
+    monkeypatch.setattr(writer.NDJSONWriter, "write_many", fail)
+    monkeypatch.setattr(HTTPCache, "close", lambda self: closed.append(close_cache(self)))
+    base = local_site.base_url.split("?")[0]
+    hist = tmp_path / "hist"
+    args = [
+        "--urls", *[f"{base}?pi={i}" for i in range(1, 4)],
+        "--out", str(tmp_path / "pdp.ndjson"),
+        "--delay-ms", "0",
+        "--history", str(hist),
+        "--cache-dir", str(tmp_path / "cache"),
+    ]
+    with pytest.raises(RuntimeError, match="Yazıcı"):
+        pdp_cli.main(args)
+    # buffered observations still reach the store, and the cache is closed
+    assert PriceHistory(hist).stats()["points"] > 0
+    assert closed == [None]
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import json
+import time
+
+import pytest
+
+from src import cli, pdp_cli
+from src.pipeline import PDPPipeline
+
+
+def test_listing_feeds_pdp_stage(local_site, tmp_path, monkeypatch):
+    origin = local_site.base_url.split("/sr")[0]
+    monkeypatch.setattr("src.parse.BASE", origin)
+    out = tmp_path / "list.ndjson"
+    pdp_out = tmp_path / "pdp.ndjson"
+    rc = cli.main(
+        [
+            "--url", local_site.base_url,
+            "--max-pages", "10",
+            "--delay-ms", "0",
+            "--format", "ndjson",
+            "--out", str(out),
+            "--checkpoint", "",
+            "--pdp-out", str(pdp_out),
+            "--pdp-workers", "2",
+            "--pdp-queue", "1",
+        ]
+    )
+    assert rc == 0
+    listing = [json.loads(x) for x in out.read_text(encoding="utf-8").splitlines()]
+    pdps = [json.loads(x) for x in pdp_out.read_text(encoding="utf-8").splitlines()]
+    assert len(listing) == 10
+    assert sorted(p["sourceUrl"] for p in pdps) == sorted(r["productUrl"] for r in listing)
+
+
+def test_pdp_rows_are_written_before_close(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdp_cli, "fetch_pdp", lambda f, url, pool=None: {"sourceUrl": url})
+    out = tmp_path / "pdp.ndjson"
+    pipeline = PDPPipeline(None, out, workers=2).start()
+    try:
+        # fewer URLs than the stage pulls ahead, and the crawl still running
+        pipeline.submit("https://example.test/p-1")
+        deadline = time.monotonic() + 5
+        while not (out.exists() and out.read_text(encoding="utf-8")):
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+    finally:
+        pipeline.close()
+    assert json.loads(out.read_text(encoding="utf-8"))["sourceUrl"] == "https://example.test/p-1"
+
+
+def test_pdp_out_must_be_ndjson(tmp_path):
+    args = ["--url", "http://127.0.0.1:1/sr", "--pdp-out", str(tmp_path / "pdp.csv")]
+    with pytest.raises(SystemExit):
+        cli.main(args)
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import time
+
+from src.fetch import Fetcher
+from src.ratelimit import RateLimiter, parse_retry_after
+
+
+def test_aimd_increase_and_decrease():
+    rl = RateLimiter(rate=2.0, min_rate=0.5, max_rate=3.0, increase=0.5)
+    url = "https://www.trendyol.com/sr?pi=1"
+    rl.observe(url, 200, 0.1)
+    assert rl.current_rate("www.trendyol.com") == 2.5
+    rl.observe(url, 429, 0.1)
+    assert rl.current_rate(url) == 1.25
+    for _ in range(10):
+        rl.observe(url, 503)
+    assert rl.current_rate(url) == 0.5
+    for _ in range(10):
+        rl.observe(url, 200, 0.1)
+    assert rl.current_rate(url) == 3.0
+
+
+def test_retry_after_pauses_host():
+    rl = RateLimiter(rate=100.0)
+    url = "http://a.example/x"
+    rl.observe(url, 429, 0.01, retry_after="0.3")
+    t0 = time.monotonic()
+    rl.acquire(url)
+    assert time.monotonic() - t0 >= 0.25
+    # other hosts are unaffected
+    t0 = time.monotonic()
+    rl.acquire("http://b.example/x")
+    assert time.monotonic() - t0 < 0.1
+
+
+def test_parse_retry_after_http_date():
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT", now=1445412470.0) == 10.0
+    assert parse_retry_after("junk") is None
+
+
+def test_fetcher_backs_off_on_429(local_site):
+    calls = {"n": 0}
+
+    def respond(page, req):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            return 429, {"Retry-After": "0"}, "slow down"
+        return 200, {}, "<p>ok</p>"
+
+    local_site.respond = respond
+    f = Fetcher(delay_ms=10)
+    start = f.current_rate()
+    assert f.get_page(local_site.base_url) == "<p>ok</p>"
+    assert f.current_rate() < start
+    snap = f.rate_limiter.snapshot()
+    (host,) = snap
+    assert snap[host]["throttled"] == 1 and snap[host]["requests"] == 2
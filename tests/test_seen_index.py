@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from src import seen_index
+from src.seen_index import SeenIndex, index_path
+
+
+def _write_ndjson(path, ids, mode="w"):
+    with path.open(mode, encoding="utf-8") as f:
+        for pid in ids:
+            f.write(json.dumps({"productId": pid, "name": f"Ürün {pid}"}, ensure_ascii=False) + "\n")
+
+
+def test_builds_then_reopens_without_parsing_output(tmp_path, monkeypatch):
+    out = tmp_path / "out.ndjson"
+    _write_ndjson(out, [5, 3, 9, 3])
+    idx = SeenIndex.open(out, "ndjson")
+    assert len(idx) == 3 and 9 in idx and 4 not in idx
+    idx.close()
+    assert index_path(out).exists()
+
+    def no_parse(*a, **k):
+        raise AssertionError("output should not be parsed")
+
+    monkeypatch.setattr(seen_index, "iter_ids_from_output", no_parse)
+    idx = SeenIndex.open(out, "ndjson")
+    assert sorted(i for i in (3, 5, 9, 7) if i in idx) == [3, 5, 9]
+    idx.close()
+
+
+def test_appends_and_catches_up_from_output_tail(tmp_path):
+    out = tmp_path / "out.csv"
+    out.write_text("productId,name\n1,a\n2,b\n", encoding="utf-8")
+    idx = SeenIndex.open(out, "csv")
+    with out.open("a", encoding="utf-8") as f:
+        f.write("10,x\n")
+    idx.add(10)
+    idx.flush(out.stat().st_size)
+    idx.close()
+    # rows written after the last flush (crash) are picked up from the tail only
+    with out.open("a", encoding="utf-8") as f:
+        f.write("11,y\n12,z\n")
+    idx = SeenIndex.open(out, "csv")
+    assert all(i in idx for i in (1, 2, 10, 11, 12)) and len(idx) == 5
+    assert idx.covered == out.stat().st_size
+    idx.close()
+
+
+@pytest.mark.parametrize("damage", ["truncate_output", "corrupt_index"])
+def test_rebuilds_when_stale_or_corrupt(tmp_path, damage):
+    out = tmp_path / "out.ndjson"
+    _write_ndjson(out, range(100))
+    SeenIndex.open(out, "ndjson").close()
+    if damage == "truncate_output":
+        _write_ndjson(out, [7, 8])
+    else:
+        index_path(out).write_bytes(b"garbage")
+    idx = SeenIndex.open(out, "ndjson")
+    expected = {7, 8} if damage == "truncate_output" else set(range(100))
+    assert {i for i in range(100) if i in idx} == expected
+    idx.close()
+
+
+def test_compacts_large_tail_into_sorted_run(tmp_path):
+    out = tmp_path / "out.ndjson"
+    idx = SeenIndex.open(out, "ndjson")
+    for pid in range(20000, 0, -1):
+        idx.add(pid)
+    idx.flush(0)
+    idx.close()
+    idx = SeenIndex.open(out, "ndjson")
+    assert idx._sorted_count == 20000 and not idx._tail
+    assert 1 in idx and 20000 in idx and 20001 not in idx
+    idx.close()
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import sqlite3
+
+from src import cli, sqlite_store
+from src.writer import SQLiteWriter
+
+
+def test_upsert_updates_in_place(tmp_path):
+    db = tmp_path / "out.sqlite"
+    w = SQLiteWriter(db)
+    w.write_many(
+        [
+            {"productId": 1, "brand": "A", "price": "1.150,90 TL", "badges": ["x"], "collectedAt": "t1"},
+            {"productId": 2, "brand": "B", "price": "99 TL", "badges": [], "collectedAt": "t1"},
+            {"productId": None, "brand": "C"},
+        ]
+    )
+    w.write_many([{"productId": 1, "brand": "A", "price": "1.000,00 TL", "badges": ["y"], "collectedAt": "t2"}])
+    w.close()
+    assert w.stats()["skipped"] == 1
+
+    rows = sqlite_store.read_rows(db, ["productId", "price", "badges", "collectedAt", "firstSeenAt"])
+    assert rows == [
+        {"productId": 1, "price": 1000.0, "badges": ["y"], "collectedAt": "t2", "firstSeenAt": "t1"},
+        {"productId": 2, "price": 99.0, "badges": [], "collectedAt": "t1", "firstSeenAt": "t1"},
+    ]
+    conn = sqlite3.connect(db)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    indexes = {r[1] for r in conn.execute("PRAGMA index_list(products)")}
+    assert {"idx_products_brand", "idx_products_price"} <= indexes
+    conn.close()
+
+
+def test_repeated_crawls_refresh_rows(local_site, tmp_path):
+    db = tmp_path / "out.sqlite"
+    args = [
+        "--url", local_site.base_url,
+        "--max-pages", "10",
+        "--delay-ms", "0",
+        "--format", "sqlite",
+        "--out", str(db),
+        "--checkpoint", "",
+    ]
+    assert cli.main(args) == 0
+    first = {r["productId"]: r["collectedAt"] for r in sqlite_store.read_rows(db)}
+    assert cli.main(args) == 0
+    second = {r["productId"]: r["collectedAt"] for r in sqlite_store.read_rows(db)}
+    assert sorted(second) == [100, 101, 200, 201, 300, 301, 400, 401, 500, 501]
+    # the second crawl updated every product instead of skipping it as seen
+    assert all(second[pid] > first[pid] for pid in first)
+    assert sqlite_store.count_rows(db) == 10
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import json
+
+from src.state import CheckpointJournal, journal_path, load_checkpoint
+
+META = {"url": "u", "out": "o.csv", "format": "csv"}
+
+
+def test_journal_batches_flushes_and_replays(tmp_path):
+    cp = tmp_path / "cp.json"
+    synced = []
+    j = CheckpointJournal(cp, META, every_pages=3, before_flush=lambda: synced.append(1))
+    for page in (1, 2, 3, 4):
+        j.start(page)
+        j.page_done(page, written=page * 10)
+    # one batch of three pages on disk, page 4 still buffered
+    assert len(synced) == 1
+    lines = journal_path(cp).read_text(encoding="utf-8").splitlines()
+    assert [json.loads(x).get("page") for x in lines] == [1, 2, 3]
+    state = load_checkpoint(cp)
+    assert (state["nextPage"], state["written"], state["url"]) == (4, 30, "u")
+
+    # crash: a torn record at the end of the journal is ignored
+    with journal_path(cp).open("a", encoding="utf-8") as f:
+        f.write('{"page": 4, "wri')
+    assert load_checkpoint(cp)["nextPage"] == 4
+
+
+def test_in_flight_and_out_of_order_pages(tmp_path):
+    cp = tmp_path / "cp.json"
+    j = CheckpointJournal(cp, META, next_page=5)
+    for page in (5, 6, 7):
+        j.start(page)
+    j.page_done(7, written=3)
+    j.page_done(5, written=6)
+    state = load_checkpoint(cp)
+    assert state["nextPage"] == 6
+    assert state["done"] == [7]
+    assert state["inFlight"] == [6]
+
+    j2 = CheckpointJournal(cp, META, next_page=state["nextPage"], done=state["done"])
+    j2.page_done(6, written=9)
+    j2.close()
+    assert load_checkpoint(cp)["nextPage"] == 8
+
+
+def test_compaction_folds_journal_into_snapshot(tmp_path):
+    cp = tmp_path / "cp.json"
+    j = CheckpointJournal(cp, META, compact_every=4)
+    for page in range(1, 6):
+        j.page_done(page, written=page)
+    # compacted after 4 records; only page 5 remains in the journal
+    assert json.loads(cp.read_text(encoding="utf-8"))["nextPage"] == 5
+    assert len(journal_path(cp).read_text(encoding="utf-8").splitlines()) == 1
+    j.close()
+    assert journal_path(cp).read_text(encoding="utf-8") == ""
+    assert json.loads(cp.read_text(encoding="utf-8"))["nextPage"] == 6
+    assert not (tmp_path / "cp.json.tmp").exists()
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from src import cli, columnar, writer
+from src.writer import BackgroundWriter, CSVWriter, NDJSONWriter, ParquetWriter
+
+
+def test_ndjson_append_repairs_torn_last_line(tmp_path):
+    out = tmp_path / "out.ndjson"
+    out.write_text('{"productId": 1}\n{"productId": 2, "na', encoding="utf-8")
+    w = NDJSONWriter(out, append=True)
+    assert w.repaired_bytes == len('{"productId": 2, "na')
+    w.write_many([{"productId": 3}])
+    w.sync()
+    w.close()
+    assert [json.loads(x)["productId"] for x in out.read_text(encoding="utf-8").splitlines()] == [1, 3]
+
+
+def test_csv_append_reuses_existing_header(tmp_path, caplog):
+    out = tmp_path / "out.csv"
+    w = CSVWriter(out)
+    w.write_many([{"productId": 1, "name": "a"}])
+    w.close()
+    w = CSVWriter(out, append=True)
+    assert w.repaired_bytes == 0
+    # different key order and an unknown key: columns follow the file's header
+    w.write_many([{"name": "b", "productId": 2, "extra": "x"}])
+    w.write_many([{"name": "c", "productId": 3, "extra": "y"}])
+    w.close()
+    assert out.read_text(encoding="utf-8").splitlines() == ["productId,name", "1,a", "2,b", "3,c"]
+    # the dropped column is reported once
+    assert w.dropped == {"extra"}
+    warnings = [r for r in caplog.records if "extra" in r.getMessage()]
+    assert len(warnings) == 1
+
+
+def test_resume_appends_instead_of_truncating(local_site, tmp_path):
+    out = tmp_path / "out.ndjson"
+    cp = tmp_path / "cp.json"
+    base = [
+        "--url", local_site.base_url,
+        "--max-pages", "10",
+        "--delay-ms", "0",
+        "--format", "ndjson",
+        "--out", str(out),
+        "--checkpoint", str(cp),
+    ]
+    assert cli.main(base + ["--max-items", "4"]) == 0
+    first = local_site.hits[:]
+    # simulate a crash mid-row after the checkpoint
+    with out.open("a", encoding="utf-8") as f:
+        f.write('{"productId": 9')
+    assert cli.main(base + ["--resume"]) == 0
+
+    ids = [json.loads(x)["productId"] for x in out.read_text(encoding="utf-8").splitlines()]
+    assert ids == [100, 101, 200, 201, 300, 301, 400, 401, 500, 501]
+    # completed pages were not fetched again
+    assert local_site.hits[len(first):][0] == 3
+
+
+def test_background_writer_flush_drains_queue(tmp_path):
+    out = tmp_path / "out.ndjson"
+    w = BackgroundWriter(NDJSONWriter(out), max_pending=2)
+    for i in range(50):
+        w.write_many([{"productId": i, "name": "Ürün"}])
+    w.flush()
+    # after flush the file size covers every row (SeenIndex relies on this)
+    lines = out.read_bytes().splitlines()
+    assert [json.loads(x)["productId"] for x in lines] == list(range(50))
+    assert w.stats()["rows"] == 50
+    assert w.stats()["bytes"] == out.stat().st_size
+    w.close()
+    assert json.loads(lines[0])["name"] == "Ürün"
+
+
+def test_background_writer_surfaces_errors(tmp_path):
+    w = BackgroundWriter(NDJSONWriter(tmp_path / "out.ndjson"))
+    w.write_many([{"productId": object()}])
+    with pytest.raises(RuntimeError):
+        w.flush()
+    with pytest.raises(RuntimeError):
+        w.close()
+
+
+def test_stdlib_encoder_matches_orjson():
+    row = {"productId": 1, "name": "Çanta \"x\"", "price": 12.5, "rating": None}
+    assert json.loads(writer._dumps_json(row)) == row
+    if writer.orjson is not None:
+        assert writer._dumps_orjson(row) == writer._dumps_json(row)
+
+
+def test_parquet_typed_columns_row_groups_and_append(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    out = tmp_path / "out.parquet"
+    rows = [
+        {"productId": i, "brand": "Marka", "price": "1.150,90 TL", "badges": ["Kargo Bedava"]}
+        for i in range(5)
+    ]
+    w = ParquetWriter(out, row_group_rows=2)
+    w.write_many(rows)
+    assert not out.exists()  # committed on close only
+    w.close()
+    f = pq.ParquetFile(out)
+    assert f.metadata.num_row_groups == 3
+    assert str(f.schema_arrow.field("productId").type) == "int64"
+    assert str(f.schema_arrow.field("badges").type) == "list<element: string>"
+
+    w = ParquetWriter(out, append=True)
+    w.write_many([{"productId": 9, "price": None, "extra": 1}])
+    w.close()
+    got = columnar.read_rows(out, ["productId", "price", "missing"])
+    assert got[0] == {"productId": 0, "price": 1150.9}
+    assert [r["productId"] for r in got] == [0, 1, 2, 3, 4, 9]
+    assert got[-1]["price"] is None
+
+
+def test_resume_parquet_output(local_site, tmp_path):
+    pytest.importorskip("pyarrow")
+    out = tmp_path / "out.parquet"
+    base = [
+        "--url", local_site.base_url,
+        "--max-pages", "10",
+        "--delay-ms", "0",
+        "--format", "parquet",
+        "--out", str(out),
+        "--checkpoint", str(tmp_path / "cp.json"),
+    ]
+    assert cli.main(base + ["--max-items", "4"]) == 0
+    assert cli.main(base + ["--resume"]) == 0
+    ids = [r["productId"] for r in columnar.read_rows(out, ["productId"])]
+    assert ids == [100, 101, 200, 201, 300, 301, 400, 401, 500, 501]
+
+
+def test_parquet_without_resume_starts_fresh(local_site, tmp_path):
+    pytest.importorskip("pyarrow")
+
+    def run(out, *extra):
+        args = ["--url", local_site.base_url, "--delay-ms", "0", "--format", "parquet", "--checkpoint", ""]
+        args += ["--max-pages", "10"]
+        assert cli.main(args + ["--out", str(out), *extra]) == 0
+        return [r["productId"] for r in columnar.read_rows(out, ["productId"])]
+
+    out = tmp_path / "out.parquet"
+    first = run(out, "--max-items", "3")
+    expected = run(tmp_path / "fresh.parquet")
+    # the second run rewrites the file, the first run's rows included
+    assert run(out) == expected and set(first) < set(expected)
+    assert run(out, "--resume") == expected